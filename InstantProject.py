@@ -24,82 +24,1775 @@ bl_info = {
 #--------------------------------------------------------------
 
 import os
+import re
+import sys
+import json
+import queue
+import zlib
+import struct
+import hashlib
+import tempfile
+import threading
 import bpy
 import bpy_extras
 import math 
+import io
+import time
+import cProfile
+import pstats
+import functools
+import numpy as np
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from mathutils import Vector
+from mathutils.bvhtree import BVHTree
 from bpy_extras.image_utils import load_image
 from bpy_extras import view3d_utils
-from bpy_extras.io_utils import ImportHelper
+from bpy_extras.io_utils import ImportHelper, ExportHelper
+from bpy.app.handlers import persistent
 
 #--------------------------------------------------------------
 # Miscellaneous Functions
 #--------------------------------------------------------------
 
 def INSTANTPROJECT_FN_contextOverride(area_to_check):
-	return [area for area in bpy.context.screen.areas if area.type == area_to_check][0]
+	# Returns the first Area of the given type, or None when running without a Screen (e.g. blender -b).
+	screen = bpy.context.screen
+	if screen is None:
+		return None
+	return next((area for area in screen.areas if area.type == area_to_check), None)
 
 def INSTANTPROJECT_FN_setShaders(nodes, links, image_file):
 	material_output = nodes.get('Material Output') # Output Node
 	principled_bsdf = nodes.get('Principled BSDF') 
-	nodes.remove(principled_bsdf) # Delete BSDF
+	if principled_bsdf is not None:
+		nodes.remove(principled_bsdf) # Delete BSDF
 
-	node_principled_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-	node_colorramp_roughness = nodes.new(type='ShaderNodeValToRGB')
-	node_colorramp_specular = nodes.new(type='ShaderNodeValToRGB')
-	node_bump = nodes.new(type='ShaderNodeBump')
+	node_albedo = nodes.new(type='ShaderNodeTexImage')
+	node_albedo.name = 'albedo'
+	node_albedo.image = image_file
 
+	# Adjustments stay in the Material, so each Projection can be tuned on its own
 	node_curves = nodes.new(type='ShaderNodeRGBCurve')
+	node_curves.name = 'curves'
 	node_HSV = nodes.new(type='ShaderNodeHueSaturation')
-	node_albedo = nodes.new(type='ShaderNodeTexImage')
+	node_HSV.name = 'HSV'
+	node_colorramp_specular = nodes.new(type='ShaderNodeValToRGB')
+	node_colorramp_roughness = nodes.new(type='ShaderNodeValToRGB')
 
-	node_curves.name = 'curves'
-	node_HSV.name  = 'HSV'
-	node_albedo.name = 'albedo'
-	node_albedo.image = image_file
+	node_projection = nodes.new(type='ShaderNodeGroup')
+	node_projection.name = 'instantproject_projection'
+	node_projection.node_tree = INSTANTPROJECT_FN_getNodeGroup('InstantProject Projection')
 
 	# Connections
-	link = links.new(node_HSV.outputs[0], node_principled_bsdf.inputs[0]) # HSV -> Principled BSDF
-	link = links.new(node_albedo.outputs[0], node_curves.inputs[1]) # Albedo -> Curves
-	link = links.new(node_curves.outputs[0], node_HSV.inputs[4]) # Curves -> HSV
-	link = links.new(node_principled_bsdf.outputs[0], material_output.inputs[0]) # Principled BSDF -> Material Output
-	link = links.new(node_HSV.outputs[0], node_colorramp_specular.inputs[0]) # HSV -> ColorRamp Specular
-	link = links.new(node_colorramp_specular.outputs[0], node_principled_bsdf.inputs[7]) # ColorRamp Specular -> Color (Specular)
-	link = links.new(node_HSV.outputs[0], node_colorramp_roughness.inputs[0]) # HSV -> ColorRamp Roughness	
-	link = links.new(node_colorramp_roughness.outputs[0], node_principled_bsdf.inputs[9]) # ColorRamp Specular -> Color (Roughness)
-	link = links.new(node_HSV.outputs[0], node_bump.inputs[2]) # HSV -> Bump
-	link = links.new(node_bump.outputs[0], node_principled_bsdf.inputs[22]) # Bump -> Color (Bump)
-
-	# Default Values
-	node_bump.inputs[0].default_value = 0.2
+	link = links.new(node_albedo.outputs['Color'], node_curves.inputs['Color']) # Albedo -> Curves
+	link = links.new(node_curves.outputs['Color'], node_HSV.inputs['Color']) # Curves -> HSV
+	link = links.new(node_HSV.outputs['Color'], node_projection.inputs['Color']) # HSV -> Projection Shader
+	link = links.new(node_HSV.outputs['Color'], node_colorramp_specular.inputs['Fac']) # HSV -> ColorRamp Specular
+	link = links.new(node_colorramp_specular.outputs['Color'], node_projection.inputs['Specular']) # ColorRamp Specular -> Projection Shader
+	link = links.new(node_HSV.outputs['Color'], node_colorramp_roughness.inputs['Fac']) # HSV -> ColorRamp Roughness
+	link = links.new(node_colorramp_roughness.outputs['Color'], node_projection.inputs['Roughness']) # ColorRamp Roughness -> Projection Shader
+	link = links.new(node_projection.outputs['BSDF'], material_output.inputs['Surface']) # Projection Shader -> Material Output
 
 	# Node Positions
 	material_output.location = Vector((300.0, 0.0))
-	node_principled_bsdf.location = Vector((-100.0, -200.0))
-	node_albedo.location = Vector((-1500.0, -300.0))
-	node_HSV.location = Vector((-800.0, -300.0))
-	node_curves.location = Vector((-1100.0, -300.0))	
-	node_colorramp_specular.location = Vector((-500,-300))
-	node_colorramp_roughness.location = Vector((-500,-600))
-	node_bump.location = Vector((-500,-900))
+	node_projection.location = Vector((0.0, 0.0))
+	node_HSV.location = Vector((-400.0, 0.0))
+	node_curves.location = Vector((-700.0, 0.0))
+	node_albedo.location = Vector((-1100.0, 0.0))
+	node_colorramp_specular.location = Vector((-400.0, -250.0))
+	node_colorramp_roughness.location = Vector((-400.0, -500.0))
+
+#--------------------------------------------------------------
+# Profiling
+#--------------------------------------------------------------
+
+# Opt-in timing of the stages of each Operator run. Runs wrap Operator execute() methods; Stages wrap the steps inside
+# them, either as context managers or as function decorators. Both are no-ops unless profiling is enabled in the Scene.
+INSTANTPROJECT_CACHE_profiling = {'run': None, 'stack': [], 'history': deque(maxlen=20)}
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getMemoryUsage():
+	# Resident memory of the Blender process in MB, or None where it cannot be read.
+	try:
+		with open('/proc/self/statm') as file:
+			return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+	except (OSError, ValueError, AttributeError):
+		pass
+	try:
+		import psutil
+		return psutil.Process().memory_info().rss / (1024 * 1024)
+	except ImportError:
+		return None
+
+@contextmanager
+def INSTANTPROJECT_FN_profileRun(context, name):
+	# Records one Operator run, with its Stages, into the profiling history when profiling is enabled.
+	# With cProfile enabled, the run's 30 most expensive calls are stored with it, to be exported by Export Profile.
+	if not context.scene.INSTANTPROJECT_VAR_profileEnabled or INSTANTPROJECT_CACHE_profiling['run'] is not None:
+		yield
+		return
+	run = {'name': name, 'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seconds': 0.0, 'memory_delta_mb': None, 'stages': [], 'profile': None}
+	profiler = cProfile.Profile() if context.scene.INSTANTPROJECT_VAR_profileCProfile else None
+	INSTANTPROJECT_CACHE_profiling['run'] = run
+	memory = INSTANTPROJECT_FN_getMemoryUsage()
+	start_time = time.perf_counter()
+	if profiler is not None:
+		profiler.enable()
+	try:
+		yield
+	finally:
+		if profiler is not None:
+			profiler.disable()
+		run['seconds'] = time.perf_counter() - start_time
+		end_memory = INSTANTPROJECT_FN_getMemoryUsage()
+		run['memory_delta_mb'] = end_memory - memory if memory is not None and end_memory is not None else None
+		if profiler is not None:
+			stream = io.StringIO()
+			pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(30)
+			run['profile'] = stream.getvalue()
+		INSTANTPROJECT_CACHE_profiling['run'] = None
+		INSTANTPROJECT_CACHE_profiling['stack'].clear()
+		INSTANTPROJECT_CACHE_profiling['history'].append(run)
+
+@contextmanager
+def INSTANTPROJECT_FN_profileStage(name):
+	# Times one Stage of the current run, recording its memory delta and nesting depth.
+	run = INSTANTPROJECT_CACHE_profiling['run']
+	if run is None:
+		yield
+		return
+	stack = INSTANTPROJECT_CACHE_profiling['stack']
+	stage = {'name': name, 'depth': len(stack), 'seconds': 0.0, 'memory_delta_mb': None}
+	run['stages'].append(stage)
+	stack.append(stage)
+	memory = INSTANTPROJECT_FN_getMemoryUsage()
+	start_time = time.perf_counter()
+	try:
+		yield
+	finally:
+		stage['seconds'] = time.perf_counter() - start_time
+		end_memory = INSTANTPROJECT_FN_getMemoryUsage()
+		stage['memory_delta_mb'] = end_memory - memory if memory is not None and end_memory is not None else None
+		stack.pop()
+
+def INSTANTPROJECT_FN_profiled(name):
+	# Decorator recording every call of a function as a Stage of the current run.
+	def decorator(function):
+		@functools.wraps(function)
+		def wrapper(*args, **kwargs):
+			with INSTANTPROJECT_FN_profileStage(name):
+				return function(*args, **kwargs)
+		return wrapper
+	return decorator
+
+def INSTANTPROJECT_FN_profiledRun(name):
+	# Decorator for Operator execute() methods, recording each call as a run.
+	def decorator(execute):
+		@functools.wraps(execute)
+		def wrapper(self, context):
+			with INSTANTPROJECT_FN_profileRun(context, name):
+				return execute(self, context)
+		return wrapper
+	return decorator
+
+# Classes ---------------------- 
+
+class INSTANTPROJECT_OT_exportProfile(bpy.types.Operator, ExportHelper):
+	# Writes the profiling history, with the cProfile report of each run that has one, to a JSON file.
+	bl_idname = 'instantproject.export_profile'
+	bl_label = 'Export Profile'
+	bl_description = 'Exports the recorded Stage timings and cProfile reports to a JSON file'
+	bl_options = {'REGISTER'}
+
+	filename_ext = '.json'
+	filter_glob: bpy.props.StringProperty(
+			default='*.json;',
+			options={'HIDDEN'}
+		)
+
+	@classmethod
+	def poll(cls, context):
+		return len(INSTANTPROJECT_CACHE_profiling['history']) > 0
+
+	def execute(self, context):
+		try:
+			with open(self.filepath, 'w') as file:
+				json.dump({'blender': bpy.app.version_string, 'runs': list(INSTANTPROJECT_CACHE_profiling['history'])}, file, indent=2)
+		except OSError as error:
+			self.report({'WARNING'}, f'Could not write profile: {error}')
+			return {'CANCELLED'}
+		self.report({'INFO'}, f"Exported {len(INSTANTPROJECT_CACHE_profiling['history'])} runs.")
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_clearProfile(bpy.types.Operator):
+	# Clears the profiling history.
+	bl_idname = 'instantproject.clear_profile'
+	bl_label = 'Clear Profile'
+	bl_description = 'Clears the recorded Stage timings'
+	bl_options = {'REGISTER'}
+
+	def execute(self, context):
+		INSTANTPROJECT_CACHE_profiling['history'].clear()
+		return {'FINISHED'}
+
+#--------------------------------------------------------------
+# Shader Node Groups
+#--------------------------------------------------------------
+
+# The Projection and Decal Shader chains are defined once as Node Groups shared by every Material.
+# Projection Materials keep their Curves, HSV and Color Ramps outside the Group, so they can still be adjusted one by one.
+# Bumping a version rebuilds that Group's nodes in place the next time it is requested.
+INSTANTPROJECT_NODEGROUP_versions = {
+	'InstantProject Projection': 2,
+	'InstantProject Decal': 1,
+}
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getSocket(sockets, *names):
+	# Returns the first Socket found by name, to bridge Socket renames between Blender versions.
+	for name in names:
+		socket = sockets.get(name)
+		if socket is not None:
+			return socket
+	return None
+
+def INSTANTPROJECT_FN_ensureGroupSocket(group, in_out, socket_type, name, default=None, min_value=None, max_value=None):
+	# Returns the Group's Input or Output Socket called name, creating it if missing (Blender 3.x and 4.x interfaces).
+	if hasattr(group, 'interface'):
+		socket = next((item for item in group.interface.items_tree if item.item_type == 'SOCKET' and item.in_out == in_out and item.name == name), None)
+		if socket is None:
+			socket = group.interface.new_socket(name=name, in_out=in_out, socket_type=socket_type)
+	else:
+		sockets = group.inputs if in_out == 'INPUT' else group.outputs
+		socket = sockets.get(name)
+		if socket is None:
+			socket = sockets.new(socket_type, name)
+	if default is not None:
+		socket.default_value = default
+	if min_value is not None:
+		socket.min_value = min_value
+	if max_value is not None:
+		socket.max_value = max_value
+	return socket
+
+def INSTANTPROJECT_FN_buildSurfaceNodes(group, color_socket, roughness_floor):
+	# Builds the HSV -> Principled BSDF chain of the Decal Group, with Specular/Roughness Color Ramps and Bump driven by the Color.
+	# Returns the Principled BSDF node.
+	nodes = group.nodes
+	links = group.links
+	group_input = nodes.get('Group Input')
+
+	node_HSV = nodes.new(type='ShaderNodeHueSaturation')
+	node_principled_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+	node_colorramp_specular = nodes.new(type='ShaderNodeValToRGB')
+	node_colorramp_roughness = nodes.new(type='ShaderNodeValToRGB')
+	node_bump = nodes.new(type='ShaderNodeBump')
+
+	link = links.new(color_socket, node_HSV.inputs['Color'])
+	for name in ('Hue', 'Saturation', 'Value'):
+		link = links.new(group_input.outputs[name], node_HSV.inputs[name])
+	link = links.new(node_HSV.outputs['Color'], node_principled_bsdf.inputs['Base Color'])
+	link = links.new(node_HSV.outputs['Color'], node_colorramp_specular.inputs['Fac'])
+	link = links.new(node_colorramp_specular.outputs['Color'], INSTANTPROJECT_FN_getSocket(node_principled_bsdf.inputs, 'Specular', 'Specular IOR Level'))
+	link = links.new(node_HSV.outputs['Color'], node_colorramp_roughness.inputs['Fac'])
+	link = links.new(node_colorramp_roughness.outputs['Color'], node_principled_bsdf.inputs['Roughness'])
+	link = links.new(node_HSV.outputs['Color'], node_bump.inputs['Height'])
+	link = links.new(group_input.outputs['Bump Strength'], node_bump.inputs['Strength'])
+	link = links.new(node_bump.outputs['Normal'], node_principled_bsdf.inputs['Normal'])
+
+	node_colorramp_roughness.color_ramp.elements[0].color = roughness_floor
+
+	node_HSV.location = Vector((-500.0, 0.0))
+	node_principled_bsdf.location = Vector((-100.0, 0.0))
+	node_colorramp_specular.location = Vector((-500.0, -250.0))
+	node_colorramp_roughness.location = Vector((-500.0, -500.0))
+	node_bump.location = Vector((-500.0, -750.0))
+	return node_principled_bsdf
+
+def INSTANTPROJECT_FN_buildProjectionNodeGroup(group):
+	# Color, Specular, Roughness -> Principled BSDF, with Bump driven by the Color.
+	# The adjustments feeding these inputs are built per Material by INSTANTPROJECT_FN_setShaders.
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketColor', 'Color', default=(1.0, 1.0, 1.0, 1.0))
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Specular', default=0.0, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Roughness', default=0.0, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Bump Strength', default=0.2, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'OUTPUT', 'NodeSocketShader', 'BSDF')
+
+	nodes = group.nodes
+	links = group.links
+	group_input = nodes.new(type='NodeGroupInput')
+	group_output = nodes.new(type='NodeGroupOutput')
+	node_principled_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+	node_bump = nodes.new(type='ShaderNodeBump')
+
+	link = links.new(group_input.outputs['Color'], node_principled_bsdf.inputs['Base Color'])
+	link = links.new(group_input.outputs['Specular'], INSTANTPROJECT_FN_getSocket(node_principled_bsdf.inputs, 'Specular', 'Specular IOR Level'))
+	link = links.new(group_input.outputs['Roughness'], node_principled_bsdf.inputs['Roughness'])
+	link = links.new(group_input.outputs['Color'], node_bump.inputs['Height'])
+	link = links.new(group_input.outputs['Bump Strength'], node_bump.inputs['Strength'])
+	link = links.new(node_bump.outputs['Normal'], node_principled_bsdf.inputs['Normal'])
+	link = links.new(node_principled_bsdf.outputs['BSDF'], group_output.inputs['BSDF'])
+
+	group_input.location = Vector((-500.0, 0.0))
+	node_bump.location = Vector((-300.0, -400.0))
+	node_principled_bsdf.location = Vector((-100.0, 0.0))
+	group_output.location = Vector((250.0, 0.0))
+
+def INSTANTPROJECT_FN_buildDecalNodeGroup(group):
+	# Mixes a Decal BSDF over the incoming Shader, using the Decal's Alpha multiplied by Opacity.
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketShader', 'Shader')
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketColor', 'Color', default=(0.0, 0.0, 0.0, 1.0))
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Alpha', default=0.0, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Opacity', default=1.0, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Hue', default=0.5, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Saturation', default=1.0, min_value=0.0, max_value=2.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Value', default=1.0, min_value=0.0, max_value=2.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'INPUT', 'NodeSocketFloat', 'Bump Strength', default=0.1, min_value=0.0, max_value=1.0)
+	INSTANTPROJECT_FN_ensureGroupSocket(group, 'OUTPUT', 'NodeSocketShader', 'Shader')
+
+	nodes = group.nodes
+	links = group.links
+	group_input = nodes.new(type='NodeGroupInput')
+	group_output = nodes.new(type='NodeGroupOutput')
+	node_opacity = nodes.new(type='ShaderNodeMath')
+	node_opacity.operation = 'MULTIPLY'
+	node_mix = nodes.new(type='ShaderNodeMixShader')
+	node_principled_bsdf = INSTANTPROJECT_FN_buildSurfaceNodes(group, group_input.outputs['Color'], (0.7, 0.7, 0.7, 1.0))
+
+	link = links.new(group_input.outputs['Alpha'], node_opacity.inputs[0])
+	link = links.new(group_input.outputs['Opacity'], node_opacity.inputs[1])
+	link = links.new(node_opacity.outputs['Value'], node_mix.inputs['Fac'])
+	link = links.new(group_input.outputs['Shader'], node_mix.inputs[1]) # Both Mix Shader inputs are called 'Shader'
+	link = links.new(node_principled_bsdf.outputs['BSDF'], node_mix.inputs[2])
+	link = links.new(node_mix.outputs['Shader'], group_output.inputs['Shader'])
+
+	group_input.location = Vector((-900.0, 0.0))
+	node_opacity.location = Vector((-100.0, 250.0))
+	node_mix.location = Vector((250.0, 0.0))
+	group_output.location = Vector((450.0, 0.0))
+
+def INSTANTPROJECT_FN_getNodeGroup(name):
+	# Returns the named InstantProject Node Group, building it on first use or rebuilding it when its version is outdated.
+	# Sockets are kept across rebuilds, so Group nodes in existing Materials stay linked.
+	version = INSTANTPROJECT_NODEGROUP_versions[name]
+	group = bpy.data.node_groups.get(name)
+	if group is not None and group.get('instantproject_version') == version:
+		return group
+	if group is None:
+		group = INSTANTPROJECT_FN_track(bpy.data.node_groups.new(name, 'ShaderNodeTree'))
+	group.nodes.clear()
+	if name == 'InstantProject Projection':
+		INSTANTPROJECT_FN_buildProjectionNodeGroup(group)
+	else:
+		INSTANTPROJECT_FN_buildDecalNodeGroup(group)
+	group['instantproject_version'] = version
+	return group
+
+#--------------------------------------------------------------
+# Pixel Buffers
+#--------------------------------------------------------------
+
+# Image pixels are created, filled, read and written through float32 NumPy Arrays and foreach_get/foreach_set,
+# never through Python lists. Arrays are recycled between same-size allocations by a pool.
+
+class INSTANTPROJECT_BufferPool:
+	# Recycles float32 Arrays by size, keeping at most max_bytes of idle Arrays.
+	def __init__(self, max_bytes=1 << 30):
+		self.max_bytes = max_bytes
+		self.idle = OrderedDict()
+		self.idle_bytes = 0
+		self.lock = threading.Lock()
+
+	def acquire(self, shape):
+		# Returns a float32 Array of shape that owns its memory (never a view), reshaped in place.
+		size = math.prod(shape)
+		array = None
+		with self.lock:
+			arrays = self.idle.get(size)
+			if arrays:
+				array = arrays.pop()
+				if not arrays:
+					del self.idle[size]
+				self.idle_bytes -= array.nbytes
+		if array is None:
+			array = np.empty(size, dtype=np.float32)
+		array.shape = shape
+		return array
+
+	def release(self, array, owners=1):
+		# Pools an Array from acquire once the owners names the caller holds it by are its only references (sys.getrefcount
+		# also counts its own and release's argument). Views, and Arrays a view or container still points at, are left to
+		# the garbage collector, so the pool never hands out memory still in use. Returns whether array was pooled.
+		if array.base is not None or sys.getrefcount(array) > owners + 2:
+			return False
+		if not array.dtype == np.float32 or not array.flags.c_contiguous or array.nbytes > self.max_bytes:
+			return False
+		array.shape = (array.size,)
+		with self.lock:
+			self.idle.setdefault(array.size, []).append(array)
+			self.idle.move_to_end(array.size)
+			self.idle_bytes += array.nbytes
+			while self.idle_bytes > self.max_bytes:
+				size, arrays = next(iter(self.idle.items()))
+				self.idle_bytes -= arrays.pop(0).nbytes
+				if not arrays:
+					del self.idle[size]
+		return True
+
+	def clear(self):
+		with self.lock:
+			self.idle.clear()
+			self.idle_bytes = 0
+
+INSTANTPROJECT_CACHE_bufferPool = INSTANTPROJECT_BufferPool()
+
+# Number of pixel writes made through INSTANTPROJECT_FN_setImagePixels per Image name, so a background save can tell
+# whether an Image changed after its pixels were snapshot.
+INSTANTPROJECT_CACHE_imageGenerations = {}
+
+# Precisions Images created by InstantProject are stored at.
+INSTANTPROJECT_ENUM_storagePrecisions = (
+	('AUTO', 'Auto', 'Stores 8-bit for 8-bit sources and float for HDR sources'),
+	('BYTE', '8-bit', 'Stores 8 bits per channel, a quarter of the memory of float'),
+	('FLOAT', 'Float', 'Stores 32-bit float per channel'),
+)
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_newPixels(width, height, color=None):
+	# Returns a pooled (height * width, 4) float32 Array, optionally filled with an RGBA color.
+	pixels = INSTANTPROJECT_CACHE_bufferPool.acquire((width * height, 4))
+	if color is not None:
+		pixels[:] = color
+	return pixels
+
+def INSTANTPROJECT_FN_releasePixels(pixels):
+	# Returns an Array from INSTANTPROJECT_FN_newPixels or INSTANTPROJECT_FN_getImagePixels to the pool; the caller
+	# must not use it afterwards. Views are not pooled, so reshape pooled Arrays in place (pixels.shape = ...).
+	return INSTANTPROJECT_CACHE_bufferPool.release(pixels, owners=2)
+
+def INSTANTPROJECT_FN_getImagePixels(image):
+	# Reads the pixels of an Image into a pooled (height, width, 4) float32 Array.
+	width, height = image.size
+	channels = image.channels
+	if channels == 4:
+		pixels = INSTANTPROJECT_CACHE_bufferPool.acquire((height, width, 4))
+		image.pixels.foreach_get(pixels.ravel())
+		return pixels
+	raw = INSTANTPROJECT_CACHE_bufferPool.acquire((height, width, channels))
+	image.pixels.foreach_get(raw.ravel())
+	rgba = INSTANTPROJECT_CACHE_bufferPool.acquire((height, width, 4))
+	rgba[:, :, 3] = 1.0
+	rgba[:, :, :3] = raw[:, :, :3] if channels >= 3 else raw[:, :, :1]
+	INSTANTPROJECT_CACHE_bufferPool.release(raw)
+	return rgba
+
+def INSTANTPROJECT_FN_setImagePixels(image, pixels):
+	# Writes an RGBA float32 Array (any shape with width * height * 4 values) into an Image.
+	pixels = np.ascontiguousarray(pixels, dtype=np.float32).reshape(-1, 4)
+	if not image.channels == 4:
+		pixels = np.ascontiguousarray(pixels[:, :image.channels])
+	image.pixels.foreach_set(pixels.ravel())
+	image.update()
+	INSTANTPROJECT_CACHE_imageGenerations[image.name] = INSTANTPROJECT_CACHE_imageGenerations.get(image.name, 0) + 1
+
+def INSTANTPROJECT_FN_getImageRows(image, row_start, row_end, chunk_size):
+	# Reads the pixel rows [row_start, row_end) of an Image into a pooled (rows * width, 4) float32 Array.
+	# Blender has no ranged foreach_get, so rows are read through pixel slices of at most chunk_size values. Each slice
+	# briefly copies the whole buffer inside Blender, but only chunk_size values at a time become Python objects.
+	width = image.size[0]
+	channels = image.channels
+	pixels = INSTANTPROJECT_FN_newPixels(width, row_end - row_start)
+	if not channels == 4:
+		pixels[:, 3] = 1.0
+	start = row_start * width * channels
+	step = max(chunk_size // channels, 1)
+	for first in range(0, len(pixels), step):
+		last = min(first + step, len(pixels))
+		values = np.array(image.pixels[start + first * channels:start + last * channels], dtype=np.float32).reshape(-1, channels)
+		if channels == 4:
+			pixels[first:last] = values
+		else:
+			pixels[first:last, :3] = values[:, :3] if channels >= 3 else values[:, :1]
+	return pixels
+
+def INSTANTPROJECT_FN_setImageRows(image, row_start, pixels, chunk_size):
+	# Writes (rows * width, 4) RGBA pixels into an Image from row row_start, through pixel slices of at most chunk_size
+	# values. Call image.update() once all rows are written.
+	channels = image.channels
+	start = row_start * image.size[0] * channels
+	step = max(chunk_size // channels, 1)
+	for first in range(0, len(pixels), step):
+		values = pixels[first:first + step, :channels]
+		image.pixels[start + first * channels:start + (first + len(values)) * channels] = values.ravel().tolist()
+	INSTANTPROJECT_CACHE_imageGenerations[image.name] = INSTANTPROJECT_CACHE_imageGenerations.get(image.name, 0) + 1
+
+def INSTANTPROJECT_FN_fillImage(image, color):
+	# Fills every pixel of an Image with an RGBA color.
+	width, height = image.size
+	pixels = INSTANTPROJECT_FN_newPixels(width, height, color)
+	INSTANTPROJECT_FN_setImagePixels(image, pixels)
+	INSTANTPROJECT_FN_releasePixels(pixels)
+
+def INSTANTPROJECT_FN_linearToSRGB(pixels):
+	# Converts the RGB channels of a (..., 4) Array from linear to sRGB in place, clipped to 0-1.
+	rgb = np.clip(pixels[..., :3], 0.0, 1.0)
+	pixels[..., :3] = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1.0 / 2.4) - 0.055)
+	return pixels
+
+def INSTANTPROJECT_FN_sRGBToLinear(pixels):
+	# Converts the RGB channels of a (..., 4) Array from sRGB to linear in place.
+	rgb = pixels[..., :3]
+	pixels[..., :3] = np.where(rgb <= 0.04045, rgb / 12.92, np.power((np.maximum(rgb, 0.0) + 0.055) / 1.055, 2.4))
+	return pixels
+
+def INSTANTPROJECT_FN_convertPrecision(pixels, source_is_float, target_is_float):
+	# Converts pixels read from a float (linear) or byte (sRGB) Image for writing into the other kind, in one pass.
+	# The pixels of byte Images hold their sRGB encoded values, while float Images hold linear values.
+	if source_is_float and not target_is_float:
+		return INSTANTPROJECT_FN_linearToSRGB(pixels)
+	if target_is_float and not source_is_float:
+		return INSTANTPROJECT_FN_sRGBToLinear(pixels)
+	return pixels
+
+def INSTANTPROJECT_FN_useFloatBuffer(precision, source_image=None):
+	# Resolves a Storage Precision: 'AUTO' stores float only for float (HDR) sources.
+	if precision == 'AUTO':
+		return source_image is not None and source_image.is_float
+	return precision == 'FLOAT'
+
+def INSTANTPROJECT_FN_describeStorage(images):
+	# Returns a report fragment describing how Images are stored, with the memory byte storage saves over float.
+	byte_images = [image for image in images if not image.is_float]
+	if not byte_images:
+		return 'float'
+	saved = sum(image.size[0] * image.size[1] * 12 for image in byte_images)
+	return f'8-bit, {saved / (1024 * 1024):.1f} MB saved over float'
+
+def INSTANTPROJECT_FN_newImage(name, width, height, color=(1.0, 1.0, 1.0, 1.0), **options):
+	# Creates an Image filled with an RGBA color. options are passed on to bpy.data.images.new.
+	# Images are tagged so saving can skip Images InstantProject did not create.
+	image = INSTANTPROJECT_FN_track(bpy.data.images.new(name=name, width=width, height=height, **options))
+	if image.is_float:
+		image.file_format = 'OPEN_EXR'
+	INSTANTPROJECT_FN_fillImage(image, color)
+	return image
+
+#--------------------------------------------------------------
+# Projection Engine
+#--------------------------------------------------------------
+
+INSTANTPROJECT_ENUM_projectEngines = (
+	('NUMPY', 'NumPy', 'Projects the Background Image directly through NumPy, without entering Texture Paint Mode'),
+	('TILED', 'NumPy (Tiled)', 'Projects through NumPy in bands of rows sized by the Memory Budget, reading and writing row by row when an Image does not fit it. Slower, for very large Textures'),
+	('PAINT', 'Texture Paint', "Projects the Background Image through Blender's Texture Paint Project Image operator"),
+)
+
+# Estimated NumPy working memory, in bytes, to rasterize, project and sample one Texel in Tiled mode.
+INSTANTPROJECT_TILE_bytesPerTexel = 256
+# Memory, in bytes, of one value read or written through a pixel slice: a Python float and its slot in the sequence.
+INSTANTPROJECT_TILE_bytesPerSliceValue = 32
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getMeshTriangles(obj, uv_layer=None, depsgraph=None):
+	# Returns the UVs (T, 3, 2) and World Space Positions (T, 3, 3) of every Loop Triangle of a Mesh Object.
+	# With a depsgraph, the evaluated (modified and deformed) Mesh is read instead, through the UV Map of the same name.
+	mesh = obj.data
+	if uv_layer is None:
+		uv_layer = mesh.uv_layers.active
+	if depsgraph is not None:
+		obj_eval = obj.evaluated_get(depsgraph)
+		mesh = obj_eval.to_mesh()
+		uv_layer = mesh.uv_layers.get(uv_layer.name) or mesh.uv_layers.active
+	try:
+		mesh.calc_loop_triangles()
+		triangle_count = len(mesh.loop_triangles)
+		triangle_loops = np.empty(triangle_count * 3, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('loops', triangle_loops)
+		triangle_vertices = np.empty(triangle_count * 3, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('vertices', triangle_vertices)
+
+		uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+		uv_layer.data.foreach_get('uv', uvs)
+		uvs = uvs.reshape(-1, 2)
+
+		co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get('co', co)
+	finally:
+		if depsgraph is not None:
+			obj_eval.to_mesh_clear()
+	matrix = np.array(obj.matrix_world, dtype=np.float64)
+	co = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+	return uvs[triangle_loops].reshape(-1, 3, 2), co[triangle_vertices].reshape(-1, 3, 3)
+
+def INSTANTPROJECT_FN_rasterizeTriangles(uv_triangles, width, height, chunk_size=1 << 22, rows=None):
+	# Yields (texel_indices, triangle_indices, barycentric_weights) for every Texel center covered by a UV Triangle.
+	# Candidate Texels are enumerated per Triangle bounding box, in Chunks of at most chunk_size, to bound memory use.
+	# rows optionally restricts rasterization to the Texel rows [row_start, row_end).
+	row_start, row_end = rows if rows is not None else (0, height)
+	points = uv_triangles.astype(np.float64) * (width, height) - 0.5 # Texel centers land on integer coordinates
+	x_min = np.clip(np.ceil(points[:, :, 0].min(axis=1)), 0, width).astype(np.int64)
+	x_max = np.clip(np.floor(points[:, :, 0].max(axis=1)), -1, width - 1).astype(np.int64)
+	y_min = np.clip(np.ceil(points[:, :, 1].min(axis=1)), row_start, row_end).astype(np.int64)
+	y_max = np.clip(np.floor(points[:, :, 1].max(axis=1)), row_start - 1, row_end - 1).astype(np.int64)
+	span_x = np.maximum(x_max - x_min + 1, 0)
+	span_y = np.maximum(y_max - y_min + 1, 0)
+
+	a, b, c = points[:, 0], points[:, 1], points[:, 2]
+	area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+	counts = np.where(np.abs(area) > 1e-12, span_x * span_y, 0)
+	ends = np.cumsum(counts)
+
+	triangle_start = 0
+	while triangle_start < len(counts):
+		base = ends[triangle_start - 1] if triangle_start > 0 else 0
+		triangle_end = max(int(np.searchsorted(ends, base + chunk_size, side='right')), triangle_start + 1)
+		chunk_counts = counts[triangle_start:triangle_end]
+		total = int(chunk_counts.sum())
+		if total > 0:
+			triangles = np.repeat(np.arange(triangle_start, triangle_end), chunk_counts)
+			offsets = np.arange(total) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+			x = x_min[triangles] + offsets % span_x[triangles]
+			y = y_min[triangles] + offsets // span_x[triangles]
+
+			ta, tb, tc = a[triangles], b[triangles], c[triangles]
+			s = ((x - ta[:, 0]) * (tc[:, 1] - ta[:, 1]) - (y - ta[:, 1]) * (tc[:, 0] - ta[:, 0])) / area[triangles]
+			t = ((tb[:, 0] - ta[:, 0]) * (y - ta[:, 1]) - (tb[:, 1] - ta[:, 1]) * (x - ta[:, 0])) / area[triangles]
+			r = 1.0 - s - t
+			inside = (r >= -1e-6) & (s >= -1e-6) & (t >= -1e-6)
+
+			barycentric = np.stack((r[inside], s[inside], t[inside]), axis=1).astype(np.float32)
+			yield y[inside] * width + x[inside], triangles[inside], barycentric
+		triangle_start = triangle_end
+
+def INSTANTPROJECT_FN_getCameraMatrix(context, camera, resolution=None):
+	# Returns the combined Projection @ View Matrix of a Camera, framed by the Scene Render Resolution or an explicit (x, y) resolution.
+	render = context.scene.render
+	depsgraph = context.evaluated_depsgraph_get()
+	if resolution is None:
+		projection = camera.calc_matrix_camera(depsgraph, x=render.resolution_x, y=render.resolution_y, scale_x=render.pixel_aspect_x, scale_y=render.pixel_aspect_y)
+	else:
+		projection = camera.calc_matrix_camera(depsgraph, x=resolution[0], y=resolution[1])
+	return np.array(projection @ camera.matrix_world.inverted(), dtype=np.float64)
+
+def INSTANTPROJECT_FN_getCameraView(camera):
+	# Returns the World Space origin, forward direction and orthographic flag of a Camera.
+	matrix = np.array(camera.matrix_world, dtype=np.float64)
+	forward = -matrix[:3, 2] / np.linalg.norm(matrix[:3, 2])
+	return matrix[:3, 3], forward, camera.data.type == 'ORTHO'
+
+def INSTANTPROJECT_FN_projectPoints(camera_matrix, points):
+	# Projects World Space Points (N, 3) into normalized Camera Frame coordinates (N, 2).
+	# Also returns a Mask of Points that lie in front of the Camera and inside its Frame.
+	clip = points @ camera_matrix[:, :3].T + camera_matrix[:, 3]
+	in_front = clip[:, 3] > 1e-8
+	w = np.where(in_front, clip[:, 3], 1.0)
+	coords = clip[:, :2] / w[:, None] * 0.5 + 0.5
+	valid = in_front & np.all((coords >= 0.0) & (coords <= 1.0), axis=1)
+	return coords, valid
+
+def INSTANTPROJECT_FN_bilinearTaps(coords, width, height):
+	# Returns the four source Pixel indices (N, 4) and bilinear weights (N, 4) for normalized coordinates (N, 2).
+	x = np.clip(coords[:, 0] * width - 0.5, 0, width - 1)
+	y = np.clip(coords[:, 1] * height - 0.5, 0, height - 1)
+	x0 = np.floor(x).astype(np.int64)
+	y0 = np.floor(y).astype(np.int64)
+	x1 = np.minimum(x0 + 1, width - 1)
+	y1 = np.minimum(y0 + 1, height - 1)
+	fx = (x - x0).astype(np.float32)
+	fy = (y - y0).astype(np.float32)
+
+	indices = np.stack((y0 * width + x0, y0 * width + x1, y1 * width + x0, y1 * width + x1), axis=1)
+	weights = np.stack(((1.0 - fx) * (1.0 - fy), fx * (1.0 - fy), (1.0 - fx) * fy, fx * fy), axis=1)
+	return indices, weights
+
+def INSTANTPROJECT_FN_gatherTaps(flat_pixels, indices, weights):
+	# Gathers and blends bilinear Taps from a flat (pixels, channels) Array in a single fancy-index.
+	return np.einsum('nk,nkc->nc', weights, flat_pixels[indices])
+
+def INSTANTPROJECT_FN_sampleBilinear(pixels, coords):
+	# Bilinearly samples a (height, width, channels) Array at normalized coordinates (N, 2).
+	height, width, channels = pixels.shape
+	indices, weights = INSTANTPROJECT_FN_bilinearTaps(coords, width, height)
+	return INSTANTPROJECT_FN_gatherTaps(pixels.reshape(-1, channels), indices, weights)
+
+def INSTANTPROJECT_FN_dilatePixels(pixels, mask, iterations):
+	# Bleeds filled Texels (mask) outwards into empty neighbours to hide UV seams, like Texture Paint's Seam Bleed.
+	# pixels can be any (height, width, ...) Array, e.g. colours or indices into a Lookup Map.
+	height, width = mask.shape
+	for i in range(iterations):
+		grown = mask.copy()
+		for dy, dx in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+			source = (slice(max(-dy, 0), height - max(dy, 0)), slice(max(-dx, 0), width - max(dx, 0)))
+			target = (slice(max(dy, 0), height - max(-dy, 0)), slice(max(dx, 0), width - max(-dx, 0)))
+			fill = mask[source] & ~grown[target]
+			pixels[target][fill] = pixels[source][fill]
+			grown[target] |= fill
+		mask = grown
+	return mask
+
+#--------------------------------------------------------------
+# Projection Visibility
+#--------------------------------------------------------------
+
+# BVH Trees of the evaluated Target and Occluder Meshes, reused across repeated Projections.
+INSTANTPROJECT_CACHE_occlusionTrees = OrderedDict()
+INSTANTPROJECT_CACHE_occlusionTreeLimit = 4
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getEvaluatedTriangles(obj, depsgraph):
+	# Returns the World Space Vertices (V, 3) and Triangle Vertex indices (T, 3) of an Object's evaluated Mesh.
+	obj_eval = obj.evaluated_get(depsgraph)
+	mesh = obj_eval.to_mesh()
+	try:
+		mesh.calc_loop_triangles()
+		triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('vertices', triangles)
+		co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get('co', co)
+	finally:
+		obj_eval.to_mesh_clear()
+	matrix = np.array(obj.matrix_world, dtype=np.float64)
+	co = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+	return co, triangles.reshape(-1, 3)
+
+def INSTANTPROJECT_FN_getEvaluatedGeometry(context, objects):
+	# Returns the World Space Vertices, Triangles and content hash of the evaluated Meshes in objects, concatenated in order.
+	depsgraph = context.evaluated_depsgraph_get()
+	vertex_list, triangle_list = [], []
+	offset = 0
+	for obj in objects:
+		if not obj.type == 'MESH':
+			continue
+		co, triangles = INSTANTPROJECT_FN_getEvaluatedTriangles(obj, depsgraph)
+		vertex_list.append(co)
+		triangle_list.append(triangles + offset)
+		offset += len(co)
+	vertices = np.concatenate(vertex_list) if vertex_list else np.empty((0, 3))
+	triangles = np.concatenate(triangle_list) if triangle_list else np.empty((0, 3), dtype=np.int32)
+	return vertices, triangles, INSTANTPROJECT_FN_hashArrays(vertices, triangles)
+
+def INSTANTPROJECT_FN_getOcclusionTree(context, objects):
+	# Returns a BVH Tree of every Mesh in objects, and its cache key. Trees are cached while the evaluated geometry is unchanged.
+	vertices, triangles, key = INSTANTPROJECT_FN_getEvaluatedGeometry(context, objects)
+	tree = INSTANTPROJECT_CACHE_occlusionTrees.get(key)
+	if tree is None:
+		tree = BVHTree.FromPolygons(vertices.tolist(), triangles.tolist(), all_triangles=True)
+		INSTANTPROJECT_CACHE_occlusionTrees[key] = tree
+		while len(INSTANTPROJECT_CACHE_occlusionTrees) > INSTANTPROJECT_CACHE_occlusionTreeLimit:
+			INSTANTPROJECT_CACHE_occlusionTrees.popitem(last=False)
+	INSTANTPROJECT_CACHE_occlusionTrees.move_to_end(key)
+	return tree, key
+
+def INSTANTPROJECT_FN_castVisibilityRays(tree, positions, origin, forward, is_ortho, reach, chunk_size=65536):
+	# Casts a ray from the Camera to every Point (N, 3), returning a Mask of the Points reached without hitting anything first.
+	# Ray origins, directions and distances are prepared with NumPy one Chunk at a time.
+	visible = np.ones(len(positions), dtype=bool)
+	ray_cast = tree.ray_cast
+	for start in range(0, len(positions), chunk_size):
+		points = positions[start:start + chunk_size]
+		if is_ortho:
+			directions = np.broadcast_to(forward, points.shape)
+			origins = points - forward * reach
+			distances = np.full(len(points), reach)
+		else:
+			directions = points - origin
+			distances = np.linalg.norm(directions, axis=1)
+			directions = directions / np.maximum(distances, 1e-12)[:, None]
+			origins = np.broadcast_to(origin, points.shape)
+		limits = distances - np.maximum(distances * 1e-3, 1e-4) # Tolerance for the Surface the Point lies on
+
+		chunk_visible = visible[start:start + chunk_size]
+		for i, (ray_origin, direction, distance, limit) in enumerate(zip(origins.tolist(), directions.tolist(), distances.tolist(), limits.tolist())):
+			hit_distance = ray_cast(ray_origin, direction, distance)[3]
+			if hit_distance is not None and hit_distance < limit:
+				chunk_visible[i] = False
+	return visible
+
+def INSTANTPROJECT_FN_getVisibilityTest(camera, world_triangles, tree):
+	# Returns a callable(positions, triangles) masking Texels that face the Camera and are not hidden behind other Geometry.
+	origin, forward, is_ortho = INSTANTPROJECT_FN_getCameraView(camera)
+	reach = camera.data.clip_end
+	normals = np.cross(world_triangles[:, 1] - world_triangles[:, 0], world_triangles[:, 2] - world_triangles[:, 0])
+
+	def visibility(positions, triangles):
+		view = -forward if is_ortho else origin - positions
+		facing = np.einsum('nj,nj->n', normals[triangles], np.broadcast_to(view, positions.shape)) > 0.0
+		facing[facing] = INSTANTPROJECT_FN_castVisibilityRays(tree, positions[facing], origin, forward, is_ortho, reach)
+		return facing
+	return visibility
+
+#--------------------------------------------------------------
+# Projection Lookup Maps
+#--------------------------------------------------------------
+
+# Lookup Maps store, for every Texel of a Projection Image, the source Pixel Taps it samples from.
+# While the Mesh and Camera stay fixed, projecting a new Background Image is a single gather.
+INSTANTPROJECT_CACHE_lookupMaps = OrderedDict()
+INSTANTPROJECT_CACHE_lookupMapLimit = 4
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_hashArrays(*arrays):
+	# Returns a content hash of NumPy Arrays (shape, dtype and data).
+	digest = hashlib.blake2b(digest_size=16)
+	for array in arrays:
+		array = np.ascontiguousarray(array)
+		digest.update(f'{array.shape}{array.dtype.str}'.encode())
+		digest.update(memoryview(array).cast('B'))
+	return digest.hexdigest()
+
+def INSTANTPROJECT_FN_buildLookupMap(uv_triangles, world_triangles, camera_matrix, width, height, source_width, source_height, bleed=2, visibility=None, camera_view=None, rows=None):
+	# Rasterizes the UV Triangles and projects every Texel into the Camera, storing the result as a Lookup Map:
+	#   texels  - flat indices of the Texels that receive a projected colour, covered Texels first, then Seam Bleed
+	#   coords  - normalized Camera Frame coordinates sampled by each of those Texels
+	#   indices - the four source Pixel indices of each Texel's bilinear Taps
+	#   weights - the bilinear weights of those Taps
+	#   mask    - validity Mask of the Projection Image's (height * width) Texels, or of its rows when rows is given
+	#   facing  - cosine between each Texel's Surface Normal and the direction to the Camera (with camera_view)
+	# visibility is an optional callable(positions, triangles) returning a Mask of Texels the Camera can see.
+	# camera_view is an optional (origin, forward, is_ortho) tuple from INSTANTPROJECT_FN_getCameraView.
+	# rows optionally restricts the Map to the Texel rows [row_start, row_end); texels stay indices into the whole Image.
+	row_start, row_end = rows if rows is not None else (0, height)
+	offset = row_start * width
+	if camera_view is not None:
+		normals = np.cross(world_triangles[:, 1] - world_triangles[:, 0], world_triangles[:, 2] - world_triangles[:, 0])
+		normals /= np.maximum(np.linalg.norm(normals, axis=1), 1e-12)[:, None]
+	texel_list, coord_list, facing_list = [], [], []
+	for texels, triangles, barycentric in INSTANTPROJECT_FN_rasterizeTriangles(uv_triangles, width, height, rows=rows):
+		positions = np.einsum('ni,nij->nj', barycentric, world_triangles[triangles])
+		coords, valid = INSTANTPROJECT_FN_projectPoints(camera_matrix, positions)
+		if visibility is not None:
+			valid[valid] = visibility(positions[valid], triangles[valid])
+		texel_list.append(texels[valid])
+		coord_list.append(coords[valid].astype(np.float32))
+		if camera_view is not None:
+			origin, forward, is_ortho = camera_view
+			view = np.broadcast_to(-forward, (np.count_nonzero(valid), 3)) if is_ortho else origin - positions[valid]
+			view = view / np.maximum(np.linalg.norm(view, axis=1), 1e-12)[:, None]
+			facing_list.append(np.einsum('nj,nj->n', normals[triangles[valid]], view).astype(np.float32))
+	texels = np.concatenate(texel_list) if texel_list else np.empty(0, dtype=np.int64)
+	coords = np.concatenate(coord_list) if coord_list else np.empty((0, 2), dtype=np.float32)
+	facing = np.concatenate(facing_list) if facing_list else np.ones(len(texels), dtype=np.float32)
+
+	# Texels shared by neighbouring Triangles keep their last sample
+	texels, first = np.unique(texels[::-1], return_index=True)
+	coords = coords[::-1][first]
+	facing = facing[::-1][first]
+
+	# Seam Bleed: empty Texels next to filled ones borrow their neighbour's sample
+	origin = np.full((row_end - row_start) * width, -1, dtype=np.int64)
+	origin[texels - offset] = np.arange(len(texels))
+	origin = origin.reshape(row_end - row_start, width)
+	covered = origin >= 0
+	mask = INSTANTPROJECT_FN_dilatePixels(origin, covered, bleed).ravel()
+	origin = origin.ravel()
+	bleed_texels = np.flatnonzero(mask & ~covered.ravel()) + offset
+	core_count = len(texels)
+	texels = np.concatenate((texels, bleed_texels))
+	coords = coords[origin[texels - offset]]
+	facing = facing[origin[texels - offset]]
+
+	indices, weights = INSTANTPROJECT_FN_bilinearTaps(coords, source_width, source_height)
+	return {
+		'width': width,
+		'height': height,
+		'source_size': (source_width, source_height),
+		'rows': (row_start, row_end),
+		'texels': texels,
+		'core_count': core_count,
+		'coords': coords,
+		'indices': indices,
+		'weights': weights,
+		'mask': mask,
+		'facing': facing,
+	}
+
+def INSTANTPROJECT_FN_getProjectionInputs(context, obj, camera, occluders=None, camera_resolution=None):
+	# Gathers the Mesh Triangles, Camera Matrix and optional Visibility test (with its cache key) needed to build Lookup Maps.
+	# With Occlusion, the Triangles come from the evaluated Mesh, like the BVH Tree, so modified Surfaces do not hide themselves.
+	# The Tree holds obj and its occluders in name order, so every Object of a batch shares the same cached Tree.
+	camera_matrix = INSTANTPROJECT_FN_getCameraMatrix(context, camera, camera_resolution)
+	visibility = None
+	visibility_key = 'none'
+	if occluders is None:
+		uv_triangles, world_triangles = INSTANTPROJECT_FN_getMeshTriangles(obj)
+	else:
+		uv_triangles, world_triangles = INSTANTPROJECT_FN_getMeshTriangles(obj, depsgraph=context.evaluated_depsgraph_get())
+		tree, visibility_key = INSTANTPROJECT_FN_getOcclusionTree(context, sorted({obj, *occluders}, key=lambda occluder: occluder.name))
+		visibility = INSTANTPROJECT_FN_getVisibilityTest(camera, world_triangles, tree)
+	return uv_triangles, world_triangles, camera_matrix, visibility, visibility_key
+
+@INSTANTPROJECT_FN_profiled('Lookup Map')
+def INSTANTPROJECT_FN_getSizedLookupMap(context, obj, camera, width, height, source_width, source_height, occluders=None, camera_resolution=None, inputs=None):
+	# Returns (key, Lookup Map, built) for a Projection Image and source of the given sizes, building the Map on a cache miss.
+	# inputs reuses a result of INSTANTPROJECT_FN_getProjectionInputs the caller already has.
+	if inputs is None:
+		inputs = INSTANTPROJECT_FN_getProjectionInputs(context, obj, camera, occluders, camera_resolution)
+	uv_triangles, world_triangles, camera_matrix, visibility, visibility_key = inputs
+	key = INSTANTPROJECT_FN_hashArrays(uv_triangles, world_triangles, camera_matrix, np.array((width, height, source_width, source_height)), np.frombuffer(visibility_key.encode(), dtype=np.uint8))
+
+	lookup_map = INSTANTPROJECT_CACHE_lookupMaps.get(key)
+	built = lookup_map is None
+	if built:
+		lookup_map = INSTANTPROJECT_FN_buildLookupMap(uv_triangles, world_triangles, camera_matrix, width, height, source_width, source_height, visibility=visibility, camera_view=INSTANTPROJECT_FN_getCameraView(camera))
+		INSTANTPROJECT_CACHE_lookupMaps[key] = lookup_map
+		while len(INSTANTPROJECT_CACHE_lookupMaps) > INSTANTPROJECT_CACHE_lookupMapLimit:
+			INSTANTPROJECT_CACHE_lookupMaps.popitem(last=False)
+	INSTANTPROJECT_CACHE_lookupMaps.move_to_end(key)
+	return key, lookup_map, built
+
+def INSTANTPROJECT_FN_getLookupMap(context, obj, camera, target_image, source_image, occluders=None, camera_resolution=None, inputs=None):
+	# Returns the cached Lookup Map for this Mesh, Camera and resolution pair, building it on a miss.
+	# When occluders is a list of Objects (possibly empty), back faces and Texels hidden from the Camera are left unprojected.
+	# camera_resolution overrides the Scene Render Resolution used to frame the Camera.
+	key, lookup_map, built = INSTANTPROJECT_FN_getSizedLookupMap(context, obj, camera, *target_image.size, *source_image.size, occluders, camera_resolution, inputs)
+	target_image['instantproject_lookup_map'] = key
+	return lookup_map
+
+def INSTANTPROJECT_FN_applyLookupMap(lookup_map, source, result, texel_slice=slice(None)):
+	# Gathers a (height, width, 4) source Array into a flat (pixels, 4) result Array through a Lookup Map.
+	# texel_slice restricts the gather, e.g. to the covered Texels (slice(core_count)) or the Seam Bleed (slice(core_count, None)).
+	texels = lookup_map['texels'][texel_slice]
+	result[texels] = INSTANTPROJECT_FN_gatherTaps(source.reshape(-1, 4), lookup_map['indices'][texel_slice], lookup_map['weights'][texel_slice])
+	return result
+
+@INSTANTPROJECT_FN_profiled('Project (NumPy)')
+def INSTANTPROJECT_FN_projectNumpy(context, objects, camera, source_image, target_image, occluders=None, inputs=None, source=None):
+	# Projects source_image from camera onto target_image through the active UV Map of every Object in objects.
+	# The Seam Bleed of every Object is gathered first, so it never overwrites Texels covered by another Object.
+	# inputs (one INSTANTPROJECT_FN_getProjectionInputs result per Object) and source (the pixels of source_image,
+	# converted in place and released by the caller) skip work the caller already did. Returns the Lookup Map key of each Object.
+	width, height = target_image.size
+	keys, lookup_maps = [], []
+	for index, obj in enumerate(objects):
+		key, lookup_map, built = INSTANTPROJECT_FN_getSizedLookupMap(context, obj, camera, width, height, *source_image.size, occluders, inputs=None if inputs is None else inputs[index])
+		keys.append(key)
+		lookup_maps.append(lookup_map)
+	target_image['instantproject_lookup_map'] = keys[-1]
+	pixels = INSTANTPROJECT_FN_convertPrecision(INSTANTPROJECT_FN_getImagePixels(source_image) if source is None else source, source_image.is_float, target_image.is_float)
+	result = INSTANTPROJECT_FN_newPixels(width, height, (1.0, 1.0, 1.0, 1.0))
+	for lookup_map in lookup_maps:
+		INSTANTPROJECT_FN_applyLookupMap(lookup_map, pixels, result, slice(lookup_map['core_count'], None))
+	for lookup_map in lookup_maps:
+		INSTANTPROJECT_FN_applyLookupMap(lookup_map, pixels, result, slice(lookup_map['core_count']))
+	INSTANTPROJECT_FN_setImagePixels(target_image, result)
+	if source is None:
+		INSTANTPROJECT_FN_releasePixels(pixels)
+	INSTANTPROJECT_FN_releasePixels(result)
+	return keys
+
+@INSTANTPROJECT_FN_profiled('Blend Cameras')
+def INSTANTPROJECT_FN_projectMultiCamera(context, obj, views, target_image, occluders=None, angle_power=2.0):
+	# Blends several (camera, source_image) views onto target_image in one accumulation pass.
+	# Each Texel is weighted by how directly it faces each Camera (cosine ** angle_power), and only by the Cameras that see it.
+	width, height = target_image.size
+	texel_list, weight_list, sample_list = [], [], []
+	for camera, source_image in views:
+		lookup_map = INSTANTPROJECT_FN_getLookupMap(context, obj, camera, target_image, source_image, occluders, camera_resolution=tuple(source_image.size))
+		source = INSTANTPROJECT_FN_convertPrecision(INSTANTPROJECT_FN_getImagePixels(source_image), source_image.is_float, target_image.is_float)
+		weights = np.clip(lookup_map['facing'], 0.0, 1.0) ** angle_power
+		texel_list.append(lookup_map['texels'])
+		weight_list.append(weights)
+		sample_list.append(INSTANTPROJECT_FN_gatherTaps(source.reshape(-1, 4), lookup_map['indices'], lookup_map['weights']) * weights[:, None])
+		INSTANTPROJECT_FN_releasePixels(source)
+	if not texel_list:
+		return 0
+
+	texels = np.concatenate(texel_list)
+	samples = np.concatenate(sample_list)
+	weight_sum = np.bincount(texels, weights=np.concatenate(weight_list), minlength=height * width)
+	color_sum = np.stack([np.bincount(texels, weights=samples[:, channel], minlength=height * width) for channel in range(4)], axis=1)
+
+	result = INSTANTPROJECT_FN_newPixels(width, height, (1.0, 1.0, 1.0, 1.0))
+	blended = weight_sum > 1e-8
+	result[blended] = color_sum[blended] / weight_sum[blended, None]
+	INSTANTPROJECT_FN_setImagePixels(target_image, result)
+	INSTANTPROJECT_FN_releasePixels(result)
+	return int(np.count_nonzero(blended))
+
+@INSTANTPROJECT_FN_profiled('Project (Tiled)')
+def INSTANTPROJECT_FN_projectTiled(context, obj, camera, source_image, target_image, memory_budget, occluders=None, bleed=2, keep_pixels=False, inputs=None, part=None):
+	# Projects like INSTANTPROJECT_FN_projectNumpy without building a Lookup Map for the whole target: Texel rows are
+	# rasterized and sampled in bands, each rasterizing only the Triangles whose UVs reach it. The source and result are
+	# read or written in full when each fits its share of memory_budget bytes; otherwise only the source rows a band
+	# samples and the band's own rows are read and written, through pixel slices, which is much slower.
+	# With keep_pixels, Texels obj does not cover keep their pixels instead of turning white. Nothing is cached.
+	# part limits the Projection to the covered Texels ('core') or to the Seam Bleed ('bleed'), for Objects sharing
+	# target_image. inputs is one INSTANTPROJECT_FN_getProjectionInputs result. Returns the number of Texels projected.
+	width, height = target_image.size
+	source_width, source_height = source_image.size
+	if inputs is None:
+		inputs = INSTANTPROJECT_FN_getProjectionInputs(context, obj, camera, occluders)
+	uv_triangles, world_triangles, camera_matrix, visibility, visibility_key = inputs
+	camera_view = INSTANTPROJECT_FN_getCameraView(camera)
+
+	# Split the budget between pixel slice values, the source, the result and the band working set
+	chunk_size = max(memory_budget // 16 // INSTANTPROJECT_TILE_bytesPerSliceValue, 4096)
+	source_bytes = source_width * source_height * 16
+	keep_source = source_bytes <= memory_budget // 4
+	window_rows = source_height if keep_source else int(max(2, min(source_height, (memory_budget // 4) // (source_width * 16))))
+	result_bytes = width * height * 16
+	keep_result = result_bytes <= memory_budget // 4
+	band_budget = memory_budget - memory_budget // 16 - min(source_bytes, memory_budget // 4) - (result_bytes if keep_result else 0)
+	band_rows = int(max(1, min(height, band_budget // (width * (INSTANTPROJECT_TILE_bytesPerTexel + 16)))))
+
+	# Texel rows each Triangle's UVs reach
+	rows = uv_triangles[:, :, 1].astype(np.float64) * height - 0.5
+	triangle_first = np.floor(rows.min(axis=1))
+	triangle_last = np.ceil(rows.max(axis=1))
+	del rows
+
+	source = INSTANTPROJECT_FN_convertPrecision(INSTANTPROJECT_FN_getImagePixels(source_image), source_image.is_float, target_image.is_float) if keep_source else None
+	window = None
+	window_index = -1
+	if keep_result and keep_pixels:
+		result = INSTANTPROJECT_FN_getImagePixels(target_image)
+		result.shape = (-1, 4)
+	elif keep_result:
+		result = INSTANTPROJECT_FN_newPixels(width, height, (1.0, 1.0, 1.0, 1.0))
+	projected = 0
+	for row_start in range(0, height, band_rows):
+		row_end = min(row_start + band_rows, height)
+
+		# Rasterize with bleed rows of context on either side, so Seam Bleed crosses band borders
+		context_rows = (max(row_start - bleed, 0), min(row_end + bleed, height))
+		selected = np.flatnonzero((triangle_last >= context_rows[0]) & (triangle_first < context_rows[1]))
+		band_visibility = None
+		if visibility is not None:
+			band_visibility = lambda positions, triangles, selected=selected: visibility(positions, selected[triangles])
+		lookup_map = INSTANTPROJECT_FN_buildLookupMap(uv_triangles[selected], world_triangles[selected], camera_matrix, width, height, source_width, source_height, bleed, band_visibility, camera_view, rows=context_rows)
+		texels = lookup_map['texels']
+		inside = (texels >= row_start * width) & (texels < row_end * width)
+		if part is not None:
+			core = np.arange(len(texels)) < lookup_map['core_count']
+			inside &= core if part == 'core' else ~core
+		texels = texels[inside] - row_start * width
+		indices = lookup_map['indices'][inside]
+		weights = lookup_map['weights'][inside]
+		del lookup_map
+		projected += len(texels)
+
+		if keep_result:
+			band = result[row_start * width:row_end * width]
+		elif keep_pixels:
+			band = INSTANTPROJECT_FN_getImageRows(target_image, row_start, row_end, chunk_size)
+		else:
+			band = INSTANTPROJECT_FN_newPixels(width, row_end - row_start, (1.0, 1.0, 1.0, 1.0))
+		if keep_source:
+			band[texels] = INSTANTPROJECT_FN_gatherTaps(source.reshape(-1, 4), indices, weights)
+		else:
+			# Gather from one window of source rows at a time; the bilinear Taps of a Texel span two adjacent rows
+			window_ids = (indices[:, 0] // source_width) // window_rows
+			order = np.argsort(window_ids, kind='stable')
+			boundaries = np.flatnonzero(np.diff(window_ids[order])) + 1
+			for group in np.split(order, boundaries):
+				if len(group) == 0:
+					continue
+				if not window_ids[group[0]] == window_index:
+					if window is not None:
+						INSTANTPROJECT_FN_releasePixels(window)
+					window_index = int(window_ids[group[0]])
+					first_row = window_index * window_rows
+					window = INSTANTPROJECT_FN_getImageRows(source_image, first_row, min(first_row + window_rows + 1, source_height), chunk_size)
+					INSTANTPROJECT_FN_convertPrecision(window, source_image.is_float, target_image.is_float)
+				band[texels[group]] = INSTANTPROJECT_FN_gatherTaps(window, indices[group] - window_index * window_rows * source_width, weights[group])
+		if not keep_result:
+			INSTANTPROJECT_FN_setImageRows(target_image, row_start, band, chunk_size)
+			INSTANTPROJECT_FN_releasePixels(band)
+		del band # With keep_result, a view that would keep result out of the pool
+
+	if source is not None:
+		INSTANTPROJECT_FN_releasePixels(source)
+	if window is not None:
+		INSTANTPROJECT_FN_releasePixels(window)
+	if keep_result:
+		INSTANTPROJECT_FN_setImagePixels(target_image, result)
+		INSTANTPROJECT_FN_releasePixels(result)
+	else:
+		target_image.update()
+	return projected
+
+#--------------------------------------------------------------
+# Dirty Region Reprojection
+#--------------------------------------------------------------
+
+# When a Background Image is edited and reloaded, only the Texels whose bilinear Taps read changed pixels are reprojected.
+# Changes are found by comparing per-block fingerprints of the source against those recorded at the last Projection,
+# so no copy of the source pixels is kept. Records are keyed by (Projection Image name, Object name), since a batch
+# Projection can share one Projection Image between several Objects. Fingerprints only live in memory; the Camera,
+# source and Occluders of every Projection are also stored on its Projection Image ('instantproject_sources'), so
+# Projections made before the file was reopened, or whose fingerprints were dropped, are redone in full.
+INSTANTPROJECT_CACHE_projectionSources = OrderedDict()
+INSTANTPROJECT_CACHE_projectionSourceLimit = 32
+INSTANTPROJECT_DIRTY_blockSize = 64
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_blockFingerprints(pixels, block_size=INSTANTPROJECT_DIRTY_blockSize):
+	# Returns a (blocks_y, blocks_x) uint64 Array of position-weighted sums of the raw pixel bits of each block.
+	# Works one row of blocks at a time, so the uint64 working set stays small for very large Images.
+	height, width = pixels.shape[:2]
+	blocks_y = -(-height // block_size)
+	blocks_x = -(-width // block_size)
+	words = np.ascontiguousarray(pixels).view(np.uint32).reshape(height, width * 4)
+	weights = np.random.default_rng(0x1f2e3d4c).integers(1, 1 << 62, size=(block_size, 1, block_size * 4), dtype=np.uint64) | np.uint64(1)
+	fingerprints = np.empty((blocks_y, blocks_x), dtype=np.uint64)
+	for block_y in range(blocks_y):
+		band = words[block_y * block_size:(block_y + 1) * block_size]
+		padded = np.zeros((band.shape[0], blocks_x * block_size * 4), dtype=np.uint64)
+		padded[:, :band.shape[1]] = band
+		padded = padded.reshape(band.shape[0], blocks_x, block_size * 4)
+		padded *= weights[:band.shape[0]]
+		fingerprints[block_y] = padded.sum(axis=(0, 2), dtype=np.uint64)
+	return fingerprints
+
+def INSTANTPROJECT_FN_getTapBlocks(lookup_map, block_size=INSTANTPROJECT_DIRTY_blockSize):
+	# Returns the source block index of every bilinear Tap (N, 4) of a Lookup Map, cached on the Map.
+	key = f'tap_blocks_{block_size}'
+	if key not in lookup_map:
+		source_width = lookup_map['source_size'][0]
+		blocks_x = -(-source_width // block_size)
+		indices = lookup_map['indices']
+		lookup_map[key] = ((indices // source_width) // block_size * blocks_x + (indices % source_width) // block_size).astype(np.int32)
+	return lookup_map[key]
+
+def INSTANTPROJECT_FN_recordProjectionSource(target_image, obj, camera, source_image, occluders=None, lookup_key=None, fingerprints=None, views=None, angle_power=2.0):
+	# Records that obj was projected into target_image, so reloading the source reprojects it. views lists the
+	# (camera, source_image) pairs of a Blend Cameras Projection instead of camera and source_image. lookup_key and
+	# fingerprints (of the raw source pixels) let the next reload update only the Texels sampling changed blocks.
+	sources = json.loads(target_image.get('instantproject_sources', '{}'))
+	record = {'occluders': None if occluders is None else [occluder.name for occluder in occluders]}
+	if views is None:
+		record.update(source=source_image.name, camera=camera.name)
+	else:
+		record.update(views=[[view_camera.name, view_image.name] for view_camera, view_image in views], angle_power=angle_power)
+	sources[obj.name] = record
+	target_image['instantproject_sources'] = json.dumps(sources)
+
+	record_key = (target_image.name, obj.name)
+	INSTANTPROJECT_CACHE_projectionSources.pop(record_key, None)
+	if fingerprints is not None:
+		INSTANTPROJECT_CACHE_projectionSources[record_key] = {'source': source_image.name, 'lookup_map': lookup_key, 'fingerprints': fingerprints}
+		while len(INSTANTPROJECT_CACHE_projectionSources) > INSTANTPROJECT_CACHE_projectionSourceLimit:
+			INSTANTPROJECT_CACHE_projectionSources.popitem(last=False)
+
+@INSTANTPROJECT_FN_profiled('Reproject (Dirty Regions)')
+def INSTANTPROJECT_FN_reprojectDirty(context, obj, camera, source_image, target_image, occluders=None):
+	# Reprojects source_image into the Texels of target_image that obj's Lookup Map covers, like INSTANTPROJECT_FN_projectNumpy.
+	# Other Texels keep their pixels, so Objects sharing target_image are left alone. When obj was last projected into
+	# target_image from the same source through the same Lookup Map, only Texels sampling changed blocks are updated.
+	# Returns (updated Texels, projected Texels).
+	key, lookup_map, built = INSTANTPROJECT_FN_getSizedLookupMap(context, obj, camera, *target_image.size, *source_image.size, occluders)
+	target_image['instantproject_lookup_map'] = key
+	source = INSTANTPROJECT_FN_getImagePixels(source_image)
+	fingerprints = INSTANTPROJECT_FN_blockFingerprints(source)
+	INSTANTPROJECT_FN_convertPrecision(source, source_image.is_float, target_image.is_float)
+	record_key = (target_image.name, obj.name)
+	record = INSTANTPROJECT_CACHE_projectionSources.get(record_key)
+	incremental = record is not None and record['source'] == source_image.name and record['lookup_map'] == key and record['fingerprints'].shape == fingerprints.shape
+
+	selected = slice(None)
+	updated = len(lookup_map['texels'])
+	if incremental:
+		dirty = (fingerprints != record['fingerprints']).ravel()
+		selected = np.flatnonzero(dirty[INSTANTPROJECT_FN_getTapBlocks(lookup_map)].any(axis=1)) if dirty.any() else np.empty(0, dtype=np.int64)
+		updated = len(selected)
+	if updated:
+		result = INSTANTPROJECT_FN_getImagePixels(target_image)
+		result.shape = (-1, 4)
+		INSTANTPROJECT_FN_applyLookupMap(lookup_map, source, result, selected)
+		INSTANTPROJECT_FN_setImagePixels(target_image, result)
+		INSTANTPROJECT_FN_releasePixels(result)
+	INSTANTPROJECT_FN_releasePixels(source)
+	INSTANTPROJECT_FN_recordProjectionSource(target_image, obj, camera, source_image, occluders, key, fingerprints)
+	return updated, len(lookup_map['texels'])
+
+def INSTANTPROJECT_FN_forgetProjectionSources(image_name):
+	# Drops the fingerprints of every Object projected into an Image, e.g. once its pixels changed by other means,
+	# so the next reload reprojects them in full.
+	for record_key in [record_key for record_key in INSTANTPROJECT_CACHE_projectionSources if record_key[0] == image_name]:
+		del INSTANTPROJECT_CACHE_projectionSources[record_key]
+
+def INSTANTPROJECT_FN_getProjectionSources(source_image):
+	# Returns (Projection Image, Object, record) for every Projection recorded from source_image, Blend Cameras included.
+	records = []
+	for target_image in bpy.data.images:
+		if 'instantproject_sources' not in target_image:
+			continue
+		for object_name, record in json.loads(target_image['instantproject_sources']).items():
+			names = [image_name for camera_name, image_name in record['views']] if 'views' in record else [record['source']]
+			obj = bpy.data.objects.get(object_name)
+			if source_image.name in names and obj is not None:
+				records.append((target_image, obj, record))
+	return records
+
+def INSTANTPROJECT_FN_reloadSourceImage(context, source_image):
+	# Reloads source_image from disk and reprojects every Projection recorded from it. Returns the number of Texels updated.
+	# With the Tiled Engine, Projections are redone in full within the Memory Budget instead of through cached Lookup Maps.
+	source_image.reload()
+	updated = 0
+	tiled = context.scene.INSTANTPROJECT_VAR_projectEngine == 'TILED'
+	records = INSTANTPROJECT_FN_getProjectionSources(source_image)
+	with INSTANTPROJECT_FN_recordHistory(context, 'Reload Background Image', list({target_image for target_image, obj, record in records})):
+		for target_image, obj, record in records:
+			occluders = None if record['occluders'] is None else [occluder for occluder in map(bpy.data.objects.get, record['occluders']) if occluder is not None]
+			if 'views' in record:
+				views = [(bpy.data.objects.get(camera_name), bpy.data.images.get(image_name)) for camera_name, image_name in record['views']]
+				if any(camera is None or image is None for camera, image in views):
+					continue
+				updated += INSTANTPROJECT_FN_projectMultiCamera(context, obj, views, target_image, occluders, record['angle_power'])
+				INSTANTPROJECT_FN_recordProjectionSource(target_image, obj, None, None, occluders, views=views, angle_power=record['angle_power'])
+				continue
+			camera = bpy.data.objects.get(record['camera'])
+			if camera is None:
+				continue
+			if tiled:
+				updated += INSTANTPROJECT_FN_projectTiled(context, obj, camera, source_image, target_image, context.scene.INSTANTPROJECT_VAR_memoryBudget * 1024 * 1024, occluders, keep_pixels=True)
+				INSTANTPROJECT_FN_recordProjectionSource(target_image, obj, camera, source_image, occluders)
+			else:
+				updated += INSTANTPROJECT_FN_reprojectDirty(context, obj, camera, source_image, target_image, occluders)[0]
+
+	# Refresh the Viewport Proxy shown for source_image
+	camera = context.scene.camera
+	if camera is not None and INSTANTPROJECT_FN_getBackgroundImage(camera) == source_image and not camera.data.background_images[0].image == source_image:
+		camera.data.background_images[0].image = INSTANTPROJECT_FN_getViewportProxy(context, source_image, int(context.scene.INSTANTPROJECT_VAR_viewportProxySize))
+	return updated
+
+def INSTANTPROJECT_FN_watchBackgroundImage():
+	# Timer: reloads the Scene's Background Image and reprojects it when its file changes on disk.
+	# Returns None (stopping the Timer) once watching is switched off.
+	context = bpy.context
+	scene = context.scene
+	if scene is None or not scene.INSTANTPROJECT_VAR_watchBackgroundImage:
+		return None
+	image = scene.INSTANTPROJECT_VAR_cameraBackgroundImage
+	if image is not None and image.source == 'FILE' and image.packed_file is None:
+		filepath = bpy.path.abspath(image.filepath, library=image.library)
+		try:
+			mtime = os.path.getmtime(filepath)
+		except OSError:
+			return 1.0
+		if image.get('instantproject_mtime') is None:
+			image['instantproject_mtime'] = mtime
+		elif not image['instantproject_mtime'] == mtime:
+			image['instantproject_mtime'] = mtime
+			INSTANTPROJECT_FN_reloadSourceImage(context, image)
+	return 1.0
+
+def INSTANTPROJECT_FN_updateWatchBackgroundImage(self, context):
+	if self.INSTANTPROJECT_VAR_watchBackgroundImage and not bpy.app.timers.is_registered(INSTANTPROJECT_FN_watchBackgroundImage):
+		bpy.app.timers.register(INSTANTPROJECT_FN_watchBackgroundImage, first_interval=1.0)
+
+@persistent
+def INSTANTPROJECT_FN_resumeWatchBackgroundImage(*args):
+	# Timers are dropped when a file is loaded, so restart watching for files saved with it switched on.
+	scene = bpy.context.scene
+	if scene is not None:
+		INSTANTPROJECT_FN_updateWatchBackgroundImage(scene, bpy.context)
+
+#--------------------------------------------------------------
+# Sequence Projection
+#--------------------------------------------------------------
+
+# Image Sequences (e.g. tracked plates) are projected frame by frame and written straight back to disk as a PNG sequence.
+# Frames are decoded ahead of the Projection by a worker thread into a bounded queue, and at most a few encoded frames
+# wait to be written, so memory use does not grow with the length of the clip. The Lookup Map is only rebuilt when
+# the Camera, Object, Occluders or frame size change between frames.
+
+# Frames decoded ahead of the Projection, and frames waiting to be written.
+INSTANTPROJECT_SEQUENCE_prefetchDepth = 4
+INSTANTPROJECT_SEQUENCE_pendingWrites = 4
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getSequenceFiles(filepath):
+	# Returns the (file number, path) pairs of the Image Sequence containing filepath (e.g. plate.0001.exr), sorted by number.
+	filepath = bpy.path.abspath(filepath)
+	directory, name = os.path.split(filepath)
+	match = re.match(r'^(.*?)(\d+)(\D*)$', name)
+	if match is None:
+		return [(0, filepath)]
+	head, tail = match.group(1), match.group(3)
+	pattern = re.compile(re.escape(head) + r'(\d+)' + re.escape(tail) + '$')
+	files = []
+	for entry in os.listdir(directory or '.'):
+		entry_match = pattern.match(entry)
+		if entry_match:
+			files.append((int(entry_match.group(1)), os.path.join(directory, entry)))
+	return sorted(files)
+
+def INSTANTPROJECT_FN_getFrameReader():
+	# Returns a thread-safe frame reader when OpenImageIO is available (it ships with recent Blender builds), else None.
+	try:
+		import OpenImageIO
+	except ImportError:
+		return None
+	return INSTANTPROJECT_FN_readFrameOIIO
+
+def INSTANTPROJECT_FN_isLinearColorspace(name):
+	# Whether a colorspace name reported by OpenImageIO or Blender holds scene linear values, e.g. 'lin_srgb' or 'Linear Rec.709'.
+	name = name.lower()
+	return 'lin' in name or name in {'acescg', 'aces2065-1'}
+
+def INSTANTPROJECT_FN_readFrameOIIO(filepath):
+	# Reads an Image file into a pooled bottom-up (height, width, 4) float32 Array without touching bpy.
+	# Returns (pixels, linear): whether the file stores linear values, from its colorspace, else from its pixel format.
+	import OpenImageIO
+	buffer = OpenImageIO.ImageBuf(filepath)
+	data = buffer.get_pixels(OpenImageIO.FLOAT)
+	if buffer.has_error or data is None or data.size == 0:
+		raise IOError(buffer.geterror() or 'unreadable Image')
+	spec = buffer.spec()
+	height, width, channels = spec.height, spec.width, spec.nchannels
+	data = data.reshape(height, width, channels)[::-1]
+	pixels = INSTANTPROJECT_FN_newPixels(width, height)
+	pixels.shape = (height, width, 4)
+	pixels[:, :, :3] = data[:, :, :3] if channels >= 3 else data[:, :, :1]
+	pixels[:, :, 3] = data[:, :, -1] if channels in {2, 4} else 1.0
+	colorspace = spec.get_string_attribute('oiio:ColorSpace')
+	linear = INSTANTPROJECT_FN_isLinearColorspace(colorspace) if colorspace else spec.format.basetype in (OpenImageIO.HALF, OpenImageIO.FLOAT, OpenImageIO.DOUBLE)
+	return pixels, linear
+
+def INSTANTPROJECT_FN_readFrameBpy(filepath):
+	# Main thread: reads an Image file through a temporary Image into a pooled (height, width, 4) float32 Array.
+	# Returns (pixels, linear): Blender reads float Images as scene linear and byte Images as stored.
+	image = bpy.data.images.load(filepath, check_existing=False)
+	try:
+		return INSTANTPROJECT_FN_getImagePixels(image), image.is_float
+	finally:
+		bpy.data.images.remove(image)
+
+class INSTANTPROJECT_FramePrefetcher:
+	# Decodes the frames of an Image Sequence on a worker thread, keeping at most depth frames queued ahead.
+	# Without a thread-safe reader, frames are read through bpy on the main thread as they are requested.
+	def __init__(self, filepaths, depth=INSTANTPROJECT_SEQUENCE_prefetchDepth):
+		self.filepaths = list(filepaths)
+		self.reader = INSTANTPROJECT_FN_getFrameReader()
+		self.queue = queue.Queue(maxsize=max(1, depth))
+		self.stopped = threading.Event()
+		self.thread = None
+		self.read_count = 0
+		if self.reader is not None:
+			self.thread = threading.Thread(target=self.run, name='instantproject_prefetch', daemon=True)
+			self.thread.start()
+
+	def run(self):
+		for filepath in self.filepaths:
+			try:
+				item = (filepath, *self.reader(filepath), None)
+			except Exception as error:
+				item = (filepath, None, False, str(error))
+			while not self.stopped.is_set():
+				try:
+					self.queue.put(item, timeout=0.1)
+					break
+				except queue.Full:
+					pass
+			if self.stopped.is_set():
+				if item[1] is not None:
+					INSTANTPROJECT_FN_releasePixels(item[1])
+				return
+			item = None # Owned by the consumer now, which returns the pixels to the pool
+
+	def next(self):
+		# Returns (filepath, pixels, linear) of the next frame, in order. pixels is a pooled Array the caller releases,
+		# linear whether it holds linear rather than sRGB encoded values.
+		# Not a generator, so no suspended frame keeps a reference that would keep pixels out of the pool.
+		if self.thread is None:
+			filepath = self.filepaths[self.read_count]
+			self.read_count += 1
+			return filepath, INSTANTPROJECT_FN_readFrameBpy(filepath)
+		filepath, pixels, linear, error = self.queue.get()
+		if error is not None:
+			raise IOError(f'Could not read {filepath}: {error}')
+		return filepath, pixels, linear
+
+	def close(self):
+		self.stopped.set()
+		if self.thread is None:
+			return
+		while self.thread.is_alive() or not self.queue.empty():
+			try:
+				filepath, pixels, linear, error = self.queue.get(timeout=0.1)
+			except queue.Empty:
+				continue
+			if pixels is not None:
+				INSTANTPROJECT_FN_releasePixels(pixels)
+		self.thread.join()
+
+def INSTANTPROJECT_FN_getSequenceSignature(context, obj, camera, occluders=None):
+	# Returns everything a Lookup Map depends on that can change between frames of an animation, as a tuple.
+	# Without Occlusion, Projection reads the undeformed Mesh, which does not change with the frame. With Occlusion, the
+	# evaluated geometry of obj and its occluders is hashed, so Armature or Shape Key animation rebuilds the Map.
+	data = camera.data
+	signature = [tuple(value for row in obj.matrix_world for value in row), tuple(value for row in camera.matrix_world for value in row)]
+	signature.append((data.type, data.lens, data.ortho_scale, data.shift_x, data.shift_y, data.sensor_width, data.sensor_height, data.sensor_fit))
+	if occluders is not None:
+		signature.append(INSTANTPROJECT_FN_getEvaluatedGeometry(context, sorted({obj, *occluders}, key=lambda occluder: occluder.name))[2])
+	return tuple(signature)
+
+@INSTANTPROJECT_FN_profiled('Project Sequence')
+def INSTANTPROJECT_FN_projectSequence(context, obj, camera, filepaths, frames, project_resolution, output_pattern, occluders=None, progress=None):
+	# Projects each Image file in filepaths from camera onto obj at the matching Scene frame of frames, writing every result
+	# to output_pattern.format(frame=frame) as a PNG. progress is an optional callable(done, total).
+	# Returns (written paths, Lookup Map builds, errors), where errors maps output paths to messages.
+	scene = context.scene
+	current_frame = scene.frame_current
+	executor = INSTANTPROJECT_FN_getSaveExecutor()
+	pending = deque()
+	written, errors = [], {}
+	builds = 0
+	size = None
+	signature = None
+	lookup_map = None
+
+	def finish(future):
+		job = future.result()
+		if 'error' in job:
+			errors[job['filepath']] = job['error']
+		else:
+			written.append(job['filepath'])
+
+	prefetcher = INSTANTPROJECT_FramePrefetcher(filepaths)
+	try:
+		for index, frame in enumerate(frames):
+			filepath, source, linear = prefetcher.next()
+			source_height, source_width = source.shape[:2]
+			INSTANTPROJECT_FN_convertPrecision(source, linear, False) # PNG frames store sRGB
+			if size is None:
+				size = (max(1, int(source_width * project_resolution)), max(1, int(source_height * project_resolution)), source_width, source_height)
+			elif not size[2:] == (source_width, source_height):
+				INSTANTPROJECT_FN_releasePixels(source)
+				raise ValueError(f'{os.path.basename(filepath)} is {source_width}x{source_height}, expected {size[2]}x{size[3]} like the first frame.')
+			width, height = size[:2]
+
+			# Reuse the Lookup Map while nothing it depends on moves
+			scene.frame_set(frame)
+			frame_signature = INSTANTPROJECT_FN_getSequenceSignature(context, obj, camera, occluders)
+			if lookup_map is None or not frame_signature == signature:
+				key, lookup_map, built = INSTANTPROJECT_FN_getSizedLookupMap(context, obj, camera, width, height, source_width, source_height, occluders, (source_width, source_height))
+				builds += built
+				signature = frame_signature
+
+			result = INSTANTPROJECT_FN_newPixels(width, height, (1.0, 1.0, 1.0, 1.0))
+			INSTANTPROJECT_FN_applyLookupMap(lookup_map, source, result)
+			INSTANTPROJECT_FN_releasePixels(source)
+			result.shape = (height, width, 4)
+			pending.append(executor.submit(INSTANTPROJECT_FN_writeImageJob, {'name': os.path.basename(filepath), 'pixels': result, 'filepath': output_pattern.format(frame=frame)}))
+			del result # Owned by the job now, which returns it to the pool
+			while len(pending) > INSTANTPROJECT_SEQUENCE_pendingWrites or (pending and pending[0].done()):
+				finish(pending.popleft())
+			if progress is not None:
+				progress(index + 1, len(frames))
+		while pending:
+			finish(pending.popleft())
+	finally:
+		for future in pending:
+			future.result()
+		prefetcher.close()
+		scene.frame_set(current_frame)
+	return written, builds, errors
+
+def INSTANTPROJECT_FN_loadProjectionSequence(filepath):
+	# Loads the first file of a written Projection Sequence as an Image Sequence.
+	image = INSTANTPROJECT_FN_track(bpy.data.images.load(filepath, check_existing=True))
+	image.source = 'SEQUENCE'
+	return image
+
+def INSTANTPROJECT_FN_setImageSequenceUser(node, first_frame, frame_count):
+	# Plays an Image Sequence whose files are numbered by Scene frame in an Image Texture node.
+	node.image_user.frame_start = first_frame
+	node.image_user.frame_offset = first_frame - 1
+	node.image_user.frame_duration = frame_count
+	node.image_user.use_auto_refresh = True
+
+#--------------------------------------------------------------
+# Projection Disk Cache
+#--------------------------------------------------------------
+
+# Finished Projection Images are kept on disk as compressed .npz files named after a hash of everything the result
+# depends on: the Background Image pixels, the Mesh Triangles and UVs (in world space), the Camera Matrix, the
+# Projection Image size and format, the Engine and the Occluders. Reopening a file and projecting unchanged inputs
+# loads the result instead of recomputing it. Files are trimmed least recently used first to the Scene's size limit.
+# Cache errors are collected in 'errors' (the writes run on a worker thread) and reported by the next Projection.
+INSTANTPROJECT_CACHE_diskStats = {'hits': 0, 'misses': 0, 'errors': []}
+# Mixed into every key. Bump it whenever the Lookup Map, Seam Bleed or sampling code changes what a Projection produces.
+INSTANTPROJECT_DISK_version = 1
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getProjectionCacheDirectory(context):
+	directory = context.scene.INSTANTPROJECT_VAR_projectionCacheDirectory
+	return bpy.path.abspath(directory) if directory else os.path.join(tempfile.gettempdir(), 'instantproject_cache')
 
+def INSTANTPROJECT_FN_getProjectionCacheKey(inputs, source, width, height, float_buffer, engine):
+	# Returns the disk cache key of a Projection from the INSTANTPROJECT_FN_getProjectionInputs result of every Object
+	# projected into the Image and the source pixels, so a miss can hand both on to the Engine instead of reading them
+	# again. UVs must already be unwrapped.
+	arrays = [array for uv_triangles, world_triangles, camera_matrix, visibility, visibility_key in inputs for array in (uv_triangles, world_triangles, camera_matrix)]
+	visibility_keys = '|'.join(visibility_key for uv_triangles, world_triangles, camera_matrix, visibility, visibility_key in inputs)
+	return INSTANTPROJECT_FN_hashArrays(source, *arrays, np.array((width, height, float_buffer, INSTANTPROJECT_DISK_version)), np.frombuffer(f'{engine}:{visibility_keys}'.encode(), dtype=np.uint8))
 
+def INSTANTPROJECT_FN_popProjectionCacheErrors():
+	# Returns and clears the cache errors collected since the last call.
+	errors, INSTANTPROJECT_CACHE_diskStats['errors'] = INSTANTPROJECT_CACHE_diskStats['errors'], []
+	return errors
+
+def INSTANTPROJECT_FN_loadCachedProjection(directory, key, target_image):
+	# Writes the cached Projection for key into target_image. Returns False on a miss; unreadable entries are removed.
+	filepath = os.path.join(directory, key + '.npz')
+	if not os.path.isfile(filepath):
+		INSTANTPROJECT_CACHE_diskStats['misses'] += 1
+		return False
+	width, height = target_image.size
+	try:
+		with np.load(filepath) as archive:
+			data = archive['pixels']
+		if not data.shape == (height, width, 4):
+			raise ValueError(f'Cached Projection has shape {data.shape}')
+	except Exception as error:
+		INSTANTPROJECT_CACHE_diskStats['errors'].append(f'discarded {os.path.basename(filepath)}: {error}')
+		INSTANTPROJECT_FN_removeCacheFile(filepath)
+		INSTANTPROJECT_CACHE_diskStats['misses'] += 1
+		return False
+	# The key covers the Storage Precision, so byte entries always load into byte Images
+	pixels = INSTANTPROJECT_FN_newPixels(width, height)
+	if data.dtype == np.uint8:
+		np.multiply(data.reshape(-1, 4), np.float32(1.0 / 255.0), out=pixels)
+	else:
+		pixels[:] = data.reshape(-1, 4)
+	INSTANTPROJECT_FN_setImagePixels(target_image, pixels)
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	os.utime(filepath) # Most recently used
+	INSTANTPROJECT_CACHE_diskStats['hits'] += 1
+	return True
+
+def INSTANTPROJECT_FN_storeCachedProjection(directory, key, image, limit):
+	# Snapshots the pixels of image and writes them to the cache on the Save Executor, then trims the cache to limit bytes.
+	pixels = INSTANTPROJECT_FN_getImagePixels(image)
+	data = pixels.copy() if image.is_float else np.clip(np.rint(pixels * 255.0), 0, 255).astype(np.uint8)
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	return INSTANTPROJECT_FN_getSaveExecutor().submit(INSTANTPROJECT_FN_writeProjectionCacheJob, directory, key, data, limit)
+
+def INSTANTPROJECT_FN_writeProjectionCacheJob(directory, key, data, limit):
+	# Runs on a worker thread. Never touches bpy.
+	try:
+		os.makedirs(directory, exist_ok=True)
+		filepath = os.path.join(directory, key + '.npz')
+		temporary_path = f'{filepath}.{threading.get_ident()}.instantproject_tmp'
+		with open(temporary_path, 'wb') as file:
+			np.savez_compressed(file, pixels=data)
+		os.replace(temporary_path, filepath)
+		INSTANTPROJECT_FN_trimProjectionCache(directory, limit)
+	except OSError as error:
+		INSTANTPROJECT_CACHE_diskStats['errors'].append(f'could not write {key}: {error}')
+
+def INSTANTPROJECT_FN_getCacheFiles(directory):
+	# Returns (modification time, size, path) of every cache entry in directory, least recently used first.
+	entries = []
+	if os.path.isdir(directory):
+		for entry in os.scandir(directory):
+			if entry.name.endswith('.npz'):
+				try:
+					stat = entry.stat()
+				except OSError:
+					continue
+				entries.append((stat.st_mtime, stat.st_size, entry.path))
+	return sorted(entries)
+
+def INSTANTPROJECT_FN_removeCacheFile(filepath):
+	try:
+		os.remove(filepath)
+	except OSError:
+		pass # Already removed by another trim
+
+def INSTANTPROJECT_FN_trimProjectionCache(directory, limit):
+	# Removes the least recently used entries until the cache fits limit bytes. Returns the number removed.
+	entries = INSTANTPROJECT_FN_getCacheFiles(directory)
+	total = sum(size for mtime, size, filepath in entries)
+	removed = 0
+	for mtime, size, filepath in entries:
+		if total <= limit:
+			break
+		INSTANTPROJECT_FN_removeCacheFile(filepath)
+		total -= size
+		removed += 1
+	return removed
+
+def INSTANTPROJECT_FN_projectObjects(context, objects, camera, source_image, target_image, engine, occluders=None, memory_budget=4096 * 1024 * 1024, use_cache=False):
+	# Projects source_image from camera onto target_image through every Object in objects with the NumPy or Tiled
+	# Engine, loading and storing the result in the Projection Disk Cache with use_cache. Objects sharing target_image
+	# are projected Seam Bleed first. Every Projection is recorded for reloading the source. Returns True when the
+	# result was loaded from the cache.
+	inputs = [INSTANTPROJECT_FN_getProjectionInputs(context, obj, camera, occluders) for obj in objects]
+	source = None
+	if use_cache:
+		cache_directory = INSTANTPROJECT_FN_getProjectionCacheDirectory(context)
+		with INSTANTPROJECT_FN_profileStage('Projection Cache'):
+			source = INSTANTPROJECT_FN_getImagePixels(source_image)
+			cache_key = INSTANTPROJECT_FN_getProjectionCacheKey(inputs, source, *target_image.size, target_image.is_float, engine)
+			if INSTANTPROJECT_FN_loadCachedProjection(cache_directory, cache_key, target_image):
+				INSTANTPROJECT_FN_releasePixels(source)
+				for obj in objects:
+					INSTANTPROJECT_FN_recordProjectionSource(target_image, obj, camera, source_image, occluders)
+				return True
+
+	keys = [None] * len(objects)
+	fingerprints = None
+	if engine == 'TILED':
+		# The Tiled Engine reads the source rows it needs itself
+		if source is not None:
+			INSTANTPROJECT_FN_releasePixels(source)
+			source = None
+		parts = (None,) if len(objects) == 1 else ('bleed', 'core')
+		for part in parts:
+			for index, obj in enumerate(objects):
+				keep_pixels = index > 0 or part == 'core'
+				INSTANTPROJECT_FN_projectTiled(context, obj, camera, source_image, target_image, memory_budget, occluders, keep_pixels=keep_pixels, inputs=inputs[index], part=part)
+	else:
+		if source is None:
+			source = INSTANTPROJECT_FN_getImagePixels(source_image)
+		fingerprints = INSTANTPROJECT_FN_blockFingerprints(source)
+		keys = INSTANTPROJECT_FN_projectNumpy(context, objects, camera, source_image, target_image, occluders, inputs, source)
+	if source is not None:
+		INSTANTPROJECT_FN_releasePixels(source)
+	for index, obj in enumerate(objects):
+		INSTANTPROJECT_FN_recordProjectionSource(target_image, obj, camera, source_image, occluders, keys[index], fingerprints)
+	if use_cache:
+		INSTANTPROJECT_FN_storeCachedProjection(cache_directory, cache_key, target_image, context.scene.INSTANTPROJECT_VAR_projectionCacheSize * 1024 * 1024)
+	return False
+
+# Classes ---------------------- 
+
+class INSTANTPROJECT_OT_clearProjectionCache(bpy.types.Operator):
+	# Deletes every entry of the Projection Disk Cache.
+	bl_idname = 'instantproject.clear_projection_cache'
+	bl_label = 'Clear Projection Cache'
+	bl_description = 'Deletes all cached Projection results from disk'
+	bl_options = {'REGISTER'}
+
+	def execute(self, context):
+		directory = INSTANTPROJECT_FN_getProjectionCacheDirectory(context)
+		entries = INSTANTPROJECT_FN_getCacheFiles(directory)
+		for mtime, size, filepath in entries:
+			INSTANTPROJECT_FN_removeCacheFile(filepath)
+		self.report({'INFO'}, f'Removed {len(entries)} cached Projection(s), {sum(size for mtime, size, filepath in entries) / (1024 * 1024):.1f} MB.')
+		return {'FINISHED'}
 
 #--------------------------------------------------------------
 # Camera Projection Tools
 #--------------------------------------------------------------		
 
+# Cumulative hit/miss counts of the UV Unwrap cache, see INSTANTPROJECT_FN_unwrapObjects.
+INSTANTPROJECT_CACHE_unwrapStats = {'hits': 0, 'misses': 0}
+
+# Bounds of the power-of-two Projection Image sides picked by Auto Resolution.
+INSTANTPROJECT_AUTO_minSize = 64
+INSTANTPROJECT_AUTO_maxSize = 16384
+
+# Projection Image memory measured at the last Auto Resolution, for display: measuring reads the size of every Image.
+INSTANTPROJECT_CACHE_projectionMemory = {'bytes': None}
+
+# Large Background Images are displayed through a box-filtered 8-bit Viewport Proxy, cached as a PNG next to the source.
+# The Proxy points back to its source, which is only loaded when a Projection or Match Scene needs its full resolution.
+INSTANTPROJECT_PROXY_suffix = '.instantproject_proxy'
+INSTANTPROJECT_ENUM_proxySizes = (
+	('1024', '1024', 'Longest side of the Viewport Proxy in pixels'),
+	('2048', '2048', 'Longest side of the Viewport Proxy in pixels'),
+	('4096', '4096', 'Longest side of the Viewport Proxy in pixels'),
+)
+
 # Functions ---------------------- 
 
+def INSTANTPROJECT_FN_boxDownsample(pixels, factor):
+	# Averages factor x factor blocks of a (height, width, 4) Array. Partial blocks at the edges average the pixels they cover.
+	height, width = pixels.shape[:2]
+	row_starts = np.arange(0, height, factor)
+	column_starts = np.arange(0, width, factor)
+	blocks = np.add.reduceat(np.add.reduceat(pixels, row_starts, axis=0), column_starts, axis=1)
+	counts = np.minimum(factor, height - row_starts)[:, None] * np.minimum(factor, width - column_starts)[None, :]
+	blocks /= counts[:, :, None]
+	return blocks
+
+def INSTANTPROJECT_FN_getProxyPath(filepath, max_size):
+	# Returns where the Viewport Proxy of an Image file is cached: next to it, or in the temporary directory if that is read-only.
+	directory, name = os.path.split(filepath)
+	proxy_name = f'{os.path.splitext(name)[0]}{INSTANTPROJECT_PROXY_suffix}_{max_size}.png'
+	if not os.access(directory, os.W_OK):
+		directory = bpy.app.tempdir
+	return os.path.join(directory, proxy_name)
+
+def INSTANTPROJECT_FN_writeViewportProxy(image, proxy_path, max_size, memory_budget):
+	# Box filters image down until it fits max_size and writes it to proxy_path as an 8-bit PNG.
+	# The source is read once, then filtered in bands of whole blocks so the filter's temporaries fit memory_budget (bytes).
+	# Its pixel buffers are freed afterwards.
+	width, height = image.size
+	factor = -(-max(width, height) // max_size)
+	band_rows = max(factor, memory_budget // max(1, width * 16) // factor * factor)
+	pixels = INSTANTPROJECT_FN_getImagePixels(image)
+	proxy = np.concatenate([INSTANTPROJECT_FN_boxDownsample(pixels[row_start:row_start + band_rows], factor) for row_start in range(0, height, band_rows)])
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	if image.is_float and not image.colorspace_settings.name == 'sRGB':
+		INSTANTPROJECT_FN_linearToSRGB(proxy)
+	os.makedirs(os.path.dirname(proxy_path) or '.', exist_ok=True)
+	temporary_path = proxy_path + '.instantproject_tmp'
+	with open(temporary_path, 'wb') as file:
+		file.write(INSTANTPROJECT_FN_encodePNG(proxy))
+	os.replace(temporary_path, proxy_path)
+	image.buffers_free()
+
+def INSTANTPROJECT_FN_getViewportProxy(context, image, max_size):
+	# Returns the Viewport Proxy Image of image, writing or refreshing its cached file when the source is newer.
+	# Returns image itself when it has no file on disk or already fits max_size.
+	if not image.source == 'FILE' or image.packed_file is not None:
+		return image
+	filepath = bpy.path.abspath(image.filepath, library=image.library)
+	if not os.path.isfile(filepath):
+		return image
+	proxy_path = INSTANTPROJECT_FN_getProxyPath(filepath, max_size)
+	stale = not os.path.isfile(proxy_path) or os.path.getmtime(proxy_path) < os.path.getmtime(filepath)
+	if stale:
+		if max(image.size) <= max_size:
+			return image
+		INSTANTPROJECT_FN_writeViewportProxy(image, proxy_path, max_size, context.scene.INSTANTPROJECT_VAR_memoryBudget * 1024 * 1024)
+	proxy = load_image(proxy_path, check_existing=True)
+	if proxy is None:
+		return image
+	if stale:
+		proxy.reload()
+	proxy['instantproject_proxy_source'] = image.name
+	if not proxy.get('instantproject_generated'):
+		INSTANTPROJECT_FN_track(proxy)
+	return proxy
+
+def INSTANTPROJECT_FN_getBackgroundImage(camera):
+	# Returns the full resolution Image shown as the Camera's Background Image, resolving Viewport Proxies, or None.
+	if len(camera.data.background_images) == 0 or camera.data.background_images[0].image is None:
+		return None
+	image = camera.data.background_images[0].image
+	source = image.get('instantproject_proxy_source')
+	return bpy.data.images.get(source, image) if source else image
+
 def INSTANTPROJECT_FN_updateCameraBackgroundImage(self, context):
 	if bpy.context.scene.INSTANTPROJECT_VAR_cameraBackgroundImage is None:
 		INSTANTPROJECT_FN_removeCameraBackgroundImage(self, context)
 		return
 	camera = bpy.context.scene.camera
+	image = bpy.context.scene.INSTANTPROJECT_VAR_cameraBackgroundImage
+	if bpy.context.scene.INSTANTPROJECT_VAR_useViewportProxy:
+		image = INSTANTPROJECT_FN_getViewportProxy(context, image, int(bpy.context.scene.INSTANTPROJECT_VAR_viewportProxySize))
 	camera.data.show_background_images = True 
 	camera.data.background_images.clear()
 	bg_image = camera.data.background_images.new()
-	bg_image.image = bpy.context.scene.INSTANTPROJECT_VAR_cameraBackgroundImage
+	bg_image.image = image
 	camera.data.background_images[0].frame_method = 'FIT'
 	camera.data.background_images[0].display_depth = 'FRONT'
 
@@ -112,6 +1805,204 @@ def INSTANTPROJECT_FN_removeCameraBackgroundImage(self, context):
 	camera.data.background_images.clear() 
 	camera.data.show_background_images = False
 
+def INSTANTPROJECT_FN_createProjectionMaterial(name, projection_image):
+	# Creates a Material whose Shader samples projection_image, with the Albedo node selected for Projection.
+	material = INSTANTPROJECT_FN_track(bpy.data.materials.new(name=name))
+	material.use_nodes = True
+	nodes = material.node_tree.nodes
+	links = material.node_tree.links
+	INSTANTPROJECT_FN_setShaders(nodes, links, projection_image)
+
+	# Select Image for Projection
+	node_albedo = nodes.get('albedo')
+	node_albedo.select = True   
+	nodes.active = node_albedo
+	return material
+
+@INSTANTPROJECT_FN_profiled('Material')
+def INSTANTPROJECT_FN_createProjection(obj, source_image, width, height, float_buffer=False):
+	# Replaces the Materials of obj with a new Projection Material sampling a blank (white) Projection Image.
+	obj.data.materials.clear()
+	name = f'{source_image.name}_projection'
+	projection_image = INSTANTPROJECT_FN_newImage(name, width, height, float_buffer=float_buffer)
+
+	material = INSTANTPROJECT_FN_createProjectionMaterial(name, projection_image)
+	obj.data.materials.append(material)
+	return projection_image, material
+
+def INSTANTPROJECT_FN_projectObject(context, obj, camera, source_image, project_resolution=0.25, occluders=None, precision='AUTO'):
+	# Projects source_image from camera onto obj with the NumPy engine, without any UI: creates the Projection Material,
+	# unwraps (or reuses the cached Unwrap) and projects. Leaves Object Mode active and returns the Projection Image.
+	width = int(source_image.size[0] * project_resolution)
+	height = int(source_image.size[1] * project_resolution)
+	projection_image, material = INSTANTPROJECT_FN_createProjection(obj, source_image, width, height, INSTANTPROJECT_FN_useFloatBuffer(precision, source_image))
+	INSTANTPROJECT_FN_unwrapObjects(context, [obj])
+	INSTANTPROJECT_FN_projectNumpy(context, [obj], camera, source_image, projection_image, occluders)
+	return projection_image
+
+def INSTANTPROJECT_FN_getTexelDemand(context, objects, camera, source_image, camera_resolution=None, percentile=95.0):
+	# Returns how many Texels per unit of UV area keep the source detail: for every Triangle in the Camera Frame, the
+	# ratio of the source Pixels it covers to its UV area, taken at a screen-area-weighted percentile so a few sliver
+	# Triangles do not decide the size. Returns None when no Triangle is in view. UVs must already be unwrapped.
+	camera_matrix = INSTANTPROJECT_FN_getCameraMatrix(context, camera, camera_resolution)
+	source_size = np.array(source_image.size, dtype=np.float64)
+	ratio_list, area_list = [], []
+	for obj in objects:
+		uv_triangles, world_triangles = INSTANTPROJECT_FN_getMeshTriangles(obj)
+		coords, valid = INSTANTPROJECT_FN_projectPoints(camera_matrix, world_triangles.reshape(-1, 3))
+		coords = coords.reshape(-1, 3, 2) * source_size
+		uv_triangles = uv_triangles.astype(np.float64)
+		screen_area = 0.5 * np.abs(np.cross(coords[:, 1] - coords[:, 0], coords[:, 2] - coords[:, 0]))
+		uv_area = 0.5 * np.abs(np.cross(uv_triangles[:, 1] - uv_triangles[:, 0], uv_triangles[:, 2] - uv_triangles[:, 0]))
+		keep = valid.reshape(-1, 3).all(axis=1) & (uv_area > 1e-12) & (screen_area > 0.0)
+		ratio_list.append(screen_area[keep] / uv_area[keep])
+		area_list.append(screen_area[keep])
+	ratios = np.concatenate(ratio_list) if ratio_list else np.empty(0)
+	if len(ratios) == 0:
+		return None
+	order = np.argsort(ratios)
+	cumulative = np.cumsum(np.concatenate(area_list)[order])
+	return float(ratios[order][min(np.searchsorted(cumulative, cumulative[-1] * percentile / 100.0), len(ratios) - 1)])
+
+def INSTANTPROJECT_FN_getImageBytes(image):
+	# Returns the memory used by the pixels of an Image.
+	width, height = image.size
+	return width * height * 4 * (4 if image.is_float else 1)
+
+def INSTANTPROJECT_FN_getProjectionMemory(exclude=()):
+	# Returns the memory used by the loaded Images InstantProject created that are still in use, leaving out the Images in exclude.
+	# Unloaded Images are skipped, as reading their size would load them.
+	images = [image for image in bpy.data.images if image.get('instantproject_generated') and image.users > 0 and image.has_data]
+	INSTANTPROJECT_CACHE_projectionMemory['bytes'] = sum(INSTANTPROJECT_FN_getImageBytes(image) for image in images)
+	return sum(INSTANTPROJECT_FN_getImageBytes(image) for image in images if image not in exclude)
+
+def INSTANTPROJECT_FN_getReplacedImages(objects):
+	# Returns the InstantProject Images currently sampled by objects, which a new Projection replaces.
+	return {image for obj in objects for image in INSTANTPROJECT_FN_getObjectImages(obj) if image.get('instantproject_generated')}
+
+def INSTANTPROJECT_FN_getAutoResolution(context, objects, camera, source_image, memory_cap, reserved=0, camera_resolution=None, bytes_per_texel=4, replaced=()):
+	# Returns the smallest power-of-two square side whose Texel density matches the source detail on objects, halved until
+	# the Image fits memory_cap (bytes) next to the Projection Images in use and reserved bytes. Images in replaced (see
+	# INSTANTPROJECT_FN_getReplacedImages) are about to be replaced and do not count. Returns None when nothing is in view.
+	demand = INSTANTPROJECT_FN_getTexelDemand(context, objects, camera, source_image, camera_resolution)
+	if demand is None:
+		return None
+	side = min(1 << int(math.ceil(math.log2(max(math.sqrt(demand), INSTANTPROJECT_AUTO_minSize)))), INSTANTPROJECT_AUTO_maxSize)
+	used = INSTANTPROJECT_FN_getProjectionMemory(replaced) + reserved
+	while side > INSTANTPROJECT_AUTO_minSize and used + side * side * bytes_per_texel > memory_cap:
+		side //= 2
+	return side
+
+def INSTANTPROJECT_FN_scaleUVsToBounds(mesh):
+	# Stretches the active UV Map of a Mesh to fill the 0-1 UV square, like smart_project's Scale to Bounds.
+	uv_layer = mesh.uv_layers.active
+	uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+	uv_layer.data.foreach_get('uv', uvs)
+	uvs = uvs.reshape(-1, 2)
+	if len(uvs) == 0:
+		return
+	low = uvs.min(axis=0)
+	high = uvs.max(axis=0)
+	uvs = (uvs - low) / np.maximum(high - low, 1e-8)
+	uv_layer.data.foreach_set('uv', uvs.ravel())
+	mesh.update()
+
+def INSTANTPROJECT_FN_getProjectionViews(context):
+	# Returns a (camera, background_image) pair for every Camera in the Scene's Projection Camera Collection.
+	collection = context.scene.INSTANTPROJECT_VAR_projectionCameras
+	if collection is None:
+		return []
+	views = []
+	for obj in collection.all_objects:
+		if not obj.type == 'CAMERA' or INSTANTPROJECT_FN_getBackgroundImage(obj) is None:
+			continue
+		views.append((obj, INSTANTPROJECT_FN_getBackgroundImage(obj)))
+	return views
+
+def INSTANTPROJECT_FN_getOccluders(context):
+	# Returns the Meshes of the Scene's Occluder Collection.
+	collection = context.scene.INSTANTPROJECT_VAR_occluderCollection
+	if collection is None:
+		return []
+	return [obj for obj in collection.all_objects if obj.type == 'MESH']
+
+def INSTANTPROJECT_FN_getProjectionUVLayer(mesh):
+	# Returns the 'instantproject_uv' UV Map of a Mesh, creating it if needed, and makes it the active and render UV Map.
+	uv_layer = mesh.uv_layers.get('instantproject_uv')
+	if uv_layer is None:
+		uv_layer = mesh.uv_layers.new(name='instantproject_uv')
+	mesh.uv_layers.active = uv_layer
+	uv_layer.active_render = True
+	return uv_layer
+
+def INSTANTPROJECT_FN_hashMeshTopology(mesh):
+	# Returns a hash of a Mesh's Vertex positions and Polygon topology.
+	co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+	mesh.vertices.foreach_get('co', co)
+	loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+	mesh.loops.foreach_get('vertex_index', loop_vertices)
+	loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+	mesh.polygons.foreach_get('loop_total', loop_totals)
+	return INSTANTPROJECT_FN_hashArrays(co, loop_vertices, loop_totals)
+
+@INSTANTPROJECT_FN_profiled('Unwrap')
+def INSTANTPROJECT_FN_unwrapObjects(context, objects, shared=False):
+	# Smart Projects the 'instantproject_uv' Map of every Mesh in objects within one Edit Mode session, leaving Object Mode active.
+	# Meshes whose Topology hash matches the one stored with their last Unwrap are skipped. With shared, all Meshes are packed
+	# into one UV square and are only re-unwrapped together. Meshes whose UV Map had to be (re)created are always stale.
+	# Returns the number of cache hits and misses.
+	if not context.mode == 'OBJECT':
+		bpy.ops.object.mode_set(mode='OBJECT')
+	created = set()
+	for obj in objects:
+		if obj.data.uv_layers.get('instantproject_uv') is None:
+			created.add(obj.name)
+		INSTANTPROJECT_FN_getProjectionUVLayer(obj.data)
+	hashes = {obj.name: INSTANTPROJECT_FN_hashMeshTopology(obj.data) for obj in objects}
+	if shared and len(objects) > 1:
+		combined = INSTANTPROJECT_FN_hashArrays(np.frombuffer('|'.join(f'{name}:{hashes[name]}' for name in sorted(hashes)).encode(), dtype=np.uint8))
+		keys = {name: f'shared:{combined}' for name in hashes}
+	else:
+		keys = {name: f'single:{topology_hash}' for name, topology_hash in hashes.items()}
+
+	stale = [obj for obj in objects if obj.name in created or not obj.data.get('instantproject_uv_hash') == keys[obj.name]]
+	if shared and stale:
+		stale = list(objects)
+	hits = len(objects) - len(stale)
+	misses = len(stale)
+	INSTANTPROJECT_CACHE_unwrapStats['hits'] += hits
+	INSTANTPROJECT_CACHE_unwrapStats['misses'] += misses
+	if not stale:
+		return hits, misses
+
+	# Edit Mode includes every selected Mesh, so temporarily select only the stale ones
+	selection = list(context.selected_objects)
+	active = context.view_layer.objects.active
+	for obj in selection:
+		obj.select_set(False)
+	for obj in stale:
+		obj.select_set(True)
+	context.view_layer.objects.active = stale[0]
+
+	with INSTANTPROJECT_FN_profileStage('Mode Switch'):
+		bpy.ops.object.mode_set(mode='EDIT')
+	with INSTANTPROJECT_FN_profileStage('Smart Project'):
+		bpy.ops.mesh.select_all(action='SELECT')
+		bpy.ops.uv.smart_project(scale_to_bounds=True)
+	with INSTANTPROJECT_FN_profileStage('Mode Switch'):
+		bpy.ops.object.mode_set(mode='OBJECT')
+	for obj in stale:
+		if not shared:
+			INSTANTPROJECT_FN_scaleUVsToBounds(obj.data)
+		obj.data['instantproject_uv_hash'] = keys[obj.name]
+
+	for obj in stale:
+		obj.select_set(False)
+	for obj in selection:
+		obj.select_set(True)
+	context.view_layer.objects.active = active
+	return hits, misses
+
 # Classes ---------------------- 
 
 class INSTANTPROJECT_OT_setBackgroundImage(bpy.types.Operator, ImportHelper):
@@ -122,7 +2013,7 @@ class INSTANTPROJECT_OT_setBackgroundImage(bpy.types.Operator, ImportHelper):
 	bl_description = 'Open an Camera Background Image for Projection'
 
 	filter_glob: bpy.props.StringProperty(
-			default='*.jpg;*.jpeg;*.png;*.tif;*.tiff;*.bmp;',
+			default='*.jpg;*.jpeg;*.png;*.tif;*.tiff;*.bmp;*.exr;',
 			options={'HIDDEN'}
 		)
 
@@ -153,9 +2044,10 @@ class INSTANTPROJECT_OT_matchBackgroundImageResolution(bpy.types.Operator):
 			self.report({'WARNING'}, 'No background image assigned to camera.')
 			return{'CANCELLED'}
 
-		background_image = camera.data.background_images[0]	
-		width = background_image.image.size[0]	
-		height = background_image.image.size[1]
+		# Reads the size of the full resolution Image, not of its Viewport Proxy
+		background_image = INSTANTPROJECT_FN_getBackgroundImage(camera)
+		width = background_image.size[0]	
+		height = background_image.size[1]
 		
 		bpy.data.scenes[0].render.resolution_x = width
 		bpy.data.scenes[0].render.resolution_y = height
@@ -169,11 +2061,19 @@ class INSTANTPROJECT_OT_projectImage(bpy.types.Operator):
 	bl_description = "Projects the Camera's Background Image onto the selected Object"
 
 	project_resolution: bpy.props.FloatProperty(name='project_resolution', default=0.25)
+	engine: bpy.props.EnumProperty(name='engine', items=INSTANTPROJECT_ENUM_projectEngines, default='NUMPY')
+	use_occlusion: bpy.props.BoolProperty(name='use_occlusion', default=False, description='Skip back faces and surfaces hidden from the Camera (NumPy engine)')
+	memory_budget: bpy.props.IntProperty(name='memory_budget', default=4096, min=64, description='Memory in MB the Tiled engine sizes its row bands by; Images that do not fit are read and written row by row')
+	auto_resolution: bpy.props.BoolProperty(name='auto_resolution', default=False, description='Size the Projection Image from the on-screen Texel density instead of project_resolution')
+	memory_cap: bpy.props.IntProperty(name='memory_cap', default=2048, min=1, description='Total memory in MB all Projection Images may use with Auto Resolution')
+	precision: bpy.props.EnumProperty(name='precision', items=INSTANTPROJECT_ENUM_storagePrecisions, default='AUTO', description='Storage Precision of the Projection Image')
+	use_cache: bpy.props.BoolProperty(name='use_cache', default=True, description='Load unchanged Projections from the Projection Disk Cache instead of recomputing them')
 
 	@classmethod
 	def poll(cls, context):
 		return context.mode in ['PAINT_TEXTURE', 'OBJECT', 'EDIT_MESH']
 	
+	@INSTANTPROJECT_FN_profiledRun('Project Image')
 	def execute(self, context):
 		if bpy.context.active_object is None:
 			self.report({'WARNING'}, 'Please select a Target Object.')
@@ -192,83 +2092,884 @@ class INSTANTPROJECT_OT_projectImage(bpy.types.Operator):
 			self.report({'WARNING'}, 'No background image assigned to camera.')
 			return{'CANCELLED'}
 
-		background_image = camera.data.background_images[0]	
+		background_image = INSTANTPROJECT_FN_getBackgroundImage(camera)	
 
-		width = int(background_image.image.size[0] * self.project_resolution)
-		height = int(background_image.image.size[1] * self.project_resolution)
+		width = int(background_image.size[0] * self.project_resolution)
+		height = int(background_image.size[1] * self.project_resolution)
 		previous_mode = context.mode
 
-		# Create Material & Unwrap
-		active_object.data.materials.clear()
-		name = f'{background_image.image.name}_projection'
-		material = bpy.data.materials.new(name=name)
-		material.use_nodes = True
-		active_object.data.materials.append(material)
+		# Unwrap & Create Material
+		#bpy.ops.uv.project_from_view(camera_bounds=True, correct_aspect=False, scale_to_bounds=True)
+		uv_hits, uv_misses = INSTANTPROJECT_FN_unwrapObjects(context, [active_object])
+		float_buffer = INSTANTPROJECT_FN_useFloatBuffer(self.precision, background_image)
+		resolution_note = ''
+		if self.auto_resolution:
+			side = INSTANTPROJECT_FN_getAutoResolution(context, [active_object], camera, background_image, self.memory_cap * 1024 * 1024, bytes_per_texel=16 if float_buffer else 4, replaced=INSTANTPROJECT_FN_getReplacedImages([active_object]))
+			if side is not None:
+				width = height = side
+				resolution_note = f', Auto Resolution {side}x{side}'
+		projection_image, material = INSTANTPROJECT_FN_createProjection(active_object, background_image, width, height, float_buffer)
 		nodes = material.node_tree.nodes
-		links = material.node_tree.links
+		node_albedo = nodes.get('albedo')
 
-		projection_image = bpy.data.images.new(name=name, width=width, height=height)
-		pixels = [1.0] * (4 * width * height)
-		projection_image.pixels = pixels
-	
-		INSTANTPROJECT_FN_setShaders(nodes, links, projection_image)
+		# The Texture Paint engine does not support Occlusion
+		occluders = INSTANTPROJECT_FN_getOccluders(context) if self.use_occlusion and not self.engine == 'PAINT' else None
+		# The Texture Paint engine neither reads nor writes the Projection Cache
+		use_cache = self.use_cache and not self.engine == 'PAINT'
+		cache_hit = False
+		if not self.engine == 'PAINT':
+			cache_hit = INSTANTPROJECT_FN_projectObjects(context, [active_object], camera, background_image, projection_image, self.engine, occluders, self.memory_budget * 1024 * 1024, use_cache)
+		else:
+			if not context.mode == 'PAINT_TEXTURE':
+				with INSTANTPROJECT_FN_profileStage('Mode Switch'):
+					bpy.ops.object.mode_set(mode='TEXTURE_PAINT')
 
-		# Select Image for Projection
-		node_albedo = nodes.get('albedo')
+			# Set to Image Mode for Painting
+			bpy.context.scene.tool_settings.image_paint.mode = 'IMAGE'
+			bpy.context.scene.tool_settings.image_paint.canvas = projection_image		
+
+			bpy.ops.wm.tool_set_by_id(name='builtin_brush.Fill')
+			with INSTANTPROJECT_FN_profileStage('Paint Project Image'):
+				bpy.ops.paint.project_image(image=background_image.name)
+			INSTANTPROJECT_FN_recordProjectionSource(projection_image, active_object, camera, background_image)
+		cache_errors = INSTANTPROJECT_FN_popProjectionCacheErrors()
+		if cache_errors:
+			self.report({'WARNING'}, f'Projection Cache: {"; ".join(cache_errors[:3])}')
+		INSTANTPROJECT_FN_saveModifiedImages(context)
+		INSTANTPROJECT_FN_enforceResourceBudget(context)
+
+		with INSTANTPROJECT_FN_profileStage('Mode Switch'):
+			if previous_mode == 'EDIT':
+				bpy.ops.object.mode_set(mode='EDIT')
+			else:
+				bpy.ops.object.mode_set(mode='OBJECT')
+
+		# Select Albedo
 		node_albedo.select = True   
 		nodes.active = node_albedo
-	    
-		if not context.mode == 'EDIT':
+		cache_note = (', Projection cache hit' if cache_hit else ', Projection cache miss') if use_cache else ''
+		self.report({'INFO'}, f'Projected ({"UV cache hit" if uv_hits else "UV cache miss"}{cache_note}{resolution_note}, {INSTANTPROJECT_FN_describeStorage([projection_image])}).')
+		return {'FINISHED'}	
+
+class INSTANTPROJECT_OT_projectImageBatch(bpy.types.Operator):
+	# Projects the Camera's Background Image onto every selected Mesh, unwrapping them all in one Edit Mode session.
+	bl_idname = 'instantproject.project_image_batch'
+	bl_label = 'Project Image (Batch)'
+	bl_options = {'REGISTER', 'UNDO'}
+	bl_description = "Projects the Camera's Background Image onto all selected Meshes at once"
+
+	project_resolution: bpy.props.FloatProperty(name='project_resolution', default=0.25)
+	shared_image: bpy.props.BoolProperty(name='shared_image', default=True, description='Project every Object into one shared Image instead of one Image per Object')
+	use_occlusion: bpy.props.BoolProperty(name='use_occlusion', default=False, description='Skip back faces and surfaces hidden from the Camera, including by the other selected Meshes')
+	auto_resolution: bpy.props.BoolProperty(name='auto_resolution', default=False, description='Size each Projection Image from the on-screen Texel density instead of project_resolution')
+	memory_cap: bpy.props.IntProperty(name='memory_cap', default=2048, min=1, description='Total memory in MB all Projection Images may use with Auto Resolution')
+	precision: bpy.props.EnumProperty(name='precision', items=INSTANTPROJECT_ENUM_storagePrecisions, default='AUTO', description='Storage Precision of the Projection Images')
+	engine: bpy.props.EnumProperty(name='engine', items=[item for item in INSTANTPROJECT_ENUM_projectEngines if not item[0] == 'PAINT'], default='NUMPY')
+	memory_budget: bpy.props.IntProperty(name='memory_budget', default=4096, min=64, description='Memory in MB the Tiled engine sizes its row bands by; Images that do not fit are read and written row by row')
+	use_cache: bpy.props.BoolProperty(name='use_cache', default=True, description='Load unchanged Projections from the Projection Disk Cache instead of recomputing them')
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode in ['OBJECT', 'EDIT_MESH']
+
+	@INSTANTPROJECT_FN_profiledRun('Project Image (Batch)')
+	def execute(self, context):
+		meshes = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+		if len(meshes) == 0:
+			self.report({'WARNING'}, 'Please select one or more Target Meshes.')
+			return{'CANCELLED'}
+		camera = bpy.context.scene.camera
+		if camera is None:
+			self.report({'WARNING'}, 'No active scene camera.')
+			return{'CANCELLED'}
+		if camera.data.show_background_images == False or len(camera.data.background_images) == 0 or camera.data.background_images[0].image is None:
+			self.report({'WARNING'}, 'No background image assigned to camera.')
+			return{'CANCELLED'}
+
+		background_image = INSTANTPROJECT_FN_getBackgroundImage(camera)
+		width = int(background_image.size[0] * self.project_resolution)
+		height = int(background_image.size[1] * self.project_resolution)
+		previous_mode = context.mode
+		if context.view_layer.objects.active not in meshes:
+			context.view_layer.objects.active = meshes[0]
+		start_time = time.perf_counter()
+
+		# Unwrap every changed Mesh in a single multi-object Edit Mode session
+		uv_hits, uv_misses = INSTANTPROJECT_FN_unwrapObjects(context, meshes, shared=self.shared_image)
+		unwrap_time = time.perf_counter() - start_time
+
+		# Pick Auto Resolution sizes; the Projection Images being replaced do not count against the cap
+		float_buffer = INSTANTPROJECT_FN_useFloatBuffer(self.precision, background_image)
+		bytes_per_texel = 16 if float_buffer else 4
+		sizes = {}
+		if self.auto_resolution:
+			replaced = INSTANTPROJECT_FN_getReplacedImages(meshes)
+			reserved = 0
+			for group in ([meshes] if self.shared_image else [[obj] for obj in meshes]):
+				side = INSTANTPROJECT_FN_getAutoResolution(context, group, camera, background_image, self.memory_cap * 1024 * 1024, reserved, bytes_per_texel=bytes_per_texel, replaced=replaced)
+				if side is not None:
+					reserved += side * side * bytes_per_texel
+					for obj in group:
+						sizes[obj.name] = (side, side)
+
+		# Create Materials
+		targets = {}
+		if self.shared_image:
+			name = f'{background_image.name}_projection'
+			projection_image = INSTANTPROJECT_FN_newImage(name, *sizes.get(meshes[0].name, (width, height)), float_buffer=float_buffer)
+			material = INSTANTPROJECT_FN_createProjectionMaterial(name, projection_image)
+			for obj in meshes:
+				obj.data.materials.clear()
+				obj.data.materials.append(material)
+				targets[obj.name] = projection_image
+		else:
+			for obj in meshes:
+				name = f'{obj.name}_{background_image.name}_projection'
+				projection_image = INSTANTPROJECT_FN_newImage(name, *sizes.get(obj.name, (width, height)), float_buffer=float_buffer)
+				obj.data.materials.clear()
+				obj.data.materials.append(INSTANTPROJECT_FN_createProjectionMaterial(name, projection_image))
+				targets[obj.name] = projection_image
+
+		# Project all Objects sharing an Image together, through the same Engines and Projection Cache as Project Image
+		groups = {}
+		for obj in meshes:
+			groups.setdefault(targets[obj.name].name, []).append(obj)
+		timings = {}
+		cache_hits = 0
+		occluders = None
+		if self.use_occlusion:
+			# Every selected Mesh occludes the others, so all Objects share one cached BVH Tree
+			occluders = sorted(set(meshes + INSTANTPROJECT_FN_getOccluders(context)), key=lambda obj: obj.name)
+		for name, objects in groups.items():
+			image_time = time.perf_counter()
+			cache_hits += INSTANTPROJECT_FN_projectObjects(context, objects, camera, background_image, targets[objects[0].name], self.engine, occluders, self.memory_budget * 1024 * 1024, self.use_cache)
+			timings[name] = time.perf_counter() - image_time
+		cache_errors = INSTANTPROJECT_FN_popProjectionCacheErrors()
+		if cache_errors:
+			self.report({'WARNING'}, f'Projection Cache: {"; ".join(cache_errors[:3])}')
+		INSTANTPROJECT_FN_saveModifiedImages(context)
+		INSTANTPROJECT_FN_enforceResourceBudget(context)
+
+		if previous_mode == 'EDIT_MESH':
 			bpy.ops.object.mode_set(mode='EDIT')
-		bpy.ops.mesh.select_all(action='SELECT')	
-		#bpy.ops.uv.project_from_view(camera_bounds=True, correct_aspect=False, scale_to_bounds=True)
-		bpy.ops.uv.smart_project(scale_to_bounds=True)
 
-		if not context.mode == 'PAINT_TEXTURE':
-			bpy.ops.object.mode_set(mode='TEXTURE_PAINT')
+		total_time = time.perf_counter() - start_time
+		breakdown = ', '.join(f'{name} {timing:.2f}s' for name, timing in timings.items())
+		cache_note = f', Projection cache {cache_hits} hits / {len(groups) - cache_hits} misses' if self.use_cache else ''
+		self.report({'INFO'}, f'Projected {len(meshes)} Objects in {total_time:.2f}s (Unwrap {unwrap_time:.2f}s, UV cache {uv_hits} hits / {uv_misses} misses{cache_note}; {breakdown}; {INSTANTPROJECT_FN_describeStorage(set(targets.values()))})')
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_projectImageMultiCamera(bpy.types.Operator):
+	# Projects and blends the Background Images of several Cameras onto the Object, weighting each Texel by View Angle.
+	bl_idname = 'instantproject.project_image_multi_camera'
+	bl_label = 'Project Image (Multi Camera)'
+	bl_options = {'REGISTER', 'UNDO'}
+	bl_description = "Blends the Background Images of every Camera in the Projection Cameras Collection onto the selected Object"
+
+	project_resolution: bpy.props.FloatProperty(name='project_resolution', default=0.25)
+	use_occlusion: bpy.props.BoolProperty(name='use_occlusion', default=True, description='Only blend Cameras that can see each Texel')
+	angle_power: bpy.props.FloatProperty(name='angle_power', default=2.0, min=0.0, description='Sharpness of the View Angle weighting; higher values favour the most head-on Camera')
+	auto_resolution: bpy.props.BoolProperty(name='auto_resolution', default=False, description='Size the Projection Image from the on-screen Texel density of the most detailed Camera instead of project_resolution')
+	memory_cap: bpy.props.IntProperty(name='memory_cap', default=2048, min=1, description='Total memory in MB all Projection Images may use with Auto Resolution')
+	precision: bpy.props.EnumProperty(name='precision', items=INSTANTPROJECT_ENUM_storagePrecisions, default='AUTO', description='Storage Precision of the Projection Image; Auto stores float if any Camera has an HDR Background Image')
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode in ['OBJECT', 'EDIT_MESH']
+
+	@INSTANTPROJECT_FN_profiledRun('Blend Cameras')
+	def execute(self, context):
+		active_object = bpy.context.active_object
+		if active_object is None or not active_object.type == 'MESH':
+			self.report({'WARNING'}, 'Please select a Target Mesh.')
+			return{'CANCELLED'}
+		views = INSTANTPROJECT_FN_getProjectionViews(context)
+		if len(views) == 0:
+			self.report({'WARNING'}, 'No Cameras with Background Images in the Projection Cameras Collection.')
+			return{'CANCELLED'}
+
+		width = int(max(image.size[0] for camera, image in views) * self.project_resolution)
+		height = int(max(image.size[1] for camera, image in views) * self.project_resolution)
+		previous_mode = context.mode
+
+		# Unwrap & Create Material
+		uv_hits, uv_misses = INSTANTPROJECT_FN_unwrapObjects(context, [active_object])
+		replaced = INSTANTPROJECT_FN_getReplacedImages([active_object])
+		active_object.data.materials.clear()
+		float_buffer = any(INSTANTPROJECT_FN_useFloatBuffer(self.precision, image) for camera, image in views)
+		if self.auto_resolution:
+			sides = [INSTANTPROJECT_FN_getAutoResolution(context, [active_object], camera, image, self.memory_cap * 1024 * 1024, camera_resolution=tuple(image.size), bytes_per_texel=16 if float_buffer else 4, replaced=replaced) for camera, image in views]
+			sides = [side for side in sides if side is not None]
+			if sides:
+				width = height = max(sides)
+		name = f'{active_object.name}_multicamera_projection'
+		projection_image = INSTANTPROJECT_FN_newImage(name, width, height, float_buffer=float_buffer)
+		active_object.data.materials.append(INSTANTPROJECT_FN_createProjectionMaterial(name, projection_image))
+
+		occluders = INSTANTPROJECT_FN_getOccluders(context) if self.use_occlusion else None
+		INSTANTPROJECT_FN_projectMultiCamera(context, active_object, views, projection_image, occluders, self.angle_power)
+		INSTANTPROJECT_FN_recordProjectionSource(projection_image, active_object, None, None, occluders, views=views, angle_power=self.angle_power)
+		INSTANTPROJECT_FN_saveModifiedImages(context)
+		INSTANTPROJECT_FN_enforceResourceBudget(context)
+
+		if previous_mode == 'EDIT_MESH':
+			bpy.ops.object.mode_set(mode='EDIT')
+		self.report({'INFO'}, f'Blended {len(views)} Cameras into {width}x{height} ({"UV cache hit" if uv_hits else "UV cache miss"}, {INSTANTPROJECT_FN_describeStorage([projection_image])}).')
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_reprojectImage(bpy.types.Operator):
+	# Re-projects the Camera's current Background Image into the Object's existing Projection Image, reusing its Lookup Map.
+	bl_idname = 'instantproject.reproject_image'
+	bl_label = 'Reproject Image'
+	bl_options = {'REGISTER'} # Pixels only, recorded in the Pixel History
+	bl_description = "Projects the Camera's Background Image into the existing Projection Image, keeping the Material and UVs"
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode in ['PAINT_TEXTURE', 'OBJECT']
+
+	@INSTANTPROJECT_FN_profiledRun('Reproject Image')
+	def execute(self, context):
+		active_object = bpy.context.active_object
+		camera = bpy.context.scene.camera
+		if active_object is None or not active_object.type == 'MESH':
+			self.report({'WARNING'}, 'Please select a Target Mesh.')
+			return{'CANCELLED'}
+		if camera is None:
+			self.report({'WARNING'}, 'No active scene camera.')
+			return{'CANCELLED'}
+		if camera.data.show_background_images == False or len(camera.data.background_images) == 0 or camera.data.background_images[0].image is None:
+			self.report({'WARNING'}, 'No background image assigned to camera.')
+			return{'CANCELLED'}
+		try:
+			projection_image = active_object.data.materials[0].node_tree.nodes.get('albedo').image
+		except:
+			projection_image = None
+		if projection_image is None:
+			self.report({'WARNING'}, 'No Projection found, please Project To Mesh first.')
+			return{'CANCELLED'}
+
+		occluders = INSTANTPROJECT_FN_getOccluders(context) if context.scene.INSTANTPROJECT_VAR_useOcclusion else None
+		with INSTANTPROJECT_FN_recordHistory(context, 'Reproject Image', [projection_image]):
+			if context.scene.INSTANTPROJECT_VAR_projectEngine == 'TILED':
+				# Keep the Texels of other Objects sharing the Projection Image
+				INSTANTPROJECT_FN_projectTiled(context, active_object, camera, INSTANTPROJECT_FN_getBackgroundImage(camera), projection_image, context.scene.INSTANTPROJECT_VAR_memoryBudget * 1024 * 1024, occluders, keep_pixels=True)
+				INSTANTPROJECT_FN_recordProjectionSource(projection_image, active_object, camera, INSTANTPROJECT_FN_getBackgroundImage(camera), occluders)
+			else:
+				updated, projected = INSTANTPROJECT_FN_reprojectDirty(context, active_object, camera, INSTANTPROJECT_FN_getBackgroundImage(camera), projection_image, occluders)
+				self.report({'INFO'}, f'Reprojected {updated} of {projected} Texels.')
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_projectSequence(bpy.types.Operator, ImportHelper):
+	# Projects every frame of an Image Sequence onto the Object at its Scene frame and writes a Projection Sequence to disk.
+	bl_idname = 'instantproject.project_sequence'
+	bl_label = 'Project Sequence'
+	bl_options = {'REGISTER', 'UNDO'}
+	bl_description = 'Projects an Image Sequence frame by frame onto the selected Object, writing the Projections as a PNG Sequence'
+
+	filter_glob: bpy.props.StringProperty(default='*.png;*.jpg;*.jpeg;*.exr;*.tif;*.tiff;*.dpx', options={'HIDDEN'})
+	project_resolution: bpy.props.FloatProperty(name='project_resolution', default=0.25)
+	use_occlusion: bpy.props.BoolProperty(name='use_occlusion', default=False, description='Skip back faces and surfaces hidden from the Camera')
+	frame_offset: bpy.props.IntProperty(name='frame_offset', default=0, description='Added to each file number to get the Scene frame it is projected at')
+	output_directory: bpy.props.StringProperty(name='output_directory', default='//projection/', subtype='DIR_PATH', description='Directory the Projection Sequence is written to')
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode in ['OBJECT', 'EDIT_MESH']
+
+	def invoke(self, context, event):
+		# Start from the Camera's Background Image when it already is a Sequence
+		image = context.scene.INSTANTPROJECT_VAR_cameraBackgroundImage
+		if image is not None and image.source == 'SEQUENCE':
+			self.filepath = bpy.path.abspath(image.filepath, library=image.library)
+		return ImportHelper.invoke(self, context, event)
+
+	@INSTANTPROJECT_FN_profiledRun('Project Sequence')
+	def execute(self, context):
+		active_object = context.active_object
+		if active_object is None or not active_object.type == 'MESH':
+			self.report({'WARNING'}, 'Please select a Target Mesh.')
+			return{'CANCELLED'}
+		camera = context.scene.camera
+		if camera is None:
+			self.report({'WARNING'}, 'No active scene camera.')
+			return{'CANCELLED'}
+		scene = context.scene
+		files = [(number + self.frame_offset, filepath) for number, filepath in INSTANTPROJECT_FN_getSequenceFiles(self.filepath)]
+		files = [(frame, filepath) for frame, filepath in files if scene.frame_start <= frame <= scene.frame_end]
+		if not files:
+			self.report({'WARNING'}, 'No frames of the Sequence fall inside the Scene frame range.')
+			return{'CANCELLED'}
+		frames = [frame for frame, filepath in files]
+
+		name = f'{active_object.name}_projection'
+		output_pattern = os.path.join(bpy.path.abspath(self.output_directory), name + '.{frame:04d}.png')
+		previous_mode = context.mode
+		INSTANTPROJECT_FN_unwrapObjects(context, [active_object])
+		occluders = INSTANTPROJECT_FN_getOccluders(context) if self.use_occlusion else None
+
+		window_manager = context.window_manager
+		window_manager.progress_begin(0, len(frames))
+		start_time = time.perf_counter()
+		try:
+			written, builds, errors = INSTANTPROJECT_FN_projectSequence(context, active_object, camera, [filepath for frame, filepath in files], frames, self.project_resolution, output_pattern, occluders, progress=lambda done, total: window_manager.progress_update(done))
+		except (IOError, ValueError) as error:
+			self.report({'WARNING'}, str(error))
+			return{'CANCELLED'}
+		finally:
+			window_manager.progress_end()
+
+		# Play the written Sequence back through a Projection Material
+		if written:
+			projection_image = INSTANTPROJECT_FN_loadProjectionSequence(output_pattern.format(frame=frames[0]))
+			active_object.data.materials.clear()
+			material = INSTANTPROJECT_FN_createProjectionMaterial(name, projection_image)
+			active_object.data.materials.append(material)
+			INSTANTPROJECT_FN_setImageSequenceUser(material.node_tree.nodes.get('albedo'), frames[0], frames[-1] - frames[0] + 1)
+		if previous_mode == 'EDIT_MESH':
+			bpy.ops.object.mode_set(mode='EDIT')
+
+		if errors:
+			self.report({'WARNING'}, f'{len(errors)} frame(s) could not be written: ' + '; '.join(f'{os.path.basename(filepath)}: {error}' for filepath, error in sorted(errors.items())[:3]))
+		self.report({'INFO'}, f'Projected {len(written)} frames in {time.perf_counter() - start_time:.2f}s ({builds} Lookup Map build(s)).')
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_reloadBackgroundImage(bpy.types.Operator):
+	# Reloads the Camera's Background Image from disk and reprojects only what changed.
+	bl_idname = 'instantproject.reload_background_image'
+	bl_label = 'Reload Background Image'
+	bl_options = {'REGISTER'} # Pixels only, recorded in the Pixel History
+	bl_description = "Reloads the Camera's Background Image from disk and updates the Projections made from it"
+
+	@classmethod
+	def poll(cls, context):
+		return context.scene.INSTANTPROJECT_VAR_cameraBackgroundImage is not None
+
+	@INSTANTPROJECT_FN_profiledRun('Reload Background Image')
+	def execute(self, context):
+		image = context.scene.INSTANTPROJECT_VAR_cameraBackgroundImage
+		updated = INSTANTPROJECT_FN_reloadSourceImage(context, image)
+		self.report({'INFO'}, f'Reloaded {image.name}, {updated} Texels reprojected.')
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_invalidateUVCache(bpy.types.Operator):
+	# Forgets the cached Unwrap of the selected Meshes so the next Projection unwraps them again.
+	bl_idname = 'instantproject.invalidate_uv_cache'
+	bl_label = 'Invalidate UV Cache'
+	bl_options = {'REGISTER', 'UNDO'}
+	bl_description = 'Forces the selected Meshes to be unwrapped again on their next Projection'
+
+	def execute(self, context):
+		meshes = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH']
+		count = 0
+		for obj in meshes:
+			if obj.data.get('instantproject_uv_hash') is not None:
+				del obj.data['instantproject_uv_hash']
+				count += 1
+		self.report({'INFO'}, f'Invalidated {count} cached Unwraps.')
+		return {'FINISHED'}
+
+#--------------------------------------------------------------
+# Decal Atlas
+#--------------------------------------------------------------
+
+# Decal Images are packed into shared Atlas Images by a shelf packer, so many Decals cost one Image and one Texture.
+# Each Atlas stores its Slots (file path -> Pixel rect and file mtime) and Shelves as JSON custom properties,
+# so a file that is loaded again reuses its Slot without being read.
+INSTANTPROJECT_ATLAS_size = 2048
+INSTANTPROJECT_ATLAS_padding = 2
+INSTANTPROJECT_ATLAS_textureName = 'InstantProject Decal Texture'
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getAtlases():
+	return [image for image in bpy.data.images if 'instantproject_atlas_slots' in image]
+
+def INSTANTPROJECT_FN_getDecalKey(image):
+	# Atlas Slots are keyed by absolute file path, or by Image name for Images without a file.
+	return os.path.normpath(bpy.path.abspath(image.filepath, library=image.library)) if image.filepath else image.name
+
+def INSTANTPROJECT_FN_findAtlasSlot(key):
+	# Returns (atlas, slot) for a packed Decal, or (None, None).
+	for atlas in INSTANTPROJECT_FN_getAtlases():
+		slot = json.loads(atlas['instantproject_atlas_slots']).get(key)
+		if slot is not None:
+			return atlas, slot
+	return None, None
+
+def INSTANTPROJECT_FN_packShelf(shelves, size, width, height, padding):
+	# Places a width x height rect (plus padding) on the tightest Shelf it fits, or on a new Shelf above the others.
+	# shelves is a list of [y, height, x cursor] and is updated in place. Returns the (x, y) of the rect, or None when full.
+	padded_width = width + 2 * padding
+	padded_height = height + 2 * padding
+	fits = [shelf for shelf in shelves if padded_height <= shelf[1] and shelf[2] + padded_width <= size]
+	if fits:
+		shelf = min(fits, key=lambda shelf: shelf[1])
+	else:
+		top = shelves[-1][0] + shelves[-1][1] if shelves else 0
+		if top + padded_height > size or padded_width > size:
+			return None
+		shelf = [top, padded_height, 0]
+		shelves.append(shelf)
+	x = shelf[2]
+	shelf[2] += padded_width
+	return x + padding, shelf[0] + padding
+
+def INSTANTPROJECT_FN_writeAtlasSlot(atlas, rect, image):
+	# Copies the pixels of image into rect (x, y, width, height) of atlas, extending its edges into the padding.
+	x, y, width, height = rect
+	padding = INSTANTPROJECT_ATLAS_padding
+	pixels = INSTANTPROJECT_FN_getImagePixels(atlas)
+	decal = INSTANTPROJECT_FN_convertPrecision(INSTANTPROJECT_FN_getImagePixels(image), image.is_float, atlas.is_float)
+	size_y, size_x = pixels.shape[:2]
+	y0, y1 = max(y - padding, 0), min(y + height + padding, size_y)
+	x0, x1 = max(x - padding, 0), min(x + width + padding, size_x)
+	rows = np.clip(np.arange(y0, y1) - y, 0, height - 1)
+	columns = np.clip(np.arange(x0, x1) - x, 0, width - 1)
+	pixels[y0:y1, x0:x1] = decal[rows[:, None], columns[None, :]]
+	INSTANTPROJECT_FN_setImagePixels(atlas, pixels)
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	INSTANTPROJECT_FN_releasePixels(decal)
+
+def INSTANTPROJECT_FN_freeAtlasSlot(atlas, key):
+	# Removes the Slot of key from atlas and clears its pixels. Shelves only grow to the right, so the space is
+	# reclaimed when the Slot is the last on its Shelf, and empty Shelves at the top are dropped.
+	slots = json.loads(atlas['instantproject_atlas_slots'])
+	x, y, width, height = slots.pop(key)['rect']
+	padding = INSTANTPROJECT_ATLAS_padding
+	pixels = INSTANTPROJECT_FN_getImagePixels(atlas)
+	pixels[max(y - padding, 0):y + height + padding, max(x - padding, 0):x + width + padding] = 0.0
+	INSTANTPROJECT_FN_setImagePixels(atlas, pixels)
+	INSTANTPROJECT_FN_releasePixels(pixels)
+
+	shelves = json.loads(atlas['instantproject_atlas_shelves'])
+	for shelf in shelves:
+		if shelf[0] == y - padding and shelf[2] == x + width + padding:
+			shelf[2] = x - padding
+	while shelves and shelves[-1][2] == 0:
+		shelves.pop()
+	atlas['instantproject_atlas_slots'] = json.dumps(slots)
+	atlas['instantproject_atlas_shelves'] = json.dumps(shelves)
+
+@INSTANTPROJECT_FN_profiled('Pack Decal')
+def INSTANTPROJECT_FN_packDecal(image, key=None):
+	# Packs a Decal Image into an Atlas and returns (atlas, rect), with rect as (x, y, width, height) in Atlas Pixels.
+	# A Decal already packed under the same key and size keeps its Slot; it is only rewritten if the file changed on disk.
+	# A Decal whose size changed (including generated Images, which have no mtime) is moved to a new Slot.
+	key = key or INSTANTPROJECT_FN_getDecalKey(image)
+	width, height = image.size
+	mtime = os.path.getmtime(key) if os.path.isfile(key) else 0.0
+	atlas, slot = INSTANTPROJECT_FN_findAtlasSlot(key)
+	if slot is not None and tuple(slot['rect'][2:]) == (width, height):
+		if not slot['mtime'] == mtime:
+			INSTANTPROJECT_FN_writeAtlasSlot(atlas, slot['rect'], image)
+			slots = json.loads(atlas['instantproject_atlas_slots'])
+			slots[key]['mtime'] = mtime
+			atlas['instantproject_atlas_slots'] = json.dumps(slots)
+		return atlas, tuple(slot['rect'])
+	if slot is not None:
+		# Resized: free the old Slot, or it would be found again and its space never reused
+		INSTANTPROJECT_FN_freeAtlasSlot(atlas, key)
+
+	# Try every Atlas, then start a new one, large enough for oversized Decals
+	position = None
+	for atlas in INSTANTPROJECT_FN_getAtlases():
+		shelves = json.loads(atlas['instantproject_atlas_shelves'])
+		position = INSTANTPROJECT_FN_packShelf(shelves, atlas.size[0], width, height, INSTANTPROJECT_ATLAS_padding)
+		if position is not None:
+			break
+	if position is None:
+		size = max(INSTANTPROJECT_ATLAS_size, 1 << int(math.ceil(math.log2(max(width, height) + 2 * INSTANTPROJECT_ATLAS_padding))))
+		atlas = INSTANTPROJECT_FN_newImage(f'InstantProject Decal Atlas {len(INSTANTPROJECT_FN_getAtlases()) + 1}', size, size, (0.0, 0.0, 0.0, 0.0), alpha=True)
+		atlas.alpha_mode = 'STRAIGHT'
+		atlas['instantproject_atlas_slots'] = json.dumps({})
+		shelves = []
+		position = INSTANTPROJECT_FN_packShelf(shelves, size, width, height, INSTANTPROJECT_ATLAS_padding)
+
+	rect = (position[0], position[1], width, height)
+	INSTANTPROJECT_FN_writeAtlasSlot(atlas, rect, image)
+	slots = json.loads(atlas['instantproject_atlas_slots'])
+	slots[key] = {'rect': rect, 'mtime': mtime}
+	atlas['instantproject_atlas_slots'] = json.dumps(slots)
+	atlas['instantproject_atlas_shelves'] = json.dumps(shelves)
+	return atlas, rect
+
+def INSTANTPROJECT_FN_loadDecal(filepath):
+	# Returns (atlas, rect) for a Decal file. Files already in an Atlas are not read again, and Images loaded
+	# only to be packed are removed afterwards.
+	key = os.path.normpath(bpy.path.abspath(filepath))
+	atlas, slot = INSTANTPROJECT_FN_findAtlasSlot(key)
+	if slot is not None and os.path.isfile(key) and slot['mtime'] == os.path.getmtime(key):
+		return atlas, tuple(slot['rect'])
+	existing = {image.name for image in bpy.data.images}
+	image = load_image(filepath, check_existing=True)
+	if image is None:
+		return None, None
+	atlas, rect = INSTANTPROJECT_FN_packDecal(image, key)
+	if image.name not in existing and image.users == 0:
+		bpy.data.images.remove(image)
+	return atlas, rect
+
+def INSTANTPROJECT_FN_getDecalTexture(atlas, rect):
+	# Returns the single Texture shared by every Decal Stencil, cropped to one Atlas rect.
+	texture = bpy.data.textures.get(INSTANTPROJECT_ATLAS_textureName)
+	if texture is None:
+		texture = INSTANTPROJECT_FN_track(bpy.data.textures.new(name=INSTANTPROJECT_ATLAS_textureName, type='IMAGE'))
+	texture.image = atlas
+	texture.extension = 'CLIP'
+	x, y, width, height = rect
+	texture.crop_min_x = x / atlas.size[0]
+	texture.crop_min_y = y / atlas.size[1]
+	texture.crop_max_x = (x + width) / atlas.size[0]
+	texture.crop_max_y = (y + height) / atlas.size[1]
+	return texture
+
+def INSTANTPROJECT_FN_resolveDecal(context, image):
+	# Returns (atlas, rect) for a Decal Image; an Atlas resolves to the Scene's active Decal Slot.
+	if 'instantproject_atlas_slots' in image:
+		slot = json.loads(image['instantproject_atlas_slots']).get(context.scene.INSTANTPROJECT_VAR_activeDecal)
+		return image, tuple(slot['rect']) if slot is not None else (0, 0, image.size[0], image.size[1])
+	return INSTANTPROJECT_FN_packDecal(image)
+
+# ==============================================
+# Decals
+# ==============================================
+
+# Resolved Decal Layers (node and Socket references) per Material session uid, read by Panel draws and property updates.
+INSTANTPROJECT_CACHE_decalLayers = {}
+
+INSTANTPROJECT_ENUM_stampSpaces = (
+	('UV', 'UV', 'Placements are given in the UV space of the Decal Layer'),
+	('CAMERA', 'Camera', "Placements are given in the active Camera's Frame and projected onto the Mesh"),
+)
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_updateDecalImage(self, context):
+	# Remove Decal 
+	if bpy.context.scene.INSTANTPROJECT_VAR_activeImage is None:
+		INSTANTPROJECT_FN_unloadDecalImage()
+		return
+	image = bpy.context.scene.INSTANTPROJECT_VAR_activeImage
+	INSTANTPROJECT_FN_createDecalLayer(self, context, image)
+
+def INSTANTPROJECT_FN_getDecalNodeName(name, index):
+	# Decal Layer nodes are suffixed by their index in the stack; Layer 0 keeps the unsuffixed names of single-layer files.
+	return name if index == 0 else f'{name}_{index}'
+
+def INSTANTPROJECT_FN_getDecalLayers(nodes):
+	# Returns the Decal Layers of a Material from bottom to top. Each Layer holds the node toggled to hide it,
+	# its Image node, and its Opacity, Hue, Saturation and Value Sockets. The per-node layout of older files is Layer 0.
+	layers = []
+	decal_mix = nodes.get('instantproject_decal_mix')
+	if decal_mix is not None and nodes.get('instantproject_decal_layer') is None:
+		decal_HSV = nodes.get('instantproject_decal_HSV')
+		layers.append({
+			'node': decal_mix,
+			'image_node': nodes.get('instantproject_decal_image'),
+			'opacity': nodes.get('instantproject_decal_opacity').inputs[1],
+			'hue': decal_HSV.inputs['Hue'],
+			'saturation': decal_HSV.inputs['Saturation'],
+			'value': decal_HSV.inputs['Value'],
+		})
+	while True:
+		decal_layer = nodes.get(INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_layer', len(layers)))
+		if decal_layer is None:
+			return layers
+		layers.append({
+			'node': decal_layer,
+			'image_node': nodes.get(INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_image', len(layers))),
+			'opacity': decal_layer.inputs['Opacity'],
+			'hue': decal_layer.inputs['Hue'],
+			'saturation': decal_layer.inputs['Saturation'],
+			'value': decal_layer.inputs['Value'],
+		})
+
+def INSTANTPROJECT_FN_getObjectDecalLayers(obj):
+	# Returns the Decal Layers of obj's first Material through the Decal Layer cache (see INSTANTPROJECT_CACHE_decalLayers).
+	# Entries are rebuilt when the Material's node count changes; handlers drop them on undo and file load.
+	if len(obj.data.materials) < 1 or obj.data.materials[0] is None or obj.data.materials[0].node_tree is None:
+		return []
+	material = obj.data.materials[0]
+	nodes = material.node_tree.nodes
+	entry = INSTANTPROJECT_CACHE_decalLayers.get(material.session_uid)
+	if entry is None or not entry['node_count'] == len(nodes):
+		entry = {'node_count': len(nodes), 'layers': INSTANTPROJECT_FN_getDecalLayers(nodes)}
+		INSTANTPROJECT_CACHE_decalLayers[material.session_uid] = entry
+	return entry['layers']
+
+def INSTANTPROJECT_FN_invalidateDecalLayers(material=None):
+	# Drops the cached Decal Layers of one Material, or of every Material.
+	if material is None:
+		INSTANTPROJECT_CACHE_decalLayers.clear()
+	else:
+		INSTANTPROJECT_CACHE_decalLayers.pop(material.session_uid, None)
+
+@persistent
+def INSTANTPROJECT_FN_onDepsgraphUpdate(scene, depsgraph):
+	# Drops cached Decal Layers of Materials whose nodes were added or removed, e.g. by hand in the Shader Editor.
+	if not INSTANTPROJECT_CACHE_decalLayers:
+		return
+	for update in depsgraph.updates:
+		if isinstance(update.id, bpy.types.Material):
+			material = update.id.original
+			entry = INSTANTPROJECT_CACHE_decalLayers.get(material.session_uid)
+			if entry is not None and (material.node_tree is None or not entry['node_count'] == len(material.node_tree.nodes)):
+				INSTANTPROJECT_FN_invalidateDecalLayers(material)
+		elif isinstance(update.id, bpy.types.NodeTree):
+			INSTANTPROJECT_FN_invalidateDecalLayers()
+			return
+
+@persistent
+def INSTANTPROJECT_FN_onDataReplaced(*args):
+	# Undo, Redo and file loads replace every datablock, so cached node references are no longer valid.
+	INSTANTPROJECT_FN_invalidateDecalLayers()
+
+def INSTANTPROJECT_FN_getDecalSockets(nodes, index=None):
+	# Returns the Decal Layer at index (clamped to the stack, default: the top Layer), or None without a Decal Layer.
+	layers = INSTANTPROJECT_FN_getDecalLayers(nodes)
+	if not layers:
+		return None
+	return layers[-1] if index is None else layers[max(min(index, len(layers) - 1), 0)]
+
+def INSTANTPROJECT_FN_updateDecalOpacity(self, context):
+	layers = INSTANTPROJECT_FN_getObjectDecalLayers(self)
+	if layers:
+		layers[max(min(self.INSTANTPROJECT_VAR_activeDecalLayer, len(layers) - 1), 0)]['opacity'].default_value = self.INSTANTPROJECT_VAR_decalOpacity
+
+def INSTANTPROJECT_FN_updateActiveDecalLayer(self, context):
+	# Shows the active Layer's Opacity and makes its Image the Texture Paint canvas.
+	layers = INSTANTPROJECT_FN_getObjectDecalLayers(self)
+	if not layers:
+		return
+	decal_sockets = layers[max(min(self.INSTANTPROJECT_VAR_activeDecalLayer, len(layers) - 1), 0)]
+	if not abs(self.INSTANTPROJECT_VAR_decalOpacity - decal_sockets['opacity'].default_value) < 1e-6:
+		self.INSTANTPROJECT_VAR_decalOpacity = decal_sockets['opacity'].default_value
+	if context.mode == 'PAINT_TEXTURE' and decal_sockets['image_node'] is not None:
+		context.scene.tool_settings.image_paint.canvas = decal_sockets['image_node'].image
+
+def INSTANTPROJECT_FN_unloadDecalImage():	
+	brush = bpy.context.tool_settings.image_paint.brush
+	brush.texture_slot.map_mode = 'TILED'
+	brush.texture = None
+
+def INSTANTPROJECT_FN_newDecalLayer(obj, width, height, material_name, float_buffer=False):
+	# Adds a Decal Layer on top of the stack of obj's first Material and returns its index.
+	# Returns None when the Material Output has no Shader to layer the Decal over.
+
+	# Create Material if Non-Existant
+	if len(obj.data.materials) < 1:
+		material = INSTANTPROJECT_FN_track(bpy.data.materials.new(name=material_name))
+		obj.data.materials.append(material)
+
+	# Setup Material
+	material = obj.data.materials[0]
+	material.use_nodes = True
+	nodes = obj.data.materials[0].node_tree.nodes 
+	links = obj.data.materials[0].node_tree.links 
+
+	# Grab Relevent Nodes: the new Layer goes between the Material Output and whatever Shader feeds it
+	material_output = nodes.get('Material Output')
+	if material_output is None or not material_output.inputs[0].links:
+		return None
+	below_shader = material_output.inputs[0].links[0].from_node
+	index = len(INSTANTPROJECT_FN_getDecalLayers(nodes))
+	INSTANTPROJECT_FN_invalidateDecalLayers(material)
+	if index == 0:
+		below_shader.name = 'original_output_shader'
+
+	# Extend Shader
+	links.remove(material_output.inputs[0].links[0])
+	decal_layer = nodes.new(type='ShaderNodeGroup')
+	decal_layer.name = INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_layer', index)
+	decal_layer.node_tree = INSTANTPROJECT_FN_getNodeGroup('InstantProject Decal')
+	decal_image_node =  nodes.new(type='ShaderNodeTexImage')
+	decal_image_node.name = INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_image', index)
+
+	# Create Image			
+	decal_layer_image = INSTANTPROJECT_FN_newImage(f'{obj.name}_decal_image' if index == 0 else f'{obj.name}_decal_image_{index}', width, height, (0.0, 0.0, 0.0, 0.0), alpha=True, float_buffer=float_buffer)
+	decal_layer_image.file_format = 'OPEN_EXR' if float_buffer else 'PNG'
+	decal_layer_image.alpha_mode = 'STRAIGHT'
+
+	decal_image_node.image = decal_layer_image
 
-		# Set to Image Mode for Painting
-		bpy.context.scene.tool_settings.image_paint.mode = 'IMAGE'
-		bpy.context.scene.tool_settings.image_paint.canvas = projection_image		
+	# Repeposition Nodes		
+	material_output.location = Vector((below_shader.location[0] + 700, below_shader.location[1]))
+	decal_layer.location = Vector((material_output.location[0] - (decal_layer.width + 100), material_output.location[1]))
+	decal_image_node.location = Vector((decal_layer.location[0] - (decal_image_node.width + 100), decal_layer.location[1] - 300))
 
-		bpy.ops.wm.tool_set_by_id(name='builtin_brush.Fill')
-		bpy.ops.paint.project_image(image=background_image.image.name)
-		bpy.ops.image.save_all_modified()
+	# Setup New Links
+	link = links.new(below_shader.outputs[0], decal_layer.inputs['Shader'])
+	link = links.new(decal_image_node.outputs['Color'], decal_layer.inputs['Color'])
+	link = links.new(decal_image_node.outputs['Alpha'], decal_layer.inputs['Alpha'])
+	link = links.new(decal_layer.outputs['Shader'], material_output.inputs['Surface'])
+	return index
 
-		if previous_mode == 'EDIT':
-			bpy.ops.object.mode_set(mode='EDIT')
-		else:
-			bpy.ops.object.mode_set(mode='OBJECT')
+def INSTANTPROJECT_FN_ensureDecalLayer(obj, width, height, material_name, float_buffer=False):
+	# Returns the Image of obj's active Decal Layer, extending the Shader with a first Decal Layer if needed.
+	# Returns None when the Material Output has no Shader to layer the Decal over.
+	if len(obj.data.materials) > 0 and obj.data.materials[0].node_tree is not None:
+		decal_sockets = INSTANTPROJECT_FN_getDecalSockets(obj.data.materials[0].node_tree.nodes, obj.INSTANTPROJECT_VAR_activeDecalLayer)
+		if decal_sockets is not None and decal_sockets['image_node'] is not None:
+			return decal_sockets['image_node'].image
+	index = INSTANTPROJECT_FN_newDecalLayer(obj, width, height, material_name, float_buffer)
+	if index is None:
+		return None
+	obj.INSTANTPROJECT_VAR_activeDecalLayer = index
+	return obj.data.materials[0].node_tree.nodes.get(INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_image', index)).image
 
-		# Select Albedo
-		node_albedo.select = True   
-		nodes.active = node_albedo
-		return {'FINISHED'}	
+def INSTANTPROJECT_FN_adjustHSV(rgb, hue, saturation, value):
+	# NumPy equivalent of the Hue/Saturation/Value node: shifts Hue by hue - 0.5 turns and scales Saturation and Value.
+	maximum = rgb.max(axis=1)
+	minimum = rgb.min(axis=1)
+	delta = maximum - minimum
+	safe_delta = np.where(delta > 0.0, delta, 1.0)
+	r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+	h = np.where(maximum == r, (g - b) / safe_delta, np.where(maximum == g, 2.0 + (b - r) / safe_delta, 4.0 + (r - g) / safe_delta)) / 6.0
+	h = np.where(delta > 0.0, h, 0.0)
+	h = np.mod(h + hue - 0.5, 1.0)
+	s = np.where(maximum > 0.0, delta / np.where(maximum > 0.0, maximum, 1.0), 0.0) * saturation
+	v = maximum * value
 
-# ==============================================
-# Decals
-# ==============================================
+	# HSV back to RGB
+	sector = np.floor(h * 6.0)
+	f = h * 6.0 - sector
+	p = v * (1.0 - s)
+	q = v * (1.0 - s * f)
+	t = v * (1.0 - s * (1.0 - f))
+	sector = sector.astype(np.int64) % 6
+	choices = np.stack((
+		np.stack((v, t, p), axis=1), np.stack((q, v, p), axis=1), np.stack((p, v, t), axis=1),
+		np.stack((p, q, v), axis=1), np.stack((t, p, v), axis=1), np.stack((v, p, q), axis=1),
+	))
+	return np.maximum(choices[sector, np.arange(len(rgb))], 0.0)
 
-# Functions ---------------------- 
+def INSTANTPROJECT_FN_applyRGBCurves(rgb, mapping, samples=1024):
+	# NumPy equivalent of an RGB Curves node at full Fac: each channel goes through the Combined curve, then its own.
+	# The curves are tabulated over the range of rgb, so values outside 0-1 follow the curves' extrapolation.
+	mapping.initialize()
+	positions = np.linspace(min(0.0, float(rgb.min())), max(1.0, float(rgb.max())), samples)
+	combined = [mapping.evaluate(mapping.curves[3], position) for position in positions]
+	curved = np.empty_like(rgb)
+	for channel in range(3):
+		curved[:, channel] = np.interp(rgb[:, channel], positions, [mapping.evaluate(mapping.curves[channel], value) for value in combined])
+	return curved
 
-def INSTANTPROJECT_FN_updateDecalImage(self, context):
-	# Remove Decal 
-	if bpy.context.scene.INSTANTPROJECT_VAR_activeImage is None:
-		INSTANTPROJECT_FN_unloadDecalImage()
-		return
-	image = bpy.context.scene.INSTANTPROJECT_VAR_activeImage
-	INSTANTPROJECT_FN_createDecalLayer(self, context, image)
+def INSTANTPROJECT_FN_bakeGrading(nodes, rgb):
+	# Applies the Curves and HSV adjustments of a Projection Material to linear rgb in place, then resets both nodes,
+	# so the Material looks the same. Raises ValueError when an adjustment is driven by other nodes.
+	node_curves = nodes.get('curves')
+	node_HSV = nodes.get('HSV')
+	for node in (node_curves, node_HSV):
+		if node is not None and any(socket.is_linked for socket in node.inputs if not socket.name == 'Color'):
+			raise ValueError(f'The {node.name} adjustment is driven by other nodes and cannot be baked.')
+	if node_curves is not None:
+		fac = node_curves.inputs['Fac'].default_value
+		rgb[:] = rgb * (1.0 - fac) + INSTANTPROJECT_FN_applyRGBCurves(rgb, node_curves.mapping) * fac
+		for curve in node_curves.mapping.curves:
+			while len(curve.points) > 2:
+				curve.points.remove(curve.points[1])
+			curve.points[0].location = (0.0, 0.0)
+			curve.points[1].location = (1.0, 1.0)
+		node_curves.mapping.update()
+	if node_HSV is not None:
+		inputs = node_HSV.inputs
+		fac = inputs['Fac'].default_value
+		rgb[:] = rgb * (1.0 - fac) + INSTANTPROJECT_FN_adjustHSV(rgb, inputs['Hue'].default_value, inputs['Saturation'].default_value, inputs['Value'].default_value) * fac
+		inputs['Hue'].default_value = 0.5
+		inputs['Saturation'].default_value = 1.0
+		inputs['Value'].default_value = 1.0
 
-def INSTANTPROJECT_FN_updateDecalOpacity(self, context):
-	active_object = bpy.context.active_object
-	nodes = active_object.data.materials[0].node_tree.nodes 
-	links = active_object.data.materials[0].node_tree.links 
-	nodes.get('instantproject_decal_opacity').inputs[1].default_value = context.object.INSTANTPROJECT_VAR_decalOpacity
+def INSTANTPROJECT_FN_removeDecalNodes(nodes, links, index):
+	# Removes the nodes of the Decal Layer at index, reconnecting the Shader below it to the Shaders above it.
+	# Layers above are renamed down by one so the stack stays contiguous.
+	INSTANTPROJECT_FN_invalidateDecalLayers()
+	layers = INSTANTPROJECT_FN_getDecalLayers(nodes)
+	layer = layers[index]
+	legacy = layer['node'].name == 'instantproject_decal_mix'
+	below_shader = nodes.get('original_output_shader') if legacy or index == 0 else layers[index - 1]['node']
+	targets = [link.to_socket for link in layer['node'].outputs[0].links]
 
-def INSTANTPROJECT_FN_unloadDecalImage():	
-	brush = bpy.context.tool_settings.image_paint.brush
-	brush.texture_slot.map_mode = 'TILED'
-	brush.texture = None
+	# Grouped Decal Layer, plus the per-node Decal Layer of older files
+	if legacy:
+		decal_node_names = (
+			'instantproject_decal_image', 'instantproject_decal_bsdf', 'instantproject_decal_mix', 'instantproject_decal_colorramp_specular',
+			'instantproject_decal_colorramp_roughness', 'instantproject_decal_bump', 'instantproject_decal_HSV', 'instantproject_decal_opacity',
+		)
+	else:
+		decal_node_names = (layer['node'].name, INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_image', index))
+	for name in decal_node_names:
+		node = nodes.get(name)
+		if node is not None:
+			nodes.remove(node)
+	if below_shader is not None:
+		for socket in targets:
+			link = links.new(below_shader.outputs[0], socket)
+
+	for above in range(index + 1, len(layers)):
+		layers[above]['node'].name = INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_layer', above - 1)
+		if layers[above]['image_node'] is not None:
+			layers[above]['image_node'].name = INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_image', above - 1)
+
+@INSTANTPROJECT_FN_profiled('Flatten Decals')
+def INSTANTPROJECT_FN_flattenDecalLayers(obj, color_only=False):
+	# Composites every visible Decal Layer, with its Opacity and HSV, into the Albedo Image of obj's Projection Material,
+	# then removes all Decal Layer nodes so the Material evaluates a single BSDF. The Material's Curves and HSV are baked
+	# into the Albedo first and reset, so they are not applied to the Decals. Layer Images nothing else uses are removed.
+	# A flattened Albedo keeps only Colour, so without color_only a ValueError is raised instead of dropping the
+	# Roughness, Specular and Bump visible Layers add. Returns the number of Layers composited, or None without an Albedo Image.
+	nodes = obj.data.materials[0].node_tree.nodes
+	links = obj.data.materials[0].node_tree.links
+	node_albedo = nodes.get('albedo')
+	if node_albedo is None or node_albedo.image is None:
+		return None
+	layers = INSTANTPROJECT_FN_getDecalLayers(nodes)
+	visible = [layer for layer in layers if not layer['node'].mute and layer['image_node'] is not None and layer['image_node'].image is not None]
+	if visible and not color_only:
+		raise ValueError(f'{len(visible)} visible Decal Layer(s) add Roughness, Specular and Bump that a flattened Albedo cannot keep.')
+	albedo = INSTANTPROJECT_FN_getImagePixels(node_albedo.image)
+	height, width = albedo.shape[:2]
+	albedo.shape = (-1, 4)
+
+	# Composite in linear, over the graded Albedo, as the Material mixes the Decal Shaders
+	INSTANTPROJECT_FN_convertPrecision(albedo, node_albedo.image.is_float, True)
+	try:
+		INSTANTPROJECT_FN_bakeGrading(nodes, albedo[:, :3])
+	except ValueError:
+		INSTANTPROJECT_FN_releasePixels(albedo)
+		raise
+
+	composited = 0
+	coords = None
+	for layer in visible:
+		decal = INSTANTPROJECT_FN_getImagePixels(layer['image_node'].image)
+		if decal.shape[:2] == (height, width):
+			samples = decal.reshape(-1, 4).copy()
+		else:
+			# Both Images share the UV Map, so the Layer is resampled at the Albedo's Texel centres
+			if coords is None:
+				y, x = np.mgrid[0:height, 0:width]
+				coords = np.stack(((x.ravel() + 0.5) / width, (y.ravel() + 0.5) / height), axis=1)
+			decal[:, :, :3] *= decal[:, :, 3:]
+			samples = INSTANTPROJECT_FN_sampleBilinear(decal, coords)
+			samples[:, :3] /= np.maximum(samples[:, 3:], 1e-8)
+		INSTANTPROJECT_FN_releasePixels(decal)
+		INSTANTPROJECT_FN_convertPrecision(samples, layer['image_node'].image.is_float, True)
+		alpha = np.clip(samples[:, 3] * layer['opacity'].default_value, 0.0, 1.0)[:, None]
+		color = INSTANTPROJECT_FN_adjustHSV(samples[:, :3], layer['hue'].default_value, layer['saturation'].default_value, layer['value'].default_value)
+		albedo[:, :3] = color * alpha + albedo[:, :3] * (1.0 - alpha)
+		composited += 1
+	INSTANTPROJECT_FN_convertPrecision(albedo, True, node_albedo.image.is_float)
+	INSTANTPROJECT_FN_setImagePixels(node_albedo.image, albedo)
+	INSTANTPROJECT_FN_releasePixels(albedo)
+
+	layer_images = {layer['image_node'].image for layer in layers if layer['image_node'] is not None and layer['image_node'].image is not None}
+	for index in reversed(range(len(layers))):
+		INSTANTPROJECT_FN_removeDecalNodes(nodes, links, index)
+	for image in layer_images:
+		INSTANTPROJECT_FN_removeTrackedImage(image)
+	obj.INSTANTPROJECT_VAR_activeDecalLayer = 0
+	return composited
 
 def INSTANTPROJECT_FN_createDecalLayer(self, context, image):
 	width = int(context.scene.render.resolution_x * context.scene.INSTANTPROJECT_VAR_projectResolution)
@@ -283,124 +2984,17 @@ def INSTANTPROJECT_FN_createDecalLayer(self, context, image):
 		self.report({'WARNING'}, 'Please select a Mesh.')
 		return{'CANCELLED'}
 
-	# Create Material if Non-Existant
-	if len(active_object.data.materials) < 1:
-		material = bpy.data.materials.new(name=image.name)
-		active_object.data.materials.append(material)
-
-	# Setup Material
-	material = active_object.data.materials[0]
-	material.use_nodes = True
-	nodes = active_object.data.materials[0].node_tree.nodes 
-	links = active_object.data.materials[0].node_tree.links 
-
-	# Grab Relevent Nodes
-	material_output = nodes.get('Material Output')
-	original_output_shader = material_output.inputs[0].links[0].from_node
-
-	# Check for Existing Decal Setup
-	if nodes.get('instantproject_decal_bsdf') is None:
-		# Safety Checks 
-		if original_output_shader == None:			
-			return{'CANCELLED'}			
-
-		# Extend Shader
-		original_output_shader.name = 'original_output_shader'
-		links.remove(material_output.inputs[0].links[0])
-		decal_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-		decal_bsdf.hide = True
-		decal_bsdf.name = 'instantproject_decal_bsdf'
-		decal_mix = nodes.new(type='ShaderNodeMixShader')
-		decal_mix.name = 'instantproject_decal_mix'
-		decal_image_node =  nodes.new(type='ShaderNodeTexImage')
-		decal_image_node.name = 'instantproject_decal_image'	
-		decal_colorramp_specular = nodes.new(type='ShaderNodeValToRGB')
-		decal_colorramp_specular.name = 'instantproject_decal_colorramp_specular'
-		decal_colorramp_roughness = nodes.new(type='ShaderNodeValToRGB')
-		decal_colorramp_roughness.name = 'instantproject_decal_colorramp_roughness'
-		decal_bump = nodes.new(type='ShaderNodeBump')
-		decal_bump.name = 'instantproject_decal_bump'
-		decal_opacity = nodes.new(type='ShaderNodeMath')
-		decal_opacity.name = 'instantproject_decal_opacity'
-		decal_HSV = nodes.new(type='ShaderNodeHueSaturation')
-		decal_HSV.name = 'instantproject_decal_HSV'
-
-		# Create Image			
-		decal_layer_image = bpy.data.images.new(name=f'{active_object.name}_decal_image', width=width, height=height, alpha=True)
-		decal_layer_image.file_format= 'PNG'
-		decal_layer_image.alpha_mode = 'STRAIGHT'
-		pixels = [0.0] * (4 * width * height)
-		decal_layer_image.pixels = pixels
-
-		decal_image_node.image = decal_layer_image
-
-		# Default Values
-
-		decal_bump.inputs[0].default_value = 0.1
-		decal_opacity.operation = 'MULTIPLY'
-		decal_opacity.inputs[1].default_value = 1.0
-
-		decal_colorramp_roughness.color_ramp.elements[0].color = (0.7, 0.7, 0.7, 1.0)
-
-		# Repeposition Nodes		
-		material_output.location = Vector((original_output_shader.location[0] + 1500, original_output_shader.location[1]))
-		decal_mix.location = Vector((material_output.location[0] - (material_output.width + 50), material_output.location[1]))
-		decal_bsdf.location = Vector((decal_mix.location[0] - (decal_bsdf.width + 50), decal_mix.location[1] - 300))
-		decal_image_node.location = Vector((decal_bsdf.location[0] - 700, decal_bsdf.location[1]))
-		decal_HSV.location = Vector((decal_image_node.location[0] + 300, decal_bsdf.location[1]))
-		decal_colorramp_specular.location = Vector((decal_image_node.location[0] + 300, decal_bsdf.location[1] - 200))
-		decal_colorramp_roughness.location = Vector((decal_image_node.location[0] + 300, decal_bsdf.location[1] - 450))
-		decal_bump.location = Vector((decal_image_node.location[0] + 300, decal_bsdf.location[1] - 700))
-		decal_opacity.location = Vector((decal_image_node.location[0] + 300, decal_bsdf.location[1] + 200))
-
-		# Setup New Links
-		link = links.new(original_output_shader.outputs[0], decal_mix.inputs[1])
-		link = links.new(decal_bsdf.outputs[0], decal_mix.inputs[2])
-
-		link = links.new(decal_image_node.outputs[0], decal_HSV.inputs[4])
-		link = links.new(decal_HSV.outputs[0], decal_bsdf.inputs[0])
-
-		# Specular
-		link = links.new(decal_image_node.outputs[0], decal_colorramp_specular.inputs[0])
-		link = links.new(decal_colorramp_specular.outputs[0], decal_bsdf.inputs[7])
-
-		# Roughness
-		link = links.new(decal_image_node.outputs[0], decal_colorramp_roughness.inputs[0])
-		link = links.new(decal_colorramp_roughness.outputs[0], decal_bsdf.inputs[9])
-
-		# Bump
-		link = links.new(decal_image_node.outputs[0], decal_bump.inputs[2])
-		link = links.new(decal_bump.outputs[0], decal_bsdf.inputs[22])
-
-		# Alpha
-		link = links.new(decal_image_node.outputs[1], decal_opacity.inputs[0])
-		link = links.new(decal_opacity.outputs[0], decal_mix.inputs[0])
-
-		# Output
-		link = links.new(decal_mix.outputs[0], material_output.inputs[0])
-
-		# Collapse BSDF Sockets
-		for node in decal_bsdf.inputs:
-			if not node.name in {'Base Color', 'Metallic', 'Specular', 'Roughness', 'Normal'}:
-				node.hide = True
-	else:
-		# Grab Existing Decal Setup
-		decal_bsdf = nodes.get('instantproject_decal_bsdf')
-		decal_mix = nodes.get('instantproject_decal_mix')
-		decal_image_node = nodes.get('instantproject_decal_image')	
-		decal_layer_image = decal_image_node.image
-		decal_colorramp_specular = nodes.get('instantproject_decal_colorramp_specular')	
-		decal_colorramp_roughness = nodes.get('instantproject_decal_colorramp_roughness')	
-		decal_bump = nodes.get('instantproject_decal_bump')	
-		decal_opacity = nodes.get('instantproject_decal_opacity')	
-		decal_HSV = nodes.get('instantproject_decal_HSV')	
+	decal_layer_image = INSTANTPROJECT_FN_ensureDecalLayer(active_object, width, height, image.name, INSTANTPROJECT_FN_useFloatBuffer(context.scene.INSTANTPROJECT_VAR_storagePrecision, image))
+	if decal_layer_image is None:
+		return{'CANCELLED'}
 						
 	# Assign Image as Stencil and enter Paint Mode
 	if not context.mode == 'PAINT_TEXTURE':
 		bpy.ops.object.mode_set(mode='TEXTURE_PAINT')
 
-	decal_texture = bpy.data.textures.new(name=f'{image.name}_decal_texture', type='IMAGE')
-	decal_texture.image = image		
+	# Every Decal shares one Texture, cropped to its Atlas Slot
+	atlas, rect = INSTANTPROJECT_FN_resolveDecal(context, image)
+	decal_texture = INSTANTPROJECT_FN_getDecalTexture(atlas, rect)
 		
 	bpy.ops.wm.tool_set_by_id(name='builtin_brush.Draw')
 	brush = bpy.context.tool_settings.image_paint.brush
@@ -413,51 +3007,146 @@ def INSTANTPROJECT_FN_createDecalLayer(self, context, image):
 
 	bpy.ops.brush.stencil_reset_transform()
 	bpy.ops.brush.stencil_fit_image_aspect()
+	brush.stencil_dimension = (brush.stencil_dimension[1] * rect[2] / rect[3], brush.stencil_dimension[1])
 	
 	return{'FINISHED'}
 
+def INSTANTPROJECT_FN_getStampTexels(placement, decal_aspect, space_aspect, width, height, lookup_map=None):
+	# Returns the Texels (N,) covered by one Stamp and the normalized Decal coordinates (N, 2) they sample.
+	# Stamps are placed in a space of normalized (0-1) coordinates whose width / height ratio is space_aspect:
+	# the UV space of the Decal Layer, or the Camera Frame through a Lookup Map of the Decal Layer.
+	#   position - centre of the Decal
+	#   size     - width of the Decal, as a fraction of the space's width (the height follows the Decal's aspect)
+	#   rotation - counter-clockwise rotation in degrees
+	center = np.array(placement['position'], dtype=np.float64) * (space_aspect, 1.0)
+	half_width = placement.get('size', 0.1) * space_aspect * 0.5
+	half_height = half_width / decal_aspect
+	angle = math.radians(placement.get('rotation', 0.0))
+	cos, sin = math.cos(angle), math.sin(angle)
+	reach = abs(half_width * cos) + abs(half_height * sin), abs(half_width * sin) + abs(half_height * cos)
+
+	if lookup_map is None:
+		# Every Texel centre inside the Stamp's bounding box
+		x_min = max(int(math.floor((center[0] - reach[0]) / space_aspect * width)), 0)
+		x_max = min(int(math.ceil((center[0] + reach[0]) / space_aspect * width)), width - 1)
+		y_min = max(int(math.floor((center[1] - reach[1]) * height)), 0)
+		y_max = min(int(math.ceil((center[1] + reach[1]) * height)), height - 1)
+		if x_max < x_min or y_max < y_min:
+			return np.empty(0, dtype=np.int64), np.empty((0, 2))
+		y, x = np.mgrid[y_min:y_max + 1, x_min:x_max + 1]
+		texels = (y * width + x).ravel()
+		points = np.stack(((x.ravel() + 0.5) / width * space_aspect, (y.ravel() + 0.5) / height), axis=1)
+	else:
+		points = lookup_map['coords'] * (space_aspect, 1.0)
+		inside = np.all(np.abs(points - center) <= reach, axis=1)
+		texels = lookup_map['texels'][inside]
+		points = points[inside]
+
+	offset = points - center
+	local = np.stack(((offset[:, 0] * cos + offset[:, 1] * sin) / (2.0 * half_width), (offset[:, 1] * cos - offset[:, 0] * sin) / (2.0 * half_height)), axis=1) + 0.5
+	inside = np.all((local >= 0.0) & (local <= 1.0), axis=1)
+	return texels[inside], local[inside]
+
+@INSTANTPROJECT_FN_profiled('Stamp Decals')
+def INSTANTPROJECT_FN_stampDecals(target_image, decal_image, placements, lookup_map=None, camera_aspect=1.0, rect=None):
+	# Composites decal_image into target_image once per Placement, alpha-blending all Stamps in a single pass.
+	# Placements are dictionaries with 'position', 'size', 'rotation' (see INSTANTPROJECT_FN_getStampTexels),
+	# an optional 'opacity' and a 'space' of 'UV' (default) or 'CAMERA'. Camera Stamps need a lookup_map of target_image
+	# and the width / height ratio of the Camera Frame. rect optionally restricts the Decal to an Atlas Slot (x, y, width, height).
+	# Later Placements are composited over earlier ones. Returns the number of Texels written.
+	width, height = target_image.size
+	image_width = decal_image.size[0]
+	rect_x, rect_y, decal_width, decal_height = rect if rect is not None else (0, 0, decal_image.size[0], decal_image.size[1])
+	decal = INSTANTPROJECT_FN_convertPrecision(INSTANTPROJECT_FN_getImagePixels(decal_image), decal_image.is_float, target_image.is_float)
+	decal.shape = (-1, 4)
+
+	# Resample premultiplied colour so transparent Decal Pixels do not bleed into the edges
+	decal[:, :3] *= decal[:, 3:]
+	texel_list, sample_list = [], []
+	for placement in placements:
+		camera_space = placement.get('space', 'UV') == 'CAMERA'
+		if camera_space and lookup_map is None:
+			raise ValueError('Camera Space Stamps need a Lookup Map.')
+		space_aspect = camera_aspect if camera_space else width / height
+		texels, coords = INSTANTPROJECT_FN_getStampTexels(placement, decal_width / decal_height, space_aspect, width, height, lookup_map if camera_space else None)
+		indices, weights = INSTANTPROJECT_FN_bilinearTaps(coords, decal_width, decal_height)
+		indices = (indices // decal_width + rect_y) * image_width + indices % decal_width + rect_x
+		texel_list.append(texels)
+		sample_list.append(INSTANTPROJECT_FN_gatherTaps(decal, indices, weights) * placement.get('opacity', 1.0))
+	INSTANTPROJECT_FN_releasePixels(decal)
+	texels = np.concatenate(texel_list) if texel_list else np.empty(0, dtype=np.int64)
+	if not len(texels):
+		return 0
+	samples = np.concatenate(sample_list)
+
+	# Alpha over, resolved per Texel: each Stamp is dimmed by the transmittance of the Stamps placed after it
+	order = np.argsort(texels, kind='stable')
+	texels = texels[order]
+	samples = samples[order]
+	# The prefix sums run over every Sample, so they are kept in float64: float32 loses the per-Texel differences
+	starts = np.flatnonzero(np.r_[True, texels[1:] != texels[:-1]])
+	ends = np.r_[starts[1:], len(texels)]
+	log_transmittance = np.log1p(-np.clip(samples[:, 3].astype(np.float64), 0.0, 1.0 - 1e-6))
+	inclusive = np.cumsum(log_transmittance)
+	group = np.repeat(np.arange(len(starts)), ends - starts)
+	after = np.exp(inclusive[ends - 1][group] - inclusive)
+	color = np.add.reduceat(samples[:, :3] * after[:, None], starts)
+	transmittance = np.exp(np.add.reduceat(log_transmittance, starts))
+
+	# Blend the premultiplied Stamps over the straight-alpha Decal Layer
+	texels = texels[starts]
+	pixels = INSTANTPROJECT_FN_getImagePixels(target_image)
+	pixels.shape = (-1, 4)
+	destination = pixels[texels]
+	alpha = 1.0 - transmittance * (1.0 - destination[:, 3])
+	color += destination[:, :3] * (destination[:, 3] * transmittance)[:, None]
+	pixels[texels, :3] = color / np.maximum(alpha, 1e-8)[:, None]
+	pixels[texels, 3] = alpha
+	INSTANTPROJECT_FN_setImagePixels(target_image, pixels)
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	return len(texels)
+
+def INSTANTPROJECT_FN_loadPlacements(filepath):
+	# Reads Stamp Placements from a JSON file: either a list of Placements, or {"image": path, "placements": [...]}.
+	# Placements may name their own 'image'; relative paths are resolved against the JSON file. Returns {image path: [Placements]}.
+	with open(filepath) as file:
+		data = json.load(file)
+	default_image = None
+	if isinstance(data, dict):
+		default_image = data.get('image')
+		data = data.get('placements', [])
+	directory = os.path.dirname(os.path.abspath(filepath))
+	groups = {}
+	for index, placement in enumerate(data):
+		if not 'position' in placement:
+			raise ValueError(f"Placement {index} is missing 'position'.")
+		image_path = placement.get('image', default_image)
+		groups.setdefault(os.path.join(directory, image_path) if image_path else None, []).append(placement)
+	return groups
+
 def INSTANTPROJECT_FN_removeDecalLayer(self, context):
+	# Removes the active Decal Layer, keeping the Layers above and below it connected.
 	active_object = bpy.context.active_object
 	if not active_object:
 		self.report({'WARNING'}, 'No active object selected.')
 		return{'CANCELLED'}
 	nodes = active_object.data.materials[0].node_tree.nodes 
 	links = active_object.data.materials[0].node_tree.links 
-	decal_bsdf = nodes.get('instantproject_decal_bsdf')
-	if decal_bsdf is None:
+	layers = INSTANTPROJECT_FN_getDecalLayers(nodes)
+	if not layers:
 		self.report({'WARNING'}, 'No Decal Layer found, aborting.')
 		return{'CANCELLED'}
 
-	# Grab Relevent Nodes
-	material_output = nodes.get('Material Output')
-	decal_mix = nodes.get('instantproject_decal_mix')
-	decal_image_node = nodes.get('instantproject_decal_image')
-	original_output_shader = nodes.get('original_output_shader')
-
-	decal_colorramp_specular = nodes.get('instantproject_decal_colorramp_specular')
-	decal_colorramp_roughness = nodes.get('instantproject_decal_colorramp_roughness')
-	decal_bump = nodes.get('instantproject_decal_bump')
-	decal_HSV = nodes.get('instantproject_decal_HSV')
-	decal_opacity = nodes.get('instantproject_decal_opacity')
-
-	nodes.remove(decal_bsdf)
-	nodes.remove(decal_image_node)
-	nodes.remove(decal_mix)
-	nodes.remove(decal_colorramp_specular)
-	nodes.remove(decal_colorramp_roughness)
-	nodes.remove(decal_bump)
-	nodes.remove(decal_HSV)
-	nodes.remove(decal_opacity)
-
-	link = links.new(original_output_shader.outputs[0], material_output.inputs[0])
+	index = max(min(active_object.INSTANTPROJECT_VAR_activeDecalLayer, len(layers) - 1), 0)
+	INSTANTPROJECT_FN_removeDecalNodes(nodes, links, index)
+	active_object.INSTANTPROJECT_VAR_activeDecalLayer = max(index - 1, 0)
 
-	brush = bpy.context.tool_settings.image_paint.brush
-	brush.texture_slot.map_mode = 'TILED'
-	brush.texture = None
+	if len(layers) == 1:
+		brush = bpy.context.tool_settings.image_paint.brush
+		brush.texture_slot.map_mode = 'TILED'
+		brush.texture = None
 	return{'FINISHED'}
 
-
-
 # Classes ---------------------- 
 
 class INSTANTPROJECT_OT_addDecalLayer(bpy.types.Operator, ImportHelper):
@@ -468,7 +3157,7 @@ class INSTANTPROJECT_OT_addDecalLayer(bpy.types.Operator, ImportHelper):
 	bl_options = {'REGISTER', 'UNDO'}
 
 	filter_glob: bpy.props.StringProperty(
-			default='*.jpg;*.jpeg;*.png;*.tif;*.tiff;*.bmp;',
+			default='*.jpg;*.jpeg;*.png;*.tif;*.tiff;*.bmp;*.exr;',
 			options={'HIDDEN'}
 		)
 
@@ -478,22 +3167,145 @@ class INSTANTPROJECT_OT_addDecalLayer(bpy.types.Operator, ImportHelper):
 	def poll(cls, context):
 		return context.mode in ['PAINT_TEXTURE', 'OBJECT', 'EDIT_MESH']
 
+	@INSTANTPROJECT_FN_profiledRun('Add Decal')
 	def execute(self, context):	
-		# Image Loading
-		image = load_image(self.filepath, check_existing=True)
+		# Image Loading, straight into a Decal Atlas
+		atlas, rect = INSTANTPROJECT_FN_loadDecal(self.filepath)
+		if atlas is None:
+			self.report({'WARNING'}, 'Decal Image could not be loaded.')
+			return {'CANCELLED'}
 		
-		bpy.context.scene.INSTANTPROJECT_VAR_activeImage = image
+		bpy.context.scene.INSTANTPROJECT_VAR_activeDecal = os.path.normpath(bpy.path.abspath(self.filepath))
+		bpy.context.scene.INSTANTPROJECT_VAR_activeImage = atlas
 		INSTANTPROJECT_FN_updateDecalImage(self, context)
 
 		return {'FINISHED'}	
 
+class INSTANTPROJECT_OT_stampDecals(bpy.types.Operator, ImportHelper):
+	# Stamps Decals into the Decal Layer from a JSON file of Placements, without painting.
+	bl_idname = 'instantproject.stamp_decals'
+	bl_label = 'Stamp Decals'
+	bl_description = 'Stamps Decals into the Decal Layer at the Placements listed in a JSON file'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	filter_glob: bpy.props.StringProperty(
+			default='*.json;',
+			options={'HIDDEN'}
+		)
+
+	project_resolution: bpy.props.FloatProperty(name='project_resolution', default=0.25)
+	space: bpy.props.EnumProperty(name='space', items=INSTANTPROJECT_ENUM_stampSpaces, default='UV', description='Space of Placements that do not specify one')
+	precision: bpy.props.EnumProperty(name='precision', items=INSTANTPROJECT_ENUM_storagePrecisions, default='AUTO', description='Storage Precision of a new Decal Layer; Auto stores 8-bit like the Decal Atlases')
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode in ['PAINT_TEXTURE', 'OBJECT']
+
+	@INSTANTPROJECT_FN_profiledRun('Stamp Decals')
+	def execute(self, context):
+		active_object = context.active_object
+		if active_object is None or not active_object.type == 'MESH':
+			self.report({'WARNING'}, 'Please select a Mesh.')
+			return{'CANCELLED'}
+		try:
+			groups = INSTANTPROJECT_FN_loadPlacements(self.filepath)
+		except (OSError, ValueError) as error:
+			self.report({'WARNING'}, f'Could not read Placements: {error}')
+			return{'CANCELLED'}
+		for placements in groups.values():
+			for placement in placements:
+				placement.setdefault('space', self.space)
+		camera_space = any(placement['space'] == 'CAMERA' for placements in groups.values() for placement in placements)
+		camera = context.scene.camera
+		if camera_space and camera is None:
+			self.report({'WARNING'}, 'No active scene camera.')
+			return{'CANCELLED'}
+
+		width = int(context.scene.render.resolution_x * self.project_resolution)
+		height = int(context.scene.render.resolution_y * self.project_resolution)
+		decal_layer_image = INSTANTPROJECT_FN_ensureDecalLayer(active_object, width, height, active_object.name, INSTANTPROJECT_FN_useFloatBuffer(self.precision))
+		if decal_layer_image is None:
+			self.report({'WARNING'}, 'Material has no Shader to layer Decals over.')
+			return{'CANCELLED'}
+
+		lookup_map = None
+		camera_aspect = 1.0
+		if camera_space:
+			render = context.scene.render
+			lookup_map = INSTANTPROJECT_FN_getLookupMap(context, active_object, camera, decal_layer_image, decal_layer_image)
+			camera_aspect = (render.resolution_x * render.pixel_aspect_x) / (render.resolution_y * render.pixel_aspect_y)
+
+		with INSTANTPROJECT_FN_recordHistory(context, 'Stamp Decals', [decal_layer_image], linked=True):
+			stamps = self.stamp(context, groups, decal_layer_image, lookup_map, camera_aspect)
+		self.report({'INFO'}, f'Stamped {stamps} Decals.')
+		return{'FINISHED'}
+
+	def stamp(self, context, groups, decal_layer_image, lookup_map, camera_aspect):
+		stamps = 0
+		for image_path, placements in groups.items():
+			if image_path:
+				atlas, rect = INSTANTPROJECT_FN_loadDecal(image_path) if os.path.isfile(image_path) else (None, None)
+			elif context.scene.INSTANTPROJECT_VAR_activeImage is not None:
+				atlas, rect = INSTANTPROJECT_FN_resolveDecal(context, context.scene.INSTANTPROJECT_VAR_activeImage)
+			else:
+				atlas = None
+			if atlas is None:
+				self.report({'WARNING'}, f'Decal Image {image_path or "(none selected)"} could not be loaded, skipping.')
+				continue
+			INSTANTPROJECT_FN_stampDecals(decal_layer_image, atlas, placements, lookup_map, camera_aspect, rect)
+			stamps += len(placements)
+		return stamps
+
+class INSTANTPROJECT_OT_newDecalLayer(bpy.types.Operator):
+	# Adds an empty Decal Layer on top of the stack and makes it active
+	bl_idname = 'instantproject.new_decal_layer'
+	bl_label = 'New Decal Layer'
+	bl_description = 'Adds an empty Decal Layer on top of the Decal stack'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	project_resolution: bpy.props.FloatProperty(name='project_resolution', default=0.25)
+	precision: bpy.props.EnumProperty(name='precision', items=INSTANTPROJECT_ENUM_storagePrecisions, default='AUTO', description='Storage Precision of the Decal Layer; Auto stores 8-bit like the Decal Atlases')
+
+	def execute(self, context):
+		active_object = context.active_object
+		if active_object is None or not active_object.type == 'MESH':
+			self.report({'WARNING'}, 'Please select a Mesh.')
+			return{'CANCELLED'}
+		width = int(context.scene.render.resolution_x * self.project_resolution)
+		height = int(context.scene.render.resolution_y * self.project_resolution)
+		index = INSTANTPROJECT_FN_newDecalLayer(active_object, width, height, active_object.name, INSTANTPROJECT_FN_useFloatBuffer(self.precision))
+		if index is None:
+			self.report({'WARNING'}, 'Material has no Shader to layer Decals over.')
+			return{'CANCELLED'}
+		active_object.INSTANTPROJECT_VAR_activeDecalLayer = index
+		decal_layer_image = active_object.data.materials[0].node_tree.nodes.get(INSTANTPROJECT_FN_getDecalNodeName('instantproject_decal_image', index)).image
+		self.report({'INFO'}, f'Added Decal Layer {index} ({INSTANTPROJECT_FN_describeStorage([decal_layer_image])}).')
+		return{'FINISHED'}
+
+class INSTANTPROJECT_OT_selectDecalLayer(bpy.types.Operator):
+	# Makes a Decal Layer the active one
+	bl_idname = 'instantproject.select_decal_layer'
+	bl_label = 'Select Decal Layer'
+	bl_description = 'Makes this Decal Layer active for painting, stamping and adjustments'
+	bl_options = {'REGISTER', 'UNDO', 'INTERNAL'}
+
+	index: bpy.props.IntProperty(name='index', default=0, min=0)
+
+	def execute(self, context):
+		if context.active_object is None:
+			return{'CANCELLED'}
+		context.active_object.INSTANTPROJECT_VAR_activeDecalLayer = self.index
+		return{'FINISHED'}
+
 class INSTANTPROJECT_OT_toggleDecalVisibility(bpy.types.Operator):
-	# Toggles the visibility of the Decal Layer
+	# Toggles the visibility of a Decal Layer
 	bl_idname = 'instantproject.toggle_decal_visibility'
 	bl_label = 'Hide/Show Decal'
 	bl_description = 'Toggles the visibility of the Decal Layer.'
 	bl_options = {'REGISTER', 'UNDO'}
 
+	index: bpy.props.IntProperty(name='index', default=-1, description='Decal Layer to toggle, or -1 for the active Layer')
+
 	def execute(self, context):
 		active_object = bpy.context.active_object
 		if not active_object:
@@ -501,12 +3313,50 @@ class INSTANTPROJECT_OT_toggleDecalVisibility(bpy.types.Operator):
 			return{'CANCELLED'}
 		try:
 			nodes = active_object.data.materials[0].node_tree.nodes 
-			mix = nodes.get('instantproject_decal_mix')
-			mix.mute = 1-mix.mute
+			decal_node = INSTANTPROJECT_FN_getDecalSockets(nodes, active_object.INSTANTPROJECT_VAR_activeDecalLayer if self.index < 0 else self.index)['node']
+			decal_node.mute = 1-decal_node.mute
 		except:
 			return{'CANCELLED'}
 		return{'FINISHED'}
 
+class INSTANTPROJECT_OT_flattenDecalLayers(bpy.types.Operator):
+	# Bakes the Decal stack into the Albedo Image and removes the Decal Layer nodes
+	bl_idname = 'instantproject.flatten_decal_layers'
+	bl_label = 'Flatten Decals'
+	bl_description = 'Composites the Colour of all visible Decal Layers into the Albedo Image and removes the Layer nodes. Their Roughness, Specular and Bump, and hidden Layers, are discarded'
+	bl_options = {'REGISTER', 'UNDO'}
+
+	color_only: bpy.props.BoolProperty(name='color_only', default=False, description='Flatten the Colour of the Decal Layers, dropping the Roughness, Specular and Bump they add')
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode in ['PAINT_TEXTURE', 'OBJECT', 'EDIT_MESH']
+
+	def invoke(self, context, event):
+		# Clicking the button confirms that only Colour is kept
+		self.color_only = True
+		return context.window_manager.invoke_confirm(self, event)
+
+	@INSTANTPROJECT_FN_profiledRun('Flatten Decals')
+	def execute(self, context):
+		active_object = context.active_object
+		if active_object is None or len(active_object.data.materials) < 1 or active_object.data.materials[0].node_tree is None:
+			self.report({'WARNING'}, 'No Decal Layer found, aborting.')
+			return{'CANCELLED'}
+		node_albedo = active_object.data.materials[0].node_tree.nodes.get('albedo')
+		try:
+			with INSTANTPROJECT_FN_recordHistory(context, 'Flatten Decals', [node_albedo.image if node_albedo is not None else None], linked=True):
+				composited = INSTANTPROJECT_FN_flattenDecalLayers(active_object, self.color_only)
+		except ValueError as error:
+			self.report({'WARNING'}, f'{error} Nothing was flattened.')
+			return{'CANCELLED'}
+		if composited is None:
+			self.report({'WARNING'}, 'No Albedo Image to flatten into, project an Image first.')
+			return{'CANCELLED'}
+		INSTANTPROJECT_FN_unloadDecalImage()
+		self.report({'INFO'}, f'Flattened {composited} Decal Layers.')
+		return{'FINISHED'}
+
 class INSTANTPROJECT_OT_removeDecalLayer(bpy.types.Operator):
 	# Confirmation Popup when Deleting Decal Layer
 	bl_idname = 'instantproject.confirm_delete'
@@ -526,37 +3376,538 @@ class INSTANTPROJECT_OT_removeDecalLayer(bpy.types.Operator):
 	def invoke(self, context, event):
 		return context.window_manager.invoke_confirm(self, event)
 
+#--------------------------------------------------------------
+# Resource Tracker
+#--------------------------------------------------------------
+
+# Every datablock InstantProject creates is tagged 'instantproject_generated' with its creation time, so clean-up can
+# tell it apart from user data. Only tagged datablocks without users (and without a Fake User) are ever removed.
+INSTANTPROJECT_CACHE_memoryReport = {'objects': [], 'tracked': 0, 'stale': 0}
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_track(datablock):
+	# Tags a datablock as created by InstantProject and returns it.
+	datablock['instantproject_generated'] = True
+	datablock['instantproject_created'] = time.time()
+	return datablock
+
+def INSTANTPROJECT_FN_getTracked(collection):
+	return [datablock for datablock in collection if datablock.get('instantproject_generated')]
+
+def INSTANTPROJECT_FN_isStale(datablock):
+	return datablock.users == 0 and not datablock.use_fake_user
+
+def INSTANTPROJECT_FN_removeTrackedImage(image):
+	# Removes a stale tracked Image now instead of at the next collection. Images still being saved are kept.
+	# Returns whether image was removed.
+	if not image.get('instantproject_generated') or not INSTANTPROJECT_FN_isStale(image) or image.name in INSTANTPROJECT_CACHE_pendingSaves:
+		return False
+	# Pixel History Steps of removed Images are skipped on Undo
+	INSTANTPROJECT_FN_forgetProjectionSources(image.name)
+	bpy.data.images.remove(image)
+	return True
+
+def INSTANTPROJECT_FN_getObjectImages(obj):
+	# Returns the Images sampled by the Image Texture nodes of obj's Materials.
+	images = set()
+	for slot in obj.material_slots:
+		if slot.material is None or slot.material.node_tree is None:
+			continue
+		for node in slot.material.node_tree.nodes:
+			if node.type == 'TEX_IMAGE' and node.image is not None:
+				images.add(node.image)
+	return images
+
+def INSTANTPROJECT_FN_buildMemoryReport():
+	# Returns the loaded Image memory of every Object with Materials (largest first), of all tracked Images and the stale tracked count.
+	objects = []
+	for obj in bpy.data.objects:
+		images = [image for image in INSTANTPROJECT_FN_getObjectImages(obj) if image.has_data]
+		if images:
+			objects.append((obj.name, sum(INSTANTPROJECT_FN_getImageBytes(image) for image in images)))
+	objects.sort(key=lambda entry: entry[1], reverse=True)
+	tracked = sum(INSTANTPROJECT_FN_getImageBytes(image) for image in INSTANTPROJECT_FN_getTracked(bpy.data.images) if image.has_data)
+	stale = sum(INSTANTPROJECT_FN_isStale(datablock) for collection in (bpy.data.images, bpy.data.materials, bpy.data.textures) for datablock in INSTANTPROJECT_FN_getTracked(collection))
+	return {'objects': objects, 'tracked': tracked, 'stale': stale}
+
+def INSTANTPROJECT_FN_dedupeTextures():
+	# Remaps the users of tracked Image Textures with identical settings onto one of them and removes the others. Returns the number removed.
+	kept = {}
+	removed = 0
+	for texture in INSTANTPROJECT_FN_getTracked(bpy.data.textures):
+		if not texture.type == 'IMAGE' or texture.use_fake_user:
+			continue
+		key = (texture.image.name if texture.image is not None else None, texture.extension, texture.crop_min_x, texture.crop_min_y, texture.crop_max_x, texture.crop_max_y)
+		if key in kept:
+			texture.user_remap(kept[key])
+			bpy.data.textures.remove(texture)
+			removed += 1
+		else:
+			kept[key] = texture
+	return removed
+
+def INSTANTPROJECT_FN_collectGarbage(budget=0):
+	# Once the loaded tracked Images exceed budget (bytes), removes stale tracked datablocks: Materials and Textures first
+	# (they hold Image users), then Images, oldest first, until the Images fit. Nothing is removed within budget.
+	# With budget 0 every stale tracked datablock is removed. Images still being saved in the background are kept.
+	# Returns (removed datablocks, freed bytes).
+	images = INSTANTPROJECT_FN_getTracked(bpy.data.images)
+	used = sum(INSTANTPROJECT_FN_getImageBytes(image) for image in images if image.has_data)
+	if budget and used <= budget:
+		return 0, 0
+	removed = 0
+	for collection in (bpy.data.materials, bpy.data.textures):
+		for datablock in INSTANTPROJECT_FN_getTracked(collection):
+			if INSTANTPROJECT_FN_isStale(datablock):
+				collection.remove(datablock)
+				removed += 1
+	freed = 0
+	for image in sorted(images, key=lambda image: image.get('instantproject_created', 0.0)):
+		if budget and used - freed <= budget:
+			break
+		image_bytes = INSTANTPROJECT_FN_getImageBytes(image) if image.has_data else 0
+		if INSTANTPROJECT_FN_removeTrackedImage(image):
+			freed += image_bytes
+			removed += 1
+	return removed, freed
+
+def INSTANTPROJECT_FN_enforceResourceBudget(context):
+	# Evicts stale tracked datablocks once the tracked Images exceed the Scene's Resource Budget.
+	return INSTANTPROJECT_FN_collectGarbage(max(1, context.scene.INSTANTPROJECT_VAR_resourceBudget) * 1024 * 1024)
+
+# Classes ---------------------- 
+
+class INSTANTPROJECT_OT_memoryReport(bpy.types.Operator):
+	# Measures the Image memory used per Object and by InstantProject's own datablocks.
+	bl_idname = 'instantproject.memory_report'
+	bl_label = 'Memory Report'
+	bl_description = 'Reports the loaded Image memory used by each Object and by InstantProject datablocks'
+	bl_options = {'REGISTER'}
+
+	def execute(self, context):
+		report = INSTANTPROJECT_FN_buildMemoryReport()
+		INSTANTPROJECT_CACHE_memoryReport.update(report) # The panel lists the largest Objects
+		self.report({'INFO'}, f"InstantProject Images: {report['tracked'] / (1024 * 1024):.1f} MB across {len(report['objects'])} Object(s), {report['stale']} stale datablock(s).")
+		return {'FINISHED'}
+
+#--------------------------------------------------------------
+# Pixel History
+#--------------------------------------------------------------
+
+# Operators that rewrite the pixels of existing Images record InstantProject history Steps instead of relying on global Undo.
+# A Step keeps only the tiles that changed, before and after, zlib compressed (byte Images as uint8, float Images as float32).
+# Steps are dropped oldest first once the undo and redo history together exceed the Scene's memory cap.
+# Operators that also change datablocks (Stamp, Flatten) keep global Undo and record linked Steps: each stores its id in
+# the Scene, which global Undo restores, so undoing or redoing the Operator also undoes or redoes its pixels.
+INSTANTPROJECT_CACHE_history = {'undo': deque(), 'redo': deque(), 'bytes': 0, 'link': 0}
+INSTANTPROJECT_HISTORY_tileSize = 128
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getHistoryBytes(step):
+	return sum(len(tile[4]) + len(tile[5]) for record in step['images'] for tile in record['tiles'])
+
+def INSTANTPROJECT_FN_getTileData(pixels, is_float):
+	# Returns the raw bytes a tile is stored as: uint8 for byte Images, float32 for float Images.
+	return np.ascontiguousarray(pixels).tobytes() if is_float else np.rint(np.clip(pixels, 0.0, 1.0) * 255.0).astype(np.uint8).tobytes()
+
+def INSTANTPROJECT_FN_decodeTile(data, shape, is_float):
+	pixels = np.frombuffer(zlib.decompress(data), dtype=np.float32 if is_float else np.uint8).reshape(shape)
+	return pixels if is_float else pixels.astype(np.float32) / 255.0
+
+def INSTANTPROJECT_FN_getTiles(pixels, tile_size=INSTANTPROJECT_HISTORY_tileSize):
+	# Yields (y, x, tile) for every tile of a (height, width, 4) Array.
+	height, width = pixels.shape[:2]
+	for y in range(0, height, tile_size):
+		for x in range(0, width, tile_size):
+			yield y, x, pixels[y:y + tile_size, x:x + tile_size]
+
+def INSTANTPROJECT_FN_snapshotTiles(image):
+	# Returns {(y, x): (digest, compressed tile)} of an Image, so the state before an Operator costs compressed memory only.
+	pixels = INSTANTPROJECT_FN_getImagePixels(image)
+	snapshot = {}
+	for y, x, tile in INSTANTPROJECT_FN_getTiles(pixels):
+		data = INSTANTPROJECT_FN_getTileData(tile, image.is_float)
+		snapshot[(y, x)] = (hashlib.blake2b(data, digest_size=16).digest(), zlib.compress(data, 1))
+	tile = None # The last tile is a view that would keep pixels out of the pool
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	return snapshot
+
+def INSTANTPROJECT_FN_diffTiles(snapshot, image):
+	# Returns (y, x, height, width, before, after) compressed tiles for every tile of image that differs from its snapshot.
+	pixels = INSTANTPROJECT_FN_getImagePixels(image)
+	tiles = []
+	for y, x, tile in INSTANTPROJECT_FN_getTiles(pixels):
+		data = INSTANTPROJECT_FN_getTileData(tile, image.is_float)
+		digest, before = snapshot[(y, x)]
+		if not hashlib.blake2b(data, digest_size=16).digest() == digest:
+			tiles.append((y, x, tile.shape[0], tile.shape[1], before, zlib.compress(data, 1)))
+	tile = None
+	INSTANTPROJECT_FN_releasePixels(pixels)
+	return tiles
+
+@contextmanager
+def INSTANTPROJECT_FN_recordHistory(context, name, images, linked=False):
+	# Records the pixel changes made to images inside the block as one history Step named name.
+	# Operators with global Undo pass linked, which ties the Step to their global Undo step.
+	images = [image for image in dict.fromkeys(images) if image is not None]
+	snapshots = [(image.name, tuple(image.size), image.is_float, INSTANTPROJECT_FN_snapshotTiles(image)) for image in images]
+	try:
+		yield
+	finally:
+		step = {'name': name, 'images': []}
+		for image_name, size, is_float, snapshot in snapshots:
+			image = bpy.data.images.get(image_name)
+			if image is not None and tuple(image.size) == size and image.is_float == is_float:
+				tiles = INSTANTPROJECT_FN_diffTiles(snapshot, image)
+				if tiles:
+					step['images'].append({'image': image_name, 'size': size, 'is_float': is_float, 'tiles': tiles})
+		if step['images']:
+			if linked:
+				history = INSTANTPROJECT_CACHE_history
+				history['link'] = max(history['link'], context.scene.get('instantproject_history_link', 0)) + 1
+				step['link'] = history['link']
+				context.scene['instantproject_history_link'] = step['link']
+			INSTANTPROJECT_FN_pushHistory(context, step)
+
+def INSTANTPROJECT_FN_pushHistory(context, step):
+	# Adds a Step to the undo history, clearing the redo history and trimming the oldest Steps to the Scene's memory cap.
+	history = INSTANTPROJECT_CACHE_history
+	step['bytes'] = INSTANTPROJECT_FN_getHistoryBytes(step)
+	history['undo'].append(step)
+	history['redo'].clear()
+	INSTANTPROJECT_FN_trimHistory(context)
+
+def INSTANTPROJECT_FN_trimHistory(context):
+	# Drops the oldest undo Steps, then the furthest redo Steps, until the history fits the Scene's memory cap.
+	history = INSTANTPROJECT_CACHE_history
+	history['bytes'] = sum(entry['bytes'] for entry in history['undo']) + sum(entry['bytes'] for entry in history['redo'])
+	limit = context.scene.INSTANTPROJECT_VAR_historyLimit * 1024 * 1024
+	while history['undo'] and history['bytes'] > limit:
+		history['bytes'] -= history['undo'].popleft()['bytes']
+	while history['redo'] and history['bytes'] > limit:
+		history['bytes'] -= history['redo'].popleft()['bytes']
+
+def INSTANTPROJECT_FN_undoHistoryStep():
+	# Moves the last Step to the redo history and reverts its pixels. Returns (Step, skipped Image names).
+	history = INSTANTPROJECT_CACHE_history
+	step = history['undo'].pop()
+	history['redo'].append(step)
+	return step, INSTANTPROJECT_FN_applyHistoryStep(step, redo=False)
+
+def INSTANTPROJECT_FN_redoHistoryStep():
+	# Moves the last undone Step back to the undo history and reapplies its pixels. Returns (Step, skipped Image names).
+	history = INSTANTPROJECT_CACHE_history
+	step = history['redo'].pop()
+	history['undo'].append(step)
+	return step, INSTANTPROJECT_FN_applyHistoryStep(step, redo=True)
+
+def INSTANTPROJECT_FN_applyHistoryStep(step, redo):
+	# Writes the before (or, with redo, after) tiles of a Step back into its Images. Returns the names of Images that no longer match.
+	skipped = []
+	for record in step['images']:
+		image = bpy.data.images.get(record['image'])
+		if image is None or not tuple(image.size) == record['size']:
+			skipped.append(record['image'])
+			continue
+		pixels = INSTANTPROJECT_FN_getImagePixels(image)
+		for y, x, tile_height, tile_width, before, after in record['tiles']:
+			pixels[y:y + tile_height, x:x + tile_width] = INSTANTPROJECT_FN_decodeTile(after if redo else before, (tile_height, tile_width, 4), record['is_float'])
+		INSTANTPROJECT_FN_setImagePixels(image, pixels)
+		INSTANTPROJECT_FN_releasePixels(pixels)
+		# Fingerprints of the last Projection no longer describe these pixels
+		INSTANTPROJECT_FN_forgetProjectionSources(record['image'])
+	return skipped
+
+def INSTANTPROJECT_FN_clearHistory():
+	INSTANTPROJECT_CACHE_history['undo'].clear()
+	INSTANTPROJECT_CACHE_history['redo'].clear()
+	INSTANTPROJECT_CACHE_history['bytes'] = 0
+
+@persistent
+def INSTANTPROJECT_FN_onGlobalUndo(scene, *args):
+	# Global Undo restored the Scene's last linked Step id: revert the pixels of every Step recorded after it.
+	history = INSTANTPROJECT_CACHE_history
+	link = scene.get('instantproject_history_link', 0)
+	while any(step.get('link', 0) > link for step in history['undo']):
+		INSTANTPROJECT_FN_undoHistoryStep()
+
+@persistent
+def INSTANTPROJECT_FN_onGlobalRedo(scene, *args):
+	# Global Redo restored a later linked Step id: reapply the pixels of every Step up to it.
+	history = INSTANTPROJECT_CACHE_history
+	link = scene.get('instantproject_history_link', 0)
+	while any(0 < step.get('link', 0) <= link for step in history['redo']):
+		INSTANTPROJECT_FN_redoHistoryStep()
+
+@persistent
+def INSTANTPROJECT_FN_onFileLoaded(*args):
+	# Steps refer to Images by name, which means nothing in another file.
+	INSTANTPROJECT_FN_clearHistory()
+
+# Classes ---------------------- 
+
+class INSTANTPROJECT_OT_undoPixels(bpy.types.Operator):
+	# Reverts the pixels changed by the last recorded InstantProject Operator.
+	bl_idname = 'instantproject.undo_pixels'
+	bl_label = 'Undo Pixels'
+	bl_description = 'Reverts the pixel changes of the last Reproject, Reload, Stamp or Flatten'
+	bl_options = {'REGISTER'}
+
+	@classmethod
+	def poll(cls, context):
+		return len(INSTANTPROJECT_CACHE_history['undo']) > 0
+
+	def execute(self, context):
+		step, skipped = INSTANTPROJECT_FN_undoHistoryStep()
+		if skipped:
+			self.report({'WARNING'}, f"Undid {step['name']}, skipping changed Images: " + ', '.join(skipped))
+		else:
+			self.report({'INFO'}, f"Undid {step['name']}.")
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_redoPixels(bpy.types.Operator):
+	# Reapplies the pixels of the last undone InstantProject Operator.
+	bl_idname = 'instantproject.redo_pixels'
+	bl_label = 'Redo Pixels'
+	bl_description = 'Reapplies the last pixel change undone by Undo Pixels'
+	bl_options = {'REGISTER'}
+
+	@classmethod
+	def poll(cls, context):
+		return len(INSTANTPROJECT_CACHE_history['redo']) > 0
+
+	def execute(self, context):
+		step, skipped = INSTANTPROJECT_FN_redoHistoryStep()
+		if skipped:
+			self.report({'WARNING'}, f"Redid {step['name']}, skipping changed Images: " + ', '.join(skipped))
+		else:
+			self.report({'INFO'}, f"Redid {step['name']}.")
+		return {'FINISHED'}
+
+class INSTANTPROJECT_OT_clearHistory(bpy.types.Operator):
+	# Frees the InstantProject pixel history.
+	bl_idname = 'instantproject.clear_history'
+	bl_label = 'Clear Pixel History'
+	bl_description = 'Frees all recorded pixel Undo and Redo Steps'
+	bl_options = {'REGISTER'}
+
+	def execute(self, context):
+		INSTANTPROJECT_FN_clearHistory()
+		return {'FINISHED'}
+
 #--------------------------------------------------------------
 # File Management
 #--------------------------------------------------------------
 
+# Modified Images are saved in three steps: their pixels are snapshot to NumPy on the main thread, PNG encoding and
+# file writes run on a thread pool (zlib releases the GIL), and the finished Images are reloaded or packed back on
+# the main thread. Float Images and non-PNG formats keep Blender's synchronous image.save().
+
+INSTANTPROJECT_CACHE_saveExecutor = {'executor': None}
+
+# Names of the Images whose background save has not finished yet; they are never evicted by the Resource Tracker.
+INSTANTPROJECT_CACHE_pendingSaves = set()
+
+# Functions ---------------------- 
+
+def INSTANTPROJECT_FN_getSaveExecutor():
+	if INSTANTPROJECT_CACHE_saveExecutor['executor'] is None:
+		INSTANTPROJECT_CACHE_saveExecutor['executor'] = ThreadPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 1) - 1)), thread_name_prefix='instantproject_save')
+	return INSTANTPROJECT_CACHE_saveExecutor['executor']
+
+def INSTANTPROJECT_FN_shutdownSaveExecutor():
+	if INSTANTPROJECT_CACHE_saveExecutor['executor'] is not None:
+		INSTANTPROJECT_CACHE_saveExecutor['executor'].shutdown(wait=True)
+		INSTANTPROJECT_CACHE_saveExecutor['executor'] = None
+
+def INSTANTPROJECT_FN_encodePNG(pixels):
+	# Encodes a bottom-up (height, width, 4) float32 Array as an 8-bit PNG, dropping Alpha when it is fully opaque.
+	height, width = pixels.shape[:2]
+	opaque = bool(np.all(pixels[:, :, 3] >= 1.0))
+	data = np.empty((height, width, 3 if opaque else 4), dtype=np.uint8)
+	np.multiply(pixels[::-1, :, :data.shape[2]], 255.0, out=pixels[::-1, :, :data.shape[2]])
+	np.clip(np.rint(pixels[::-1, :, :data.shape[2]]), 0, 255, out=data, casting='unsafe')
+
+	# Every scanline uses the Up filter, computed for all rows at once
+	rows = data.reshape(height, -1)
+	filtered = np.empty((height, rows.shape[1] + 1), dtype=np.uint8)
+	filtered[:, 0] = 2
+	filtered[0, 1:] = rows[0]
+	np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+
+	def chunk(tag, payload):
+		return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', zlib.crc32(tag + payload) & 0xffffffff)
+	header = struct.pack('>IIBBBBB', width, height, 8, 2 if opaque else 6, 0, 0, 0)
+	return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(filtered.tobytes(), 6)) + chunk(b'IEND', b'')
+
+def INSTANTPROJECT_FN_writeImageJob(job):
+	# Runs on a worker thread: encodes the snapshot of one Image and writes it to disk (or keeps the bytes for packing).
+	# Returns the job with either 'data' or 'error' set. Never touches bpy.
+	try:
+		data = INSTANTPROJECT_FN_encodePNG(job['pixels'])
+		if job['filepath']:
+			os.makedirs(os.path.dirname(job['filepath']) or '.', exist_ok=True)
+			temporary_path = job['filepath'] + '.instantproject_tmp'
+			with open(temporary_path, 'wb') as file:
+				file.write(data)
+			os.replace(temporary_path, job['filepath'])
+		else:
+			job['data'] = data
+	except Exception as error:
+		job['error'] = str(error)
+	finally:
+		INSTANTPROJECT_FN_releasePixels(job.pop('pixels'))
+	return job
+
+def INSTANTPROJECT_FN_getModifiedImages(generated_only=False):
+	# Returns the modified Images that should be saved, optionally only those created by InstantProject.
+	return [image for image in bpy.data.images if image.is_dirty and not image.source in {'VIEWER', 'MOVIE', 'SEQUENCE'} and (not generated_only or image.get('instantproject_generated'))]
+
+def INSTANTPROJECT_FN_snapshotImages(images):
+	# Main thread: snapshots the pixels of every Image that can be encoded off the main thread, and saves the others
+	# synchronously. Returns (jobs, errors), where errors maps Image names to messages.
+	jobs = []
+	errors = {}
+	for image in images:
+		packed = image.packed_file is not None or image.source == 'GENERATED'
+		filepath = '' if packed else bpy.path.abspath(image.filepath_raw)
+		try:
+			if not packed and not filepath:
+				raise ValueError('Image has no file path.')
+			if image.is_float and packed:
+				image.pack()
+				continue
+			if image.is_float or not (image.file_format == 'PNG' or packed):
+				image.save()
+				continue
+			jobs.append({'name': image.name, 'filepath': filepath, 'pixels': INSTANTPROJECT_FN_getImagePixels(image), 'generation': INSTANTPROJECT_CACHE_imageGenerations.get(image.name, 0)})
+		except Exception as error:
+			errors[image.name] = str(error)
+	return jobs, errors
+
+def INSTANTPROJECT_FN_finishImageJob(job):
+	# Main thread: packs the encoded bytes of in-memory Images, or reloads Images written to disk so they are no longer marked modified.
+	INSTANTPROJECT_CACHE_pendingSaves.discard(job['name'])
+	image = bpy.data.images.get(job['name'])
+	if image is None or job.get('error'):
+		return job.get('error')
+	if not INSTANTPROJECT_CACHE_imageGenerations.get(job['name'], 0) == job['generation']:
+		# Packing or reloading would replace the newer pixels with the snapshot
+		return 'changed while saving, the Image stays modified'
+	try:
+		if 'data' in job:
+			image.pack(data=job['data'], data_len=len(job['data']))
+			if image.source == 'GENERATED':
+				if not image.filepath_raw:
+					image.filepath_raw = f'//{bpy.path.clean_name(image.name)}.png'
+				image.file_format = 'PNG'
+				image.source = 'FILE'
+		else:
+			image.reload()
+	except Exception as error:
+		return str(error)
+	return None
+
+def INSTANTPROJECT_FN_saveImages(images):
+	# Saves Images on the calling thread, still encoding in parallel on the pool. Used where no modal Operator can run.
+	jobs, errors = INSTANTPROJECT_FN_snapshotImages(images)
+	for job in INSTANTPROJECT_FN_getSaveExecutor().map(INSTANTPROJECT_FN_writeImageJob, jobs):
+		error = INSTANTPROJECT_FN_finishImageJob(job)
+		if error:
+			errors[job['name']] = error
+	return errors
+
+@INSTANTPROJECT_FN_profiled('Save')
+def INSTANTPROJECT_FN_saveModifiedImages(context):
+	# Saves modified Images after a Projection: in the background with progress when a window is available, otherwise in place.
+	generated_only = context.scene.INSTANTPROJECT_VAR_saveGeneratedOnly
+	if context.window is not None and not bpy.app.background:
+		bpy.ops.instantproject.save_all_images('INVOKE_DEFAULT', generated_only=generated_only)
+	else:
+		INSTANTPROJECT_FN_saveImages(INSTANTPROJECT_FN_getModifiedImages(generated_only))
+
 # Classes ---------------------- 
 
 class INSTANTPROJECT_OT_saveAllImages(bpy.types.Operator):
-	# Saves all edited Image files.
+	# Saves all edited Image files, encoding and writing them on background threads while reporting progress.
 	bl_idname = 'instantproject.save_all_images'
 	bl_label = 'Save All'
 	bl_description = 'Saves all modified images'
 	bl_options = {'REGISTER'}
 
+	generated_only: bpy.props.BoolProperty(name='generated_only', default=False, description='Only save Images created by InstantProject')
+
+	def report_errors(self, errors):
+		if errors:
+			self.report({'WARNING'}, f'{len(errors)} Image(s) could not be saved: ' + '; '.join(f'{name}: {error}' for name, error in sorted(errors.items())))
+
+	@INSTANTPROJECT_FN_profiledRun('Save All')
 	def execute(self, context):
-		try:
-			bpy.ops.image.save_all_modified()
+		images = INSTANTPROJECT_FN_getModifiedImages(self.generated_only)
+		if not images:
+			self.report({'WARNING'}, 'Images unchanged, no save necessary.')
+			return {'CANCELLED'}
+		errors = INSTANTPROJECT_FN_saveImages(images)
+		self.report_errors(errors)
+		if not errors:
 			self.report({'INFO'}, 'Images saved successfully.')
-		except:
+		return {'FINISHED'}
+
+	def invoke(self, context, event):
+		images = INSTANTPROJECT_FN_getModifiedImages(self.generated_only)
+		if not images:
 			self.report({'WARNING'}, 'Images unchanged, no save necessary.')
 			return {'CANCELLED'}
+		jobs, self.errors = INSTANTPROJECT_FN_snapshotImages(images)
+		INSTANTPROJECT_CACHE_pendingSaves.update(job['name'] for job in jobs)
+		executor = INSTANTPROJECT_FN_getSaveExecutor()
+		self.futures = [executor.submit(INSTANTPROJECT_FN_writeImageJob, job) for job in jobs]
+		self.total = len(images)
+		self.done = self.total - len(jobs)
+		self.timer = context.window_manager.event_timer_add(0.1, window=context.window)
+		context.window_manager.progress_begin(0, self.total)
+		context.window_manager.modal_handler_add(self)
+		return {'RUNNING_MODAL'}
+
+	def modal(self, context, event):
+		if not event.type == 'TIMER':
+			return {'PASS_THROUGH'}
+		for future in [future for future in self.futures if future.done()]:
+			self.futures.remove(future)
+			job = future.result()
+			error = INSTANTPROJECT_FN_finishImageJob(job)
+			if error:
+				self.errors[job['name']] = error
+			self.done += 1
+		context.window_manager.progress_update(self.done)
+		if context.workspace is not None:
+			context.workspace.status_text_set(f'InstantProject: saved {self.done}/{self.total} Images')
+		if self.futures:
+			return {'PASS_THROUGH'}
+
+		context.window_manager.event_timer_remove(self.timer)
+		context.window_manager.progress_end()
+		if context.workspace is not None:
+			context.workspace.status_text_set(None)
+		self.report_errors(self.errors)
+		if not self.errors:
+			self.report({'INFO'}, f'{self.total} Image(s) saved successfully.')
 		return {'FINISHED'}
 
 class INSTANTPROJECT_OT_clearUnused(bpy.types.Operator):
-	# Purges unused Data Blocks.
+	# Removes unused datablocks created by InstantProject and merges duplicate Decal Textures, leaving user data alone.
 	bl_idname = 'instantproject.clear_unused'
 	bl_label = 'Clear Unused'
-	bl_description = 'Removes unlinked data from the Blend File. WARNING: This process cannot be undone'
-	bl_options = {'REGISTER'}
+	bl_description = 'Removes unused Images, Materials and Textures created by InstantProject and merges duplicate Textures'
+	bl_options = {'REGISTER', 'UNDO'}
 
 	def execute(self, context):
-		bpy.ops.outliner.orphans_purge('INVOKE_DEFAULT' if True else 'EXEC_DEFAULT', num_deleted=0, do_local_ids=True, do_linked_ids=False, do_recursive=True)
+		merged = INSTANTPROJECT_FN_dedupeTextures()
+		removed, freed = INSTANTPROJECT_FN_collectGarbage()
+		INSTANTPROJECT_CACHE_memoryReport.update(INSTANTPROJECT_FN_buildMemoryReport())
+		self.report({'INFO'}, f'Removed {removed} unused datablock(s), merged {merged} Texture(s), freed {freed / (1024 * 1024):.1f} MB.')
 		return {'FINISHED'}
 
 #--------------------------------------------------------------
@@ -588,10 +3939,56 @@ class INSTANTPROJECT_PT_panelCameraProjection(bpy.types.Panel):
 		row = layout.row()
 		row.operator(INSTANTPROJECT_OT_setBackgroundImage.bl_idname, text='', icon='FILE_FOLDER')
 		row.prop(context.scene, "INSTANTPROJECT_VAR_cameraBackgroundImage", text='')
+		row.operator(INSTANTPROJECT_OT_reloadBackgroundImage.bl_idname, text='', icon='FILE_REFRESH')
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_watchBackgroundImage', text='', icon='VIEWZOOM')
+		row = layout.row()
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_useViewportProxy', text='Viewport Proxy')
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_viewportProxySize', text='')
 		row = layout.row()
 		row.operator(INSTANTPROJECT_OT_matchBackgroundImageResolution.bl_idname, text='Match Scene', icon='RESTRICT_VIEW_OFF')		
 		button_project_image = row.operator(INSTANTPROJECT_OT_projectImage.bl_idname, text='Project To Mesh', icon_value=727)			
 		button_project_image.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution
+		button_project_image.engine = context.scene.INSTANTPROJECT_VAR_projectEngine
+		button_project_image.use_occlusion = context.scene.INSTANTPROJECT_VAR_useOcclusion
+		button_project_image.memory_budget = context.scene.INSTANTPROJECT_VAR_memoryBudget
+		button_project_image.auto_resolution = context.scene.INSTANTPROJECT_VAR_autoResolution
+		button_project_image.memory_cap = context.scene.INSTANTPROJECT_VAR_textureMemoryCap
+		button_project_image.precision = context.scene.INSTANTPROJECT_VAR_storagePrecision
+		button_project_image.use_cache = context.scene.INSTANTPROJECT_VAR_useProjectionCache
+		row.operator(INSTANTPROJECT_OT_reprojectImage.bl_idname, text='', icon='FILE_REFRESH')
+		row = layout.row()
+		button_project_batch = row.operator(INSTANTPROJECT_OT_projectImageBatch.bl_idname, text='Project To Selected', icon='SELECT_EXTEND')
+		button_project_batch.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution
+		button_project_batch.shared_image = context.scene.INSTANTPROJECT_VAR_projectSharedImage
+		button_project_batch.use_occlusion = context.scene.INSTANTPROJECT_VAR_useOcclusion
+		button_project_batch.auto_resolution = context.scene.INSTANTPROJECT_VAR_autoResolution
+		button_project_batch.memory_cap = context.scene.INSTANTPROJECT_VAR_textureMemoryCap
+		button_project_batch.precision = context.scene.INSTANTPROJECT_VAR_storagePrecision
+		# Batch Projections run without Texture Paint Mode, so the Texture Paint engine falls back to NumPy
+		button_project_batch.engine = 'TILED' if context.scene.INSTANTPROJECT_VAR_projectEngine == 'TILED' else 'NUMPY'
+		button_project_batch.memory_budget = context.scene.INSTANTPROJECT_VAR_memoryBudget
+		button_project_batch.use_cache = context.scene.INSTANTPROJECT_VAR_useProjectionCache
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_projectSharedImage', text='Shared Image')
+		row = layout.row()
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_useOcclusion', text='Occlusion')
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_occluderCollection', text='')
+		row = layout.row()
+		button_project_multi_camera = row.operator(INSTANTPROJECT_OT_projectImageMultiCamera.bl_idname, text='Blend Cameras', icon='OUTLINER_OB_CAMERA')
+		button_project_multi_camera.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution
+		button_project_multi_camera.auto_resolution = context.scene.INSTANTPROJECT_VAR_autoResolution
+		button_project_multi_camera.memory_cap = context.scene.INSTANTPROJECT_VAR_textureMemoryCap
+		button_project_multi_camera.precision = context.scene.INSTANTPROJECT_VAR_storagePrecision
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_projectionCameras', text='')
+		row = layout.row()
+		button_project_sequence = row.operator(INSTANTPROJECT_OT_projectSequence.bl_idname, text='Project Sequence', icon='SEQUENCE')
+		button_project_sequence.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution
+		button_project_sequence.use_occlusion = context.scene.INSTANTPROJECT_VAR_useOcclusion
+		button_project_sequence.output_directory = context.scene.INSTANTPROJECT_VAR_sequenceOutput
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_sequenceOutput', text='')
+		row = layout.row()
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_projectEngine', text='Engine')
+		if context.scene.INSTANTPROJECT_VAR_projectEngine == 'TILED':
+			row.prop(context.scene, 'INSTANTPROJECT_VAR_memoryBudget', text='Budget (MB)')
 
 class INSTANTPROJECT_PT_panelDecalLayers(bpy.types.Panel):
 	bl_label = 'Decal'
@@ -612,24 +4009,40 @@ class INSTANTPROJECT_PT_panelDecalLayers(bpy.types.Panel):
 		button_load_decal_layer = row.operator(INSTANTPROJECT_OT_addDecalLayer.bl_idname, text='', icon='FILE_FOLDER')
 		button_load_decal_layer.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution				
 		row.prop(context.scene, "INSTANTPROJECT_VAR_activeImage", text='')
-		try:
-			nodes = active_object.data.materials[0].node_tree.nodes
-		except:
-			return
-		if nodes.get('instantproject_decal_mix') is not None:
-			button_hide_decal_layer = row.operator(INSTANTPROJECT_OT_toggleDecalVisibility.bl_idname, text='', icon='HIDE_ON' if nodes.get('instantproject_decal_mix').mute else 'HIDE_OFF')
+		button_new_decal_layer = row.operator(INSTANTPROJECT_OT_newDecalLayer.bl_idname, text='', icon='ADD')
+		button_new_decal_layer.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution
+		button_new_decal_layer.precision = context.scene.INSTANTPROJECT_VAR_storagePrecision
 		button_remove_decal_layer = row.operator(INSTANTPROJECT_OT_removeDecalLayer.bl_idname, text='', icon_value=21)		
-		if nodes.get('instantproject_decal_mix') is None:
+		button_stamp_decals = row.operator(INSTANTPROJECT_OT_stampDecals.bl_idname, text='', icon='BRUSH_DATA')
+		button_stamp_decals.project_resolution = context.scene.INSTANTPROJECT_VAR_projectResolution
+		button_stamp_decals.precision = context.scene.INSTANTPROJECT_VAR_storagePrecision
+		layers = INSTANTPROJECT_FN_getObjectDecalLayers(active_object)
+		if not layers:
 			return 
+
+		# Decal Stack, top Layer first
+		active_index = max(min(active_object.INSTANTPROJECT_VAR_activeDecalLayer, len(layers) - 1), 0)
+		column = layout.column(align=True)
+		for index in reversed(range(len(layers))):
+			layer = layers[index]
+			row = column.row(align=True)
+			image = layer['image_node'].image if layer['image_node'] is not None else None
+			button_select_decal_layer = row.operator(INSTANTPROJECT_OT_selectDecalLayer.bl_idname, text=image.name if image is not None else f'Layer {index + 1}', icon='RADIOBUT_ON' if index == active_index else 'RADIOBUT_OFF', depress=index == active_index)
+			button_select_decal_layer.index = index
+			button_hide_decal_layer = row.operator(INSTANTPROJECT_OT_toggleDecalVisibility.bl_idname, text='', icon='HIDE_ON' if layer['node'].mute else 'HIDE_OFF')
+			button_hide_decal_layer.index = index
+		decal_sockets = layers[active_index]
 		box = layout.box()
 		box.enabled = True 
 		box.alert = False
 		box.scale_x = 1.0
 		box.scale_y = 1.0				
 		box.prop(context.object, "INSTANTPROJECT_VAR_decalOpacity", text='Opacity')
-		box.prop(nodes.get('instantproject_decal_HSV').inputs[0], 'default_value', text='Hue', emboss=True, slider=True)
-		box.prop(nodes.get('instantproject_decal_HSV').inputs[1], 'default_value', text='Saturation', emboss=True, slider=True)
-		box.prop(nodes.get('instantproject_decal_HSV').inputs[2], 'default_value', text='Value', emboss=True, slider=True)
+		box.prop(decal_sockets['hue'], 'default_value', text='Hue', emboss=True, slider=True)
+		box.prop(decal_sockets['saturation'], 'default_value', text='Saturation', emboss=True, slider=True)
+		box.prop(decal_sockets['value'], 'default_value', text='Value', emboss=True, slider=True)
+		row = layout.row()
+		row.operator(INSTANTPROJECT_OT_flattenDecalLayers.bl_idname, text='Flatten Decals', icon='IMAGE_DATA')
 
 
 		#box.prop(layer_nodes[r"opacity"].inputs[0], 'default_value', text=r"Opacity", emboss=True, slider=True)
@@ -650,11 +4063,83 @@ class INSTANTPROJECT_PT_panelFileManagement(bpy.types.Panel):
 	def draw(self, context):
 		layout = self.layout
 		row = layout.row()
-		row.operator(INSTANTPROJECT_OT_saveAllImages.bl_idname, text='Save All', icon_value=727)
+		button_save_all = row.operator(INSTANTPROJECT_OT_saveAllImages.bl_idname, text='Save All', icon_value=727)
+		button_save_all.generated_only = context.scene.INSTANTPROJECT_VAR_saveGeneratedOnly
 		row.operator(INSTANTPROJECT_OT_clearUnused.bl_idname, text='Clear Unused', icon_value=21)
 		row = layout.row()
-		row.prop(context.scene, 'INSTANTPROJECT_VAR_projectResolution', text='Scale Factor')
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_saveGeneratedOnly', text='Only Save InstantProject Images')
+		row = layout.row(align=True)
+		row.operator(INSTANTPROJECT_OT_undoPixels.bl_idname, text='', icon='LOOP_BACK')
+		row.operator(INSTANTPROJECT_OT_redoPixels.bl_idname, text='', icon='LOOP_FORWARDS')
+		row.label(text=f"Pixel History: {len(INSTANTPROJECT_CACHE_history['undo'])} steps, {INSTANTPROJECT_CACHE_history['bytes'] / (1024 * 1024):.1f} MB")
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_historyLimit', text='Cap (MB)')
+		row.operator(INSTANTPROJECT_OT_clearHistory.bl_idname, text='', icon='TRASH')
+		row = layout.row(align=True)
+		row.operator(INSTANTPROJECT_OT_memoryReport.bl_idname, text='Memory Report', icon='INFO')
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_resourceBudget', text='Budget (MB)')
+		row = layout.row(align=True)
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_useProjectionCache', text='Projection Cache')
+		sub = row.row(align=True)
+		sub.enabled = context.scene.INSTANTPROJECT_VAR_useProjectionCache
+		sub.prop(context.scene, 'INSTANTPROJECT_VAR_projectionCacheSize', text='Size (MB)')
+		sub.operator(INSTANTPROJECT_OT_clearProjectionCache.bl_idname, text='', icon='TRASH')
+		row = layout.row()
+		row.enabled = context.scene.INSTANTPROJECT_VAR_useProjectionCache
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_projectionCacheDirectory', text='')
+		if INSTANTPROJECT_CACHE_memoryReport['objects']:
+			box = layout.box()
+			box.label(text=f"InstantProject Images: {INSTANTPROJECT_CACHE_memoryReport['tracked'] / (1024 * 1024):.1f} MB, {INSTANTPROJECT_CACHE_memoryReport['stale']} unused")
+			for name, size in INSTANTPROJECT_CACHE_memoryReport['objects'][:5]:
+				box.label(text=f'{name}: {size / (1024 * 1024):.1f} MB')
+		row = layout.row()
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_autoResolution', text='Auto')
+		sub = row.row()
+		sub.enabled = not context.scene.INSTANTPROJECT_VAR_autoResolution
+		sub.prop(context.scene, 'INSTANTPROJECT_VAR_projectResolution', text='Scale Factor')
+		row = layout.row()
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_storagePrecision', text='Storage')
+		if context.scene.INSTANTPROJECT_VAR_autoResolution:
+			row = layout.row()
+			row.prop(context.scene, 'INSTANTPROJECT_VAR_textureMemoryCap', text='Memory Cap (MB)')
+			if INSTANTPROJECT_CACHE_projectionMemory['bytes'] is not None:
+				row.label(text=f"In use: {INSTANTPROJECT_CACHE_projectionMemory['bytes'] / (1024 * 1024):.0f} MB")
+		row = layout.row()
+		row.label(text=f"UV Cache: {INSTANTPROJECT_CACHE_unwrapStats['hits']} hits / {INSTANTPROJECT_CACHE_unwrapStats['misses']} misses")
+		row.operator(INSTANTPROJECT_OT_invalidateUVCache.bl_idname, text='', icon='TRASH')
+
+
+class INSTANTPROJECT_PT_panelProfiling(bpy.types.Panel):
+	bl_label = 'Profiling'
+	bl_idname = 'INSTANTPROJECT_PT_panelProfiling'
+	bl_space_type = 'VIEW_3D'
+	bl_region_type = 'UI'
+	bl_category = 'InstantProject'
+	bl_parent_id = 'INSTANTPROJECT_PT_panelMain'
+	bl_options = {'DEFAULT_CLOSED'}
 
+	def draw(self, context):
+		layout = self.layout
+		row = layout.row()
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_profileEnabled', text='Record Stages')
+		row.prop(context.scene, 'INSTANTPROJECT_VAR_profileCProfile', text='cProfile')
+		history = INSTANTPROJECT_CACHE_profiling['history']
+		if not history:
+			return
+
+		# Last run's breakdown
+		run = history[-1]
+		box = layout.box()
+		box.label(text=f"{run['name']}: {run['seconds']:.3f}s" + (f" ({run['memory_delta_mb']:+.0f} MB)" if run['memory_delta_mb'] is not None else ''))
+		column = box.column(align=True)
+		for stage in run['stages']:
+			share = stage['seconds'] / run['seconds'] if run['seconds'] > 0.0 else 0.0
+			row = column.row()
+			row.label(text='    ' * stage['depth'] + stage['name'])
+			row.label(text=f"{stage['seconds']:.3f}s  {share:.0%}" + (f"  {stage['memory_delta_mb']:+.0f} MB" if stage['memory_delta_mb'] is not None else ''))
+		row = layout.row()
+		row.label(text=f'{len(history)} runs recorded')
+		row.operator(INSTANTPROJECT_OT_exportProfile.bl_idname, text='', icon='EXPORT')
+		row.operator(INSTANTPROJECT_OT_clearProfile.bl_idname, text='', icon='TRASH')
 
 #--------------------------------------------------------------
 # Register 
@@ -662,10 +4147,10 @@ class INSTANTPROJECT_PT_panelFileManagement(bpy.types.Panel):
 
 classes = ()
 
-classes_interface = (INSTANTPROJECT_PT_panelMain, INSTANTPROJECT_PT_panelCameraProjection, INSTANTPROJECT_PT_panelDecalLayers, INSTANTPROJECT_PT_panelFileManagement)
-classes_functionality = (INSTANTPROJECT_OT_saveAllImages, INSTANTPROJECT_OT_clearUnused)
-classes_projection = (INSTANTPROJECT_OT_setBackgroundImage, INSTANTPROJECT_OT_matchBackgroundImageResolution, INSTANTPROJECT_OT_projectImage, )
-classes_decal = (INSTANTPROJECT_OT_addDecalLayer, INSTANTPROJECT_OT_toggleDecalVisibility, INSTANTPROJECT_OT_removeDecalLayer)
+classes_interface = (INSTANTPROJECT_PT_panelMain, INSTANTPROJECT_PT_panelCameraProjection, INSTANTPROJECT_PT_panelDecalLayers, INSTANTPROJECT_PT_panelFileManagement, INSTANTPROJECT_PT_panelProfiling)
+classes_functionality = (INSTANTPROJECT_OT_saveAllImages, INSTANTPROJECT_OT_clearUnused, INSTANTPROJECT_OT_exportProfile, INSTANTPROJECT_OT_clearProfile, INSTANTPROJECT_OT_undoPixels, INSTANTPROJECT_OT_redoPixels, INSTANTPROJECT_OT_clearHistory, INSTANTPROJECT_OT_memoryReport, INSTANTPROJECT_OT_clearProjectionCache)
+classes_projection = (INSTANTPROJECT_OT_setBackgroundImage, INSTANTPROJECT_OT_matchBackgroundImageResolution, INSTANTPROJECT_OT_projectImage, INSTANTPROJECT_OT_projectImageBatch, INSTANTPROJECT_OT_projectImageMultiCamera, INSTANTPROJECT_OT_reprojectImage, INSTANTPROJECT_OT_reloadBackgroundImage, INSTANTPROJECT_OT_projectSequence, INSTANTPROJECT_OT_invalidateUVCache)
+classes_decal = (INSTANTPROJECT_OT_addDecalLayer, INSTANTPROJECT_OT_stampDecals, INSTANTPROJECT_OT_newDecalLayer, INSTANTPROJECT_OT_selectDecalLayer, INSTANTPROJECT_OT_toggleDecalVisibility, INSTANTPROJECT_OT_flattenDecalLayers, INSTANTPROJECT_OT_removeDecalLayer)
 
 def register():
 
@@ -682,12 +4167,62 @@ def register():
 	# Variables
 	bpy.types.Scene.INSTANTPROJECT_VAR_cameraBackgroundImage = bpy.props.PointerProperty(name='', type=bpy.types.Image, update=INSTANTPROJECT_FN_updateCameraBackgroundImage, description='Select a Camera Background Image for Projection')
 	bpy.types.Scene.INSTANTPROJECT_VAR_projectResolution = bpy.props.FloatProperty(name='INSTANTPROJECT_VAR_projectResolution', default=0.25, soft_min=0.1, soft_max=1.0, description='Resolution scaling factor for projected texture')
+	bpy.types.Scene.INSTANTPROJECT_VAR_autoResolution = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_autoResolution', default=False, description='Size Projection Images to the smallest power of two that keeps the on-screen detail of the source, instead of using the Scale Factor')
+	bpy.types.Scene.INSTANTPROJECT_VAR_textureMemoryCap = bpy.props.IntProperty(name='INSTANTPROJECT_VAR_textureMemoryCap', default=2048, min=1, description='Total memory in MB all Projection Images may use with Auto Resolution')
+	bpy.types.Scene.INSTANTPROJECT_VAR_storagePrecision = bpy.props.EnumProperty(name='INSTANTPROJECT_VAR_storagePrecision', items=INSTANTPROJECT_ENUM_storagePrecisions, default='AUTO', description='Precision new Projection Images and Decal Layers are stored at')
+	bpy.types.Scene.INSTANTPROJECT_VAR_projectEngine = bpy.props.EnumProperty(name='INSTANTPROJECT_VAR_projectEngine', items=INSTANTPROJECT_ENUM_projectEngines, default='NUMPY', description='Engine used to project the Background Image onto the Mesh')
+	bpy.types.Scene.INSTANTPROJECT_VAR_projectSharedImage = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_projectSharedImage', default=True, description='Project all selected Meshes into one shared Image instead of one Image per Mesh')
+	bpy.types.Scene.INSTANTPROJECT_VAR_useOcclusion = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_useOcclusion', default=False, description='Skip back faces and surfaces hidden from the Camera when projecting with the NumPy engine')
+	bpy.types.Scene.INSTANTPROJECT_VAR_occluderCollection = bpy.props.PointerProperty(name='', type=bpy.types.Collection, description='Additional Objects that can hide the Target from the Camera')
+	bpy.types.Scene.INSTANTPROJECT_VAR_projectionCameras = bpy.props.PointerProperty(name='', type=bpy.types.Collection, description='Cameras whose Background Images are blended by Blend Cameras')
+	bpy.types.Scene.INSTANTPROJECT_VAR_memoryBudget = bpy.props.IntProperty(name='INSTANTPROJECT_VAR_memoryBudget', default=4096, min=64, description='Memory in MB the Tiled projection engine sizes its row bands by; Images that do not fit are read and written row by row')
+	bpy.types.Scene.INSTANTPROJECT_VAR_historyLimit = bpy.props.IntProperty(name='INSTANTPROJECT_VAR_historyLimit', default=256, min=0, description='Memory in MB the InstantProject Pixel History may use; the oldest Steps are dropped first')
+	bpy.types.Scene.INSTANTPROJECT_VAR_resourceBudget = bpy.props.IntProperty(name='INSTANTPROJECT_VAR_resourceBudget', default=4096, min=1, description='Memory in MB InstantProject Images may use before unused ones are removed, oldest first. Only unused InstantProject data is ever removed')
+	bpy.types.Scene.INSTANTPROJECT_VAR_useProjectionCache = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_useProjectionCache', default=True, description='Load unchanged Projections from disk instead of recomputing them')
+	bpy.types.Scene.INSTANTPROJECT_VAR_projectionCacheDirectory = bpy.props.StringProperty(name='INSTANTPROJECT_VAR_projectionCacheDirectory', default='', subtype='DIR_PATH', description='Directory of the Projection Disk Cache; empty uses the system temporary directory')
+	bpy.types.Scene.INSTANTPROJECT_VAR_projectionCacheSize = bpy.props.IntProperty(name='INSTANTPROJECT_VAR_projectionCacheSize', default=2048, min=1, description='Disk space in MB the Projection Disk Cache may use; the least recently used entries are removed first')
+	bpy.types.Scene.INSTANTPROJECT_VAR_saveGeneratedOnly = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_saveGeneratedOnly', default=True, description='Only save Images created by InstantProject, leaving other modified Images untouched')
+	bpy.types.Scene.INSTANTPROJECT_VAR_sequenceOutput = bpy.props.StringProperty(name='INSTANTPROJECT_VAR_sequenceOutput', default='//projection/', subtype='DIR_PATH', description='Directory Project Sequence writes its PNG Sequence to')
+	bpy.types.Scene.INSTANTPROJECT_VAR_useViewportProxy = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_useViewportProxy', default=True, description='Display large Background Images through a downscaled Proxy, cached next to the source file', update=INSTANTPROJECT_FN_updateCameraBackgroundImage)
+	bpy.types.Scene.INSTANTPROJECT_VAR_viewportProxySize = bpy.props.EnumProperty(name='INSTANTPROJECT_VAR_viewportProxySize', items=INSTANTPROJECT_ENUM_proxySizes, default='2048', description='Longest side of the Viewport Proxy in pixels', update=INSTANTPROJECT_FN_updateCameraBackgroundImage)
+	bpy.types.Scene.INSTANTPROJECT_VAR_watchBackgroundImage = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_watchBackgroundImage', default=False, description='Reload the Background Image and update its Projections whenever its file changes on disk', update=INSTANTPROJECT_FN_updateWatchBackgroundImage)
+	bpy.types.Scene.INSTANTPROJECT_VAR_profileEnabled = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_profileEnabled', default=False, description='Record the time and memory taken by each stage of InstantProject Operators')
+	bpy.types.Scene.INSTANTPROJECT_VAR_profileCProfile = bpy.props.BoolProperty(name='INSTANTPROJECT_VAR_profileCProfile', default=False, description='Also capture a cProfile report of each recorded run, included by Export Profile')
+	bpy.types.Scene.INSTANTPROJECT_VAR_activeDecal = bpy.props.StringProperty(name='INSTANTPROJECT_VAR_activeDecal', default='', description='Atlas Slot of the Decal used when a Decal Atlas is the active Image')
 	bpy.types.Scene.INSTANTPROJECT_VAR_activeImage = bpy.props.PointerProperty(name='', type=bpy.types.Image, update=INSTANTPROJECT_FN_updateDecalImage, description='Select a Decal Image')
+	bpy.types.Object.INSTANTPROJECT_VAR_activeDecalLayer = bpy.props.IntProperty(name='INSTANTPROJECT_VAR_activeDecalLayer', default=0, min=0, description='Index of the active Decal Layer', update=INSTANTPROJECT_FN_updateActiveDecalLayer)
 	bpy.types.Object.INSTANTPROJECT_VAR_decalOpacity = bpy.props.FloatProperty(name='INSTANTPROJECT_VAR_decalOpacity', default=1.0, soft_min=0.0, soft_max=1.0, description='Decal opacity', update=INSTANTPROJECT_FN_updateDecalOpacity)
+
+	# Handlers
+	bpy.app.handlers.depsgraph_update_post.append(INSTANTPROJECT_FN_onDepsgraphUpdate)
+	for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+		handlers.append(INSTANTPROJECT_FN_onDataReplaced)
+	bpy.app.handlers.load_post.append(INSTANTPROJECT_FN_onFileLoaded)
+	bpy.app.handlers.load_post.append(INSTANTPROJECT_FN_resumeWatchBackgroundImage)
+	bpy.app.handlers.undo_post.append(INSTANTPROJECT_FN_onGlobalUndo)
+	bpy.app.handlers.redo_post.append(INSTANTPROJECT_FN_onGlobalRedo)
 			
 def unregister():
 
 	# Unregister
+	INSTANTPROJECT_FN_shutdownSaveExecutor()
+	if bpy.app.timers.is_registered(INSTANTPROJECT_FN_watchBackgroundImage):
+		bpy.app.timers.unregister(INSTANTPROJECT_FN_watchBackgroundImage)
+	if INSTANTPROJECT_FN_onDepsgraphUpdate in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(INSTANTPROJECT_FN_onDepsgraphUpdate)
+	for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+		if INSTANTPROJECT_FN_onDataReplaced in handlers:
+			handlers.remove(INSTANTPROJECT_FN_onDataReplaced)
+	if INSTANTPROJECT_FN_onFileLoaded in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(INSTANTPROJECT_FN_onFileLoaded)
+	if INSTANTPROJECT_FN_resumeWatchBackgroundImage in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(INSTANTPROJECT_FN_resumeWatchBackgroundImage)
+	if INSTANTPROJECT_FN_onGlobalUndo in bpy.app.handlers.undo_post:
+		bpy.app.handlers.undo_post.remove(INSTANTPROJECT_FN_onGlobalUndo)
+	if INSTANTPROJECT_FN_onGlobalRedo in bpy.app.handlers.redo_post:
+		bpy.app.handlers.redo_post.remove(INSTANTPROJECT_FN_onGlobalRedo)
+	INSTANTPROJECT_FN_invalidateDecalLayers()
+	INSTANTPROJECT_FN_clearHistory()
 	for c in reversed(classes_interface):
 		bpy.utils.unregister_class(c)
 	for c in reversed(classes_functionality):
@@ -700,9 +4235,32 @@ def unregister():
 	# Variables
 
 	del bpy.types.Scene.INSTANTPROJECT_VAR_projectResolution
+	del bpy.types.Scene.INSTANTPROJECT_VAR_autoResolution
+	del bpy.types.Scene.INSTANTPROJECT_VAR_textureMemoryCap
+	del bpy.types.Scene.INSTANTPROJECT_VAR_storagePrecision
+	del bpy.types.Scene.INSTANTPROJECT_VAR_projectEngine
+	del bpy.types.Scene.INSTANTPROJECT_VAR_projectSharedImage
+	del bpy.types.Scene.INSTANTPROJECT_VAR_useOcclusion
+	del bpy.types.Scene.INSTANTPROJECT_VAR_occluderCollection
+	del bpy.types.Scene.INSTANTPROJECT_VAR_projectionCameras
+	del bpy.types.Scene.INSTANTPROJECT_VAR_memoryBudget
+	del bpy.types.Scene.INSTANTPROJECT_VAR_saveGeneratedOnly
+	del bpy.types.Scene.INSTANTPROJECT_VAR_historyLimit
+	del bpy.types.Scene.INSTANTPROJECT_VAR_resourceBudget
+	del bpy.types.Scene.INSTANTPROJECT_VAR_useProjectionCache
+	del bpy.types.Scene.INSTANTPROJECT_VAR_projectionCacheDirectory
+	del bpy.types.Scene.INSTANTPROJECT_VAR_projectionCacheSize
 	del bpy.types.Scene.INSTANTPROJECT_VAR_activeImage
+	del bpy.types.Scene.INSTANTPROJECT_VAR_activeDecal
+	del bpy.types.Scene.INSTANTPROJECT_VAR_profileEnabled
+	del bpy.types.Scene.INSTANTPROJECT_VAR_watchBackgroundImage
+	del bpy.types.Scene.INSTANTPROJECT_VAR_useViewportProxy
+	del bpy.types.Scene.INSTANTPROJECT_VAR_viewportProxySize
+	del bpy.types.Scene.INSTANTPROJECT_VAR_sequenceOutput
+	del bpy.types.Scene.INSTANTPROJECT_VAR_profileCProfile
 	del bpy.types.Scene.INSTANTPROJECT_VAR_cameraBackgroundImage
 	del bpy.types.Object.INSTANTPROJECT_VAR_decalOpacity
+	del bpy.types.Object.INSTANTPROJECT_VAR_activeDecalLayer
 
 if __name__ == '__main__':
 	register()
\ No newline at end of file
@@ -0,0 +1,310 @@
+#--------------------------------------------------------------
+# InstantProject Benchmark
+#
+# Times the Projection, Decal and Save paths on synthetic scenes inside a background Blender:
+#   blender -b --factory-startup -P InstantProject_benchmark.py -- --output results.json [--baseline baseline.json]
+#
+# Every Case is a grid Mesh with mesh_faces faces, a generated Background Image of image_size pixels and a
+# project_resolution. Results are written as JSON; with --baseline, every timing is compared against the stored
+# results and the run fails (exit code 1) when one is slower by more than --threshold.
+#
+# Each Case runs in its own background Blender, so its peak_rss_mb is its own; --in-process runs every Case in this
+# Blender instead, where only rss_delta_mb (the largest change of resident memory over one run) is reported.
+#
+# Two result files can also be compared without Blender:
+#   python InstantProject_benchmark.py --compare baseline.json results.json
+#
+# Texture Paint stencils need a window, so the 'decal_stencil' timing is reported as skipped in background mode.
+#--------------------------------------------------------------
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import subprocess
+import traceback
+
+try:
+	import bpy
+except ImportError:
+	bpy = None
+
+if bpy is not None:
+	sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+	import InstantProject
+
+INSTANTPROJECT_BENCH_meshFaces = (1000, 10000, 100000, 1000000)
+INSTANTPROJECT_BENCH_imageSizes = (1024, 4096, 16384)
+INSTANTPROJECT_BENCH_projectResolutions = (0.25, 0.5, 1.0)
+INSTANTPROJECT_BENCH_quick = {'mesh_faces': (1000, 10000), 'image_sizes': (1024,), 'project_resolutions': (0.25,)}
+INSTANTPROJECT_BENCH_prefix = 'INSTANTPROJECT_BENCH '
+
+#--------------------------------------------------------------
+# Functions
+#--------------------------------------------------------------
+
+def INSTANTPROJECT_BENCH_parseArguments():
+	argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else ([] if bpy is not None else sys.argv[1:])
+	parser = argparse.ArgumentParser(prog='InstantProject_benchmark.py', description='Benchmarks InstantProject in a background Blender.')
+	parser.add_argument('--output', default='instantproject_benchmark.json', help='Path of the JSON results')
+	parser.add_argument('--baseline', default=None, help='JSON results to compare against')
+	parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown against the baseline, as a fraction (default 0.25)')
+	parser.add_argument('--min-seconds', type=float, default=0.05, help='Slowdowns smaller than this many seconds are ignored as noise')
+	parser.add_argument('--mesh-faces', type=int, nargs='+', default=None, help='Face counts of the synthetic Meshes')
+	parser.add_argument('--image-sizes', type=int, nargs='+', default=None, help='Sizes of the square Background Images')
+	parser.add_argument('--project-resolutions', type=float, nargs='+', default=None, help='project_resolution values')
+	parser.add_argument('--engines', nargs='+', default=['NUMPY'], help='Projection engines (NUMPY, TILED)')
+	parser.add_argument('--stamps', type=int, default=200, help='Number of Decals stamped per Case')
+	parser.add_argument('--repeat', type=int, default=1, help='Runs per Case; the fastest timing is kept')
+	parser.add_argument('--quick', action='store_true', help='Run a small set of Cases')
+	parser.add_argument('--in-process', action='store_true', help='Run every Case in this Blender instead of one Blender per Case')
+	parser.add_argument('--case', default=None, help=argparse.SUPPRESS) # JSON Case run by a child Blender
+	parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'RESULTS'), default=None, help='Compare two result files and exit')
+	return parser.parse_args(argv)
+
+def INSTANTPROJECT_BENCH_peakRSS():
+	# Peak resident memory of this process in MB, or None where it cannot be read.
+	try:
+		import resource
+	except ImportError:
+		try:
+			import psutil
+			return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+		except (ImportError, AttributeError):
+			return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def INSTANTPROJECT_BENCH_currentRSS():
+	# Current resident memory of this process in MB (Linux only), or None.
+	try:
+		with open('/proc/self/statm') as file:
+			return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+	except (OSError, ValueError, AttributeError):
+		return None
+
+def INSTANTPROJECT_BENCH_clearScene():
+	# Removes every Object and the data InstantProject created, and drops the Add-on's caches so each Case starts cold.
+	for obj in list(bpy.data.objects):
+		bpy.data.objects.remove(obj)
+	for collection in (bpy.data.meshes, bpy.data.cameras, bpy.data.materials, bpy.data.images, bpy.data.textures):
+		for block in list(collection):
+			if block.users == 0 or block.get('instantproject_generated'):
+				collection.remove(block)
+	InstantProject.INSTANTPROJECT_CACHE_lookupMaps.clear()
+	InstantProject.INSTANTPROJECT_CACHE_occlusionTrees.clear()
+	InstantProject.INSTANTPROJECT_CACHE_bufferPool.clear()
+	InstantProject.INSTANTPROJECT_FN_invalidateDecalLayers()
+
+def INSTANTPROJECT_BENCH_buildScene(context, mesh_faces, image_size):
+	# Creates a grid Mesh of about mesh_faces faces, a Camera looking down at it and a generated Background Image.
+	subdivisions = max(int(round(math.sqrt(mesh_faces))), 1) + 1
+	bpy.ops.mesh.primitive_grid_add(x_subdivisions=subdivisions, y_subdivisions=subdivisions, size=2.0)
+	obj = context.active_object
+
+	camera_data = bpy.data.cameras.new('instantproject_benchmark_camera')
+	camera = bpy.data.objects.new('instantproject_benchmark_camera', camera_data)
+	context.scene.collection.objects.link(camera)
+	camera.location = (0.0, 0.0, 3.0)
+	context.scene.camera = camera
+
+	image = bpy.data.images.new('instantproject_benchmark_source', image_size, image_size, generated_type='COLOR_GRID')
+	image['instantproject_generated'] = True
+	background_image = camera_data.background_images.new()
+	background_image.image = image
+	camera_data.show_background_images = True
+	context.scene.render.resolution_x = image_size
+	context.scene.render.resolution_y = image_size
+
+	for selected in context.selected_objects:
+		selected.select_set(False)
+	obj.select_set(True)
+	context.view_layer.objects.active = obj
+	return obj, camera, image
+
+def INSTANTPROJECT_BENCH_time(function, *args, **kwargs):
+	start_time = time.perf_counter()
+	function(*args, **kwargs)
+	return time.perf_counter() - start_time
+
+def INSTANTPROJECT_BENCH_runCase(context, case, stamps):
+	# Runs one Case and returns {timing name: seconds or None}, plus the errors of timings that failed.
+	timings = {}
+	errors = {}
+	obj, camera, image = INSTANTPROJECT_BENCH_buildScene(context, case['mesh_faces'], case['image_size'])
+
+	def measure(name, function, *args, **kwargs):
+		try:
+			timings[name] = INSTANTPROJECT_BENCH_time(function, *args, **kwargs)
+		except Exception as error:
+			timings[name] = None
+			errors[name] = str(error)
+			traceback.print_exc()
+
+	# Projection: cold, then warm through the cached Lookup Map. Both include the Operators' own save of the Projection Image.
+	# The Projection Disk Cache outlives the Scene, so it is bypassed or repeats would time loading a cached result.
+	measure('project', bpy.ops.instantproject.project_image, project_resolution=case['project_resolution'], engine=case['engine'], use_cache=False)
+	measure('reproject', bpy.ops.instantproject.reproject_image)
+
+	# Decals: a new Layer, batch Stamps, and the Texture Paint stencil setup (needs a window)
+	width = int(case['image_size'] * case['project_resolution'])
+	measure('decal_layer', InstantProject.INSTANTPROJECT_FN_newDecalLayer, obj, width, width, obj.name)
+	layer_image = InstantProject.INSTANTPROJECT_FN_ensureDecalLayer(obj, width, width, obj.name)
+	generator = random.Random(0)
+	placements = [{'position': [generator.random(), generator.random()], 'size': generator.uniform(0.02, 0.1), 'rotation': generator.uniform(0.0, 360.0)} for i in range(stamps)]
+	if layer_image is not None:
+		measure('decal_stamp', InstantProject.INSTANTPROJECT_FN_stampDecals, layer_image, image, placements)
+	if bpy.app.background:
+		timings['decal_stencil'] = None
+		errors['decal_stencil'] = 'skipped: Texture Paint stencils need a window'
+	else:
+		measure('decal_stencil', InstantProject.INSTANTPROJECT_FN_createDecalLayer, INSTANTPROJECT_BENCH_Reporter(), context, image)
+		if context.mode == 'PAINT_TEXTURE':
+			bpy.ops.object.mode_set(mode='OBJECT')
+
+	# Saving: every Image the Case created, encoded and packed like Save All does for generated Images
+	images = [block for block in bpy.data.images if block.get('instantproject_generated') and not block.name == image.name]
+	measure('save', InstantProject.INSTANTPROJECT_FN_saveImages, images)
+	return timings, errors
+
+def INSTANTPROJECT_BENCH_runRepeats(context, case, stamps, repeat):
+	# Runs a Case repeat times and returns its result: the fastest timing of each name, the errors of every run,
+	# and the largest change of resident memory over one run.
+	best = {}
+	errors = {}
+	rss_deltas = []
+	for run in range(max(repeat, 1)):
+		INSTANTPROJECT_BENCH_clearScene()
+		rss_before = INSTANTPROJECT_BENCH_currentRSS()
+		timings, run_errors = INSTANTPROJECT_BENCH_runCase(context, case, stamps)
+		rss_after = INSTANTPROJECT_BENCH_currentRSS()
+		if rss_before is not None and rss_after is not None:
+			rss_deltas.append(rss_after - rss_before)
+		for name, seconds in timings.items():
+			if seconds is not None and (best.get(name) is None or seconds < best[name]):
+				best[name] = seconds
+			else:
+				best.setdefault(name, None)
+		for name, message in run_errors.items():
+			messages = errors.setdefault(name, [])
+			if message not in messages:
+				messages.append(message)
+	INSTANTPROJECT_BENCH_clearScene()
+	return dict(case, timings=best, errors={name: '; '.join(messages) for name, messages in errors.items()}, rss_delta_mb=max(rss_deltas) if rss_deltas else None)
+
+def INSTANTPROJECT_BENCH_runSubprocess(case, arguments):
+	# Runs one Case in a fresh background Blender, so the peak memory it reports is its own. Returns its result.
+	command = [bpy.app.binary_path, '-b', '--factory-startup', '-P', os.path.abspath(__file__), '--', '--case', json.dumps(case), '--stamps', str(arguments.stamps), '--repeat', str(arguments.repeat)]
+	process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+	sys.stderr.write(process.stderr)
+	for line in reversed(process.stdout.splitlines()):
+		if line.startswith(INSTANTPROJECT_BENCH_prefix):
+			return json.loads(line[len(INSTANTPROJECT_BENCH_prefix):])
+	sys.stdout.write(process.stdout)
+	return dict(case, timings={}, errors={'case': f'Blender exited with code {process.returncode} without a result'}, rss_delta_mb=None, peak_rss_mb=None)
+
+def INSTANTPROJECT_BENCH_registerAddon():
+	# The Add-on may already be enabled in this Blender, in which case its Classes are registered.
+	try:
+		InstantProject.register()
+	except ValueError:
+		pass
+
+class INSTANTPROJECT_BENCH_Reporter:
+	# Stands in for an Operator where InstantProject functions expect one to report to.
+	def report(self, level, message):
+		print(f'{sorted(level)[0]}: {message}')
+
+def INSTANTPROJECT_BENCH_run(arguments):
+	if arguments.in_process:
+		INSTANTPROJECT_BENCH_registerAddon()
+
+	quick = INSTANTPROJECT_BENCH_quick if arguments.quick else {}
+	mesh_faces = arguments.mesh_faces or quick.get('mesh_faces', INSTANTPROJECT_BENCH_meshFaces)
+	image_sizes = arguments.image_sizes or quick.get('image_sizes', INSTANTPROJECT_BENCH_imageSizes)
+	project_resolutions = arguments.project_resolutions or quick.get('project_resolutions', INSTANTPROJECT_BENCH_projectResolutions)
+
+	results = []
+	for faces in mesh_faces:
+		for image_size in image_sizes:
+			for project_resolution in project_resolutions:
+				for engine in arguments.engines:
+					case = {'mesh_faces': faces, 'image_size': image_size, 'project_resolution': project_resolution, 'engine': engine}
+					if arguments.in_process:
+						# The peak of this process covers every Case run so far, so it is left out
+						result = dict(INSTANTPROJECT_BENCH_runRepeats(bpy.context, case, arguments.stamps, arguments.repeat), peak_rss_mb=None)
+					else:
+						result = INSTANTPROJECT_BENCH_runSubprocess(case, arguments)
+					results.append(result)
+					print(INSTANTPROJECT_BENCH_prefix + json.dumps(result), flush=True)
+
+	return {
+		'blender': bpy.app.version_string,
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'processor': platform.processor(),
+		'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'cases': results,
+	}
+
+def INSTANTPROJECT_BENCH_caseKey(case):
+	return (case['mesh_faces'], case['image_size'], case['project_resolution'], case['engine'])
+
+def INSTANTPROJECT_BENCH_compare(baseline, results, threshold=0.25, min_seconds=0.05, stream=sys.stdout):
+	# Compares every timing of results against baseline. Returns the list of regressions, each a dictionary of
+	# the Case, timing name, baseline and new seconds. Cases or timings missing from either side are skipped.
+	baseline_cases = {INSTANTPROJECT_BENCH_caseKey(case): case for case in baseline['cases']}
+	regressions = []
+	stream.write(f"{'faces':>8} {'image':>6} {'res':>5} {'engine':>6} {'timing':>14} {'baseline':>9} {'new':>9} {'change':>8}\n")
+	for case in results['cases']:
+		base = baseline_cases.get(INSTANTPROJECT_BENCH_caseKey(case))
+		if base is None:
+			continue
+		for name, seconds in case['timings'].items():
+			base_seconds = base['timings'].get(name)
+			if seconds is None or base_seconds is None:
+				continue
+			change = (seconds - base_seconds) / base_seconds if base_seconds > 0.0 else 0.0
+			regressed = change > threshold and seconds - base_seconds > min_seconds
+			stream.write(f"{case['mesh_faces']:>8} {case['image_size']:>6} {case['project_resolution']:>5} {case['engine']:>6} {name:>14} {base_seconds:>9.3f} {seconds:>9.3f} {change:>+7.0%}{' REGRESSION' if regressed else ''}\n")
+			if regressed:
+				regressions.append({'case': INSTANTPROJECT_BENCH_caseKey(case), 'timing': name, 'baseline': base_seconds, 'seconds': seconds})
+	return regressions
+
+def INSTANTPROJECT_BENCH_main():
+	arguments = INSTANTPROJECT_BENCH_parseArguments()
+	if arguments.compare:
+		with open(arguments.compare[0]) as file:
+			baseline = json.load(file)
+		with open(arguments.compare[1]) as file:
+			results = json.load(file)
+		regressions = INSTANTPROJECT_BENCH_compare(baseline, results, arguments.threshold, arguments.min_seconds)
+		print(f'{len(regressions)} regression(s) above {arguments.threshold:.0%}.')
+		sys.exit(1 if regressions else 0)
+	if bpy is None:
+		sys.exit('Run inside Blender: blender -b --factory-startup -P InstantProject_benchmark.py -- [options]')
+	if arguments.case:
+		INSTANTPROJECT_BENCH_registerAddon()
+		result = INSTANTPROJECT_BENCH_runRepeats(bpy.context, json.loads(arguments.case), arguments.stamps, arguments.repeat)
+		print(INSTANTPROJECT_BENCH_prefix + json.dumps(dict(result, peak_rss_mb=INSTANTPROJECT_BENCH_peakRSS())), flush=True)
+		sys.exit(0)
+
+	results = INSTANTPROJECT_BENCH_run(arguments)
+	with open(arguments.output, 'w') as file:
+		json.dump(results, file, indent=2)
+	print(f"{len(results['cases'])} Cases written to {arguments.output}")
+
+	if arguments.baseline:
+		with open(arguments.baseline) as file:
+			baseline = json.load(file)
+		regressions = INSTANTPROJECT_BENCH_compare(baseline, results, arguments.threshold, arguments.min_seconds)
+		print(f'{len(regressions)} regression(s) above {arguments.threshold:.0%}.')
+		sys.exit(1 if regressions else 0)
+	sys.exit(0)
+
+if __name__ == '__main__':
+	INSTANTPROJECT_BENCH_main()
@@ -0,0 +1,103 @@
+#--------------------------------------------------------------
+# InstantProject Background Driver
+#
+# Runs a list of Projection Jobs inside a background Blender, without any UI:
+#   blender -b scene.blend -P InstantProject_cli.py -- --jobs jobs.json [--save-blend]
+#
+# jobs.json is a list of Jobs sharing the opened .blend file:
+#   [{"object": "Rock", "camera": "Camera", "image": "/plates/rock.png", "output": "/out/rock.png", "project_resolution": 0.25}]
+#
+# Progress is written to stdout, one line per Job, for InstantProject_farm.py to parse:
+#   INSTANTPROJECT_RESULT {"index": 0, "status": "ok", "seconds": 1.2, "output": "/out/rock.png"}
+#--------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+
+import bpy
+from bpy_extras.image_utils import load_image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import InstantProject
+
+#--------------------------------------------------------------
+# Functions
+#--------------------------------------------------------------
+
+def INSTANTPROJECT_CLI_parseArguments():
+	argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+	parser = argparse.ArgumentParser(prog='InstantProject_cli.py', description='Runs InstantProject Projection Jobs in a background Blender.')
+	parser.add_argument('--jobs', required=True, help='JSON file listing the Projection Jobs for the opened .blend file')
+	parser.add_argument('--save-blend', action='store_true', help='Save the .blend file after all Jobs have run')
+	return parser.parse_args(argv)
+
+def INSTANTPROJECT_CLI_register():
+	# The Add-on may already be enabled in this Blender, in which case its Classes are registered.
+	try:
+		InstantProject.register()
+	except ValueError:
+		pass
+
+def INSTANTPROJECT_CLI_emit(result):
+	print('INSTANTPROJECT_RESULT ' + json.dumps(result), flush=True)
+
+def INSTANTPROJECT_CLI_runJob(context, job):
+	obj = bpy.data.objects.get(job['object'])
+	if obj is None or not obj.type == 'MESH':
+		raise ValueError(f"Mesh Object '{job['object']}' not found.")
+	camera = bpy.data.objects.get(job['camera']) if job.get('camera') else context.scene.camera
+	if camera is None or not camera.type == 'CAMERA':
+		raise ValueError(f"Camera '{job.get('camera')}' not found.")
+	image = load_image(job['image'], check_existing=True)
+	if image is None:
+		raise ValueError(f"Image '{job['image']}' could not be loaded.")
+
+	# Frame the Camera like 'Match Scene' would
+	context.scene.camera = camera
+	context.scene.render.resolution_x = image.size[0]
+	context.scene.render.resolution_y = image.size[1]
+
+	# Projection operates on the active Object
+	for selected in context.selected_objects:
+		selected.select_set(False)
+	obj.select_set(True)
+	context.view_layer.objects.active = obj
+
+	occluders = InstantProject.INSTANTPROJECT_FN_getOccluders(context) if job.get('use_occlusion') else None
+	projection_image = InstantProject.INSTANTPROJECT_FN_projectObject(context, obj, camera, image, job.get('project_resolution', 0.25), occluders)
+
+	output = job.get('output')
+	if output:
+		os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+		projection_image.filepath_raw = output
+		projection_image.file_format = 'PNG'
+		projection_image.save()
+	return output
+
+def INSTANTPROJECT_CLI_main():
+	arguments = INSTANTPROJECT_CLI_parseArguments()
+	with open(arguments.jobs) as file:
+		jobs = json.load(file)
+	INSTANTPROJECT_CLI_register()
+
+	failures = 0
+	for index, job in enumerate(jobs):
+		start_time = time.perf_counter()
+		try:
+			output = INSTANTPROJECT_CLI_runJob(bpy.context, job)
+			INSTANTPROJECT_CLI_emit({'index': index, 'status': 'ok', 'seconds': time.perf_counter() - start_time, 'output': output})
+		except Exception as error:
+			failures += 1
+			traceback.print_exc()
+			INSTANTPROJECT_CLI_emit({'index': index, 'status': 'failed', 'seconds': time.perf_counter() - start_time, 'error': str(error)})
+
+	if arguments.save_blend and bpy.data.filepath:
+		bpy.ops.wm.save_mainfile()
+	sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+	INSTANTPROJECT_CLI_main()
@@ -0,0 +1,161 @@
+#--------------------------------------------------------------
+# InstantProject Farm Orchestrator
+#
+# Runs a Manifest of Projection Jobs across a pool of background Blender processes:
+#   python InstantProject_farm.py manifest.json --blender /opt/blender/blender --workers 4 --summary results.json
+#
+# The Manifest is a JSON list (or {"jobs": [...]}) or a CSV file with a header row. Every Job needs
+# 'blend', 'object' and 'image'; 'camera', 'output', 'project_resolution' and 'use_occlusion' are optional.
+# Jobs are grouped by .blend file and split into Shards; each Shard runs in one Blender process through
+# InstantProject_cli.py. Failed Jobs are retried in new Shards. Does not require bpy.
+#--------------------------------------------------------------
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+INSTANTPROJECT_FARM_driver = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'InstantProject_cli.py')
+INSTANTPROJECT_FARM_resultPrefix = 'INSTANTPROJECT_RESULT '
+
+#--------------------------------------------------------------
+# Functions
+#--------------------------------------------------------------
+
+def INSTANTPROJECT_FARM_loadManifest(path):
+	# Reads a JSON or CSV Manifest into a list of Job dictionaries.
+	if path.lower().endswith('.csv'):
+		with open(path, newline='') as file:
+			jobs = [dict(row) for row in csv.DictReader(file)]
+		for job in jobs:
+			if job.get('project_resolution'):
+				job['project_resolution'] = float(job['project_resolution'])
+			if 'use_occlusion' in job:
+				job['use_occlusion'] = job['use_occlusion'].strip().lower() in {'1', 'true', 'yes'}
+	else:
+		with open(path) as file:
+			jobs = json.load(file)
+		if isinstance(jobs, dict):
+			jobs = jobs['jobs']
+	for index, job in enumerate(jobs):
+		for key in ('blend', 'object', 'image'):
+			if not job.get(key):
+				raise ValueError(f"Manifest Job {index} is missing '{key}'.")
+	return jobs
+
+def INSTANTPROJECT_FARM_makeShards(job_ids, jobs, shard_size):
+	# Groups Job ids by .blend file, then splits each group into Shards of at most shard_size Jobs.
+	groups = {}
+	for job_id in job_ids:
+		groups.setdefault(jobs[job_id]['blend'], []).append(job_id)
+	shards = []
+	for blend, ids in groups.items():
+		for start in range(0, len(ids), shard_size):
+			shards.append((blend, ids[start:start + shard_size]))
+	return shards
+
+def INSTANTPROJECT_FARM_runShard(blender, blend, job_ids, jobs, timeout, on_result):
+	# Runs one Shard in a background Blender, calling on_result(job_id, result) as each Job reports back.
+	# Jobs that never report (e.g. Blender crashed) are returned as failed. A malformed result line fails the Shard's
+	# unreported Jobs instead of raising, so one bad Shard does not stop the Farm.
+	with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as file:
+		json.dump([{key: value for key, value in jobs[job_id].items() if not key == 'blend'} for job_id in job_ids], file)
+		jobs_path = file.name
+	command = [blender, '-b', blend, '-P', INSTANTPROJECT_FARM_driver, '--', '--jobs', jobs_path]
+	reported = set()
+	log = []
+	malformed = None
+	try:
+		process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+		timer = threading.Timer(timeout, process.kill) if timeout else None
+		if timer:
+			timer.start()
+		try:
+			for line in process.stdout:
+				if line.startswith(INSTANTPROJECT_FARM_resultPrefix):
+					try:
+						result = json.loads(line[len(INSTANTPROJECT_FARM_resultPrefix):])
+						if not 0 <= result['index'] < len(job_ids):
+							raise IndexError(f"Job index {result['index']} out of range")
+						if not isinstance(result.get('status'), str):
+							raise KeyError('status')
+						job_id = job_ids[result['index']]
+					except (ValueError, KeyError, IndexError, TypeError) as exception:
+						malformed = malformed or f'Malformed result line ({type(exception).__name__}: {exception}): {line.strip()[:200]}'
+						continue
+					reported.add(job_id)
+					on_result(job_id, result)
+				else:
+					log.append(line)
+					del log[:-50]
+			process.wait()
+		finally:
+			if timer:
+				timer.cancel()
+		error = malformed or f'Blender exited with code {process.returncode}: ' + ''.join(log[-5:]).strip()
+	except OSError as exception:
+		error = f'Could not start Blender: {exception}'
+	finally:
+		os.remove(jobs_path)
+
+	for job_id in job_ids:
+		if job_id not in reported:
+			on_result(job_id, {'status': 'failed', 'seconds': 0.0, 'error': error})
+
+def INSTANTPROJECT_FARM_run(jobs, blender, workers=2, shard_size=8, retries=1, timeout=None, stream=sys.stdout):
+	# Runs every Job, retrying failures up to retries times, and returns one summary entry per Job.
+	summary = [{'job': job, 'status': 'pending', 'attempts': 0} for job in jobs]
+	lock = threading.Lock()
+	completed = [0]
+
+	def on_result(job_id, result):
+		with lock:
+			entry = summary[job_id]
+			entry['attempts'] += 1
+			entry['status'] = result['status']
+			entry['seconds'] = result.get('seconds', 0.0)
+			entry['output'] = result.get('output')
+			entry['error'] = result.get('error')
+			if result['status'] == 'ok' or entry['attempts'] > retries:
+				completed[0] += 1
+			state = result['status'] if result['status'] == 'ok' or entry['attempts'] > retries else 'retrying'
+			stream.write(f"[{completed[0]}/{len(jobs)}] {entry['job']['blend']} {entry['job']['object']}: {state} ({entry['seconds']:.2f}s)\n")
+			stream.flush()
+
+	pending = list(range(len(jobs)))
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		while pending:
+			futures = [pool.submit(INSTANTPROJECT_FARM_runShard, blender, blend, job_ids, jobs, timeout, on_result) for blend, job_ids in INSTANTPROJECT_FARM_makeShards(pending, jobs, shard_size)]
+			for future in as_completed(futures):
+				future.result()
+			pending = [job_id for job_id in pending if not summary[job_id]['status'] == 'ok' and summary[job_id]['attempts'] <= retries]
+	return summary
+
+def INSTANTPROJECT_FARM_main(argv=None):
+	parser = argparse.ArgumentParser(prog='InstantProject_farm.py', description='Runs an InstantProject Manifest across a pool of background Blender processes.')
+	parser.add_argument('manifest', help='JSON or CSV Manifest of Projection Jobs')
+	parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'), help='Blender executable (default: $BLENDER or blender)')
+	parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of concurrent Blender processes')
+	parser.add_argument('--shard-size', type=int, default=8, help='Maximum number of Jobs per Blender process')
+	parser.add_argument('--retries', type=int, default=1, help='Number of times a failed Job is retried')
+	parser.add_argument('--timeout', type=float, default=None, help='Seconds before a Blender process is killed')
+	parser.add_argument('--summary', default='instantproject_results.json', help='Path of the JSON results summary')
+	arguments = parser.parse_args(argv)
+
+	jobs = INSTANTPROJECT_FARM_loadManifest(arguments.manifest)
+	start_time = time.perf_counter()
+	summary = INSTANTPROJECT_FARM_run(jobs, arguments.blender, max(arguments.workers, 1), max(arguments.shard_size, 1), max(arguments.retries, 0), arguments.timeout)
+	failed = sum(1 for entry in summary if not entry['status'] == 'ok')
+	with open(arguments.summary, 'w') as file:
+		json.dump({'total': len(summary), 'succeeded': len(summary) - failed, 'failed': failed, 'seconds': time.perf_counter() - start_time, 'jobs': summary}, file, indent=2)
+	print(f'{len(summary) - failed}/{len(summary)} Jobs succeeded, summary written to {arguments.summary}')
+	return 1 if failed else 0
+
+if __name__ == '__main__':
+	sys.exit(INSTANTPROJECT_FARM_main())
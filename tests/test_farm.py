@@ -0,0 +1,71 @@
+# Runs the Farm against a stub blender executable, so no Blender is needed: python -m pytest tests
+
+import os
+import sys
+import json
+import stat
+
+import InstantProject_farm
+
+
+def write_blender(tmp_path, body):
+	# Writes an executable standing in for Blender. body runs with jobs (the Shard's Job list) and report(index, **result).
+	path = tmp_path / 'blender'
+	path.write_text('\n'.join((
+		f'#!{sys.executable}',
+		'import sys, json',
+		"jobs = json.load(open(sys.argv[sys.argv.index('--jobs') + 1]))",
+		'def report(index, **result):',
+		f"	print({InstantProject_farm.INSTANTPROJECT_FARM_resultPrefix!r} + json.dumps(dict(result, index=index)), flush=True)",
+		body,
+	)) + '\n')
+	path.chmod(path.stat().st_mode | stat.S_IXUSR)
+	return str(path)
+
+
+def make_jobs(count, blend='scene.blend'):
+	return [{'blend': blend, 'object': f'Object{index}', 'image': 'plate.png'} for index in range(count)]
+
+
+def run(blender, jobs, **kwargs):
+	with open(os.devnull, 'w') as stream:
+		return InstantProject_farm.INSTANTPROJECT_FARM_run(jobs, blender, stream=stream, **kwargs)
+
+
+def test_every_job_reports(tmp_path):
+	blender = write_blender(tmp_path, "for index, job in enumerate(jobs):\n	report(index, status='ok', seconds=0.1, output=job['object'] + '.png')")
+	summary = run(blender, make_jobs(5), workers=2, shard_size=2)
+	assert [entry['status'] for entry in summary] == ['ok'] * 5
+	assert [entry['output'] for entry in summary] == [f'Object{index}.png' for index in range(5)]
+
+
+def test_malformed_result_lines_fail_only_their_shard(tmp_path):
+	body = '\n'.join((
+		"if jobs[0]['object'] == 'Object0':",
+		f"	print({InstantProject_farm.INSTANTPROJECT_FARM_resultPrefix!r} + '{{not json')",
+		f"	print({InstantProject_farm.INSTANTPROJECT_FARM_resultPrefix!r} + json.dumps({{'index': 7, 'status': 'ok'}}))",
+		f"	print({InstantProject_farm.INSTANTPROJECT_FARM_resultPrefix!r} + json.dumps({{'index': 1}}))",
+		'else:',
+		'	for index in range(len(jobs)):',
+		"		report(index, status='ok', seconds=0.1)",
+	))
+	summary = run(write_blender(tmp_path, body), make_jobs(4), workers=2, shard_size=2, retries=0)
+	assert [entry['status'] for entry in summary] == ['failed', 'failed', 'ok', 'ok']
+	assert summary[0]['error'].startswith('Malformed result line')
+
+
+def test_failed_jobs_are_retried(tmp_path):
+	# Fails every Job the first time it is seen, recording attempts next to the stub
+	body = '\n'.join((
+		f"seen_path = {str(tmp_path / 'seen.json')!r}",
+		'try:',
+		'	seen = json.load(open(seen_path))',
+		'except OSError:',
+		'	seen = []',
+		'for index, job in enumerate(jobs):',
+		"	report(index, status='ok' if job['object'] in seen else 'failed', seconds=0.0)",
+		"	seen.append(job['object'])",
+		"json.dump(seen, open(seen_path, 'w'))",
+	))
+	summary = run(write_blender(tmp_path, body), make_jobs(3), workers=1, shard_size=8, retries=1)
+	assert [(entry['status'], entry['attempts']) for entry in summary] == [('ok', 2)] * 3
@@ -0,0 +1,69 @@
+# Runs with the bpy module available (Blender's Python, or the bpy wheel): python -m pytest tests
+
+import numpy as np
+import pytest
+
+pytest.importorskip('bpy')
+import InstantProject
+
+
+class FakePixels:
+	def __init__(self, values):
+		self.values = np.asarray(values, dtype=np.float32).ravel().copy()
+
+	def foreach_get(self, array):
+		array[:] = self.values
+
+	def foreach_set(self, array):
+		self.values[:] = array
+
+
+class FakeImage:
+	def __init__(self, pixels, is_float=True, name='Fake'):
+		self.name = name
+		self.size = (pixels.shape[1], pixels.shape[0])
+		self.channels = 4
+		self.is_float = is_float
+		self.pixels = FakePixels(pixels)
+
+	def update(self):
+		pass
+
+
+def naive_alpha_over(target, decal, placements):
+	# Composites one Stamp after the other with per-Texel straight alpha over, in float64.
+	height, width = target.shape[:2]
+	decal_height, decal_width = decal.shape[:2]
+	premultiplied = decal.reshape(-1, 4).astype(np.float32)
+	premultiplied[:, :3] *= premultiplied[:, 3:]
+	result = target.reshape(-1, 4).astype(np.float64)
+	result[:, :3] *= result[:, 3:]
+	for placement in placements:
+		texels, coords = InstantProject.INSTANTPROJECT_FN_getStampTexels(placement, decal_width / decal_height, width / height, width, height, None)
+		indices, weights = InstantProject.INSTANTPROJECT_FN_bilinearTaps(coords, decal_width, decal_height)
+		samples = InstantProject.INSTANTPROJECT_FN_gatherTaps(premultiplied, indices, weights).astype(np.float64) * placement.get('opacity', 1.0)
+		result[texels] = samples + result[texels] * (1.0 - samples[:, 3:])
+	result[:, :3] /= np.maximum(result[:, 3:], 1e-8)
+	return result.reshape(height, width, 4)
+
+
+def stamp(target, decal, placements):
+	target_image = FakeImage(target)
+	InstantProject.INSTANTPROJECT_FN_stampDecals(target_image, FakeImage(decal), placements)
+	return target_image.pixels.values.reshape(target.shape)
+
+
+def test_overlapping_stamps_match_naive_alpha_over():
+	rng = np.random.default_rng(0)
+	target = rng.random((32, 32, 4)).astype(np.float32)
+	decal = rng.random((8, 8, 4)).astype(np.float32)
+	placements = [{'position': rng.random(2).tolist(), 'size': float(rng.uniform(0.2, 0.6)), 'rotation': float(rng.uniform(0.0, 360.0)), 'opacity': float(rng.uniform(0.3, 1.0))} for index in range(12)]
+	np.testing.assert_allclose(stamp(target, decal, placements), naive_alpha_over(target, decal, placements), atol=1e-4)
+
+
+def test_large_stamp_batches_keep_precision():
+	rng = np.random.default_rng(1)
+	target = rng.random((16, 16, 4)).astype(np.float32)
+	decal = np.concatenate((rng.random((4, 4, 3)), rng.uniform(0.0, 0.05, (4, 4, 1))), axis=2).astype(np.float32)
+	placements = [{'position': [0.5, 0.5], 'size': 1.5, 'rotation': 0.0}] * 2000
+	np.testing.assert_allclose(stamp(target, decal, placements), naive_alpha_over(target, decal, placements), atol=1e-3)